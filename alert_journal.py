@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+from database import DB_FILE, SqliteStore
+from history_store import to_epoch_ns
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+class AlertJournal(SqliteStore):
+    """Diário append-only de alertas, indexado por par e horário.
+
+    Cada alerta recebe um id crescente que nunca é reutilizado, mesmo depois
+    que alertas antigos são descartados pela retenção (``max_alerts``).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pair TEXT NOT NULL,
+            variation REAL NOT NULL,
+            price REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            ts_ns INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_alerts_pair_ts ON alerts (pair, ts_ns);
+        CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts_ns);
+    """
+
+    def __init__(self, db_file=DB_FILE, max_alerts=10_000):
+        super().__init__(db_file)
+        self.max_alerts = max_alerts
+
+    def record(self, pair, variation, price, timestamp):
+        """Registra um alerta e retorna seu id estável."""
+        with self.transaction() as conn:
+            alert_id = conn.execute(
+                "INSERT INTO alerts (pair, variation, price, timestamp, ts_ns) VALUES (?, ?, ?, ?, ?)",
+                (pair, variation, price, timestamp, to_epoch_ns(timestamp))
+            ).lastrowid
+            # Retenção: descarta pela chave primária os alertas mais antigos
+            if self.max_alerts:
+                conn.execute("DELETE FROM alerts WHERE id <= ?", (alert_id - self.max_alerts,))
+        return alert_id
+
+    def update(self, alert_id, variation, price):
+        """Atualiza a variação e o preço de um alerta (repetições agrupadas no mesmo alerta)."""
+        with self.lock:
+            self.conn.execute("UPDATE alerts SET variation = ?, price = ? WHERE id = ?", (variation, price, alert_id))
+
+    @staticmethod
+    def _row_to_alert(row):
+        return {
+            "id": row[0],
+            "pair": row[1],
+            "variation": row[2],
+            "price": row[3],
+            "timestamp": row[4]
+        }
+
+    def get(self, alert_id):
+        """Retorna um alerta pelo id ou None se não existir (ou já tiver sido descartado)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, pair, variation, price, timestamp FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        return self._row_to_alert(row) if row else None
+
+    def query(self, pair=None, since=None, until=None, limit=None):
+        """Alertas em ordem cronológica, filtrados por par e intervalo [since, until).
+
+        ``since``/``until`` aceitam datetime, timestamp ISO ou epoch em ns. A
+        consulta usa os índices (par, horário), sem varrer o diário inteiro.
+        """
+        conditions = []
+        params = []
+        if pair is not None:
+            conditions.append("pair = ?")
+            params.append(pair)
+        if since is not None:
+            conditions.append("ts_ns >= ?")
+            params.append(to_epoch_ns(since))
+        if until is not None:
+            conditions.append("ts_ns < ?")
+            params.append(to_epoch_ns(until))
+
+        sql = "SELECT id, pair, variation, price, timestamp FROM alerts"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ts_ns, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+
+    def import_json(self, alerts_file):
+        """Importa (uma única vez) o alerts.json legado e o renomeia para ``*.imported``."""
+        if not os.path.exists(alerts_file):
+            return 0
+        try:
+            with open(alerts_file, 'r') as f:
+                alerts = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Arquivo de alertas inválido em {alerts_file}. Ignorando importação.")
+            alerts = []
+
+        rows = []
+        for alert in alerts:
+            try:
+                rows.append((
+                    alert["pair"], alert["variation"], alert["price"], alert["timestamp"],
+                    to_epoch_ns(alert["timestamp"])
+                ))
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Alerta inválido ignorado em {alerts_file}: {alert}")
+
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO alerts (pair, variation, price, timestamp, ts_ns) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        os.replace(alerts_file, alerts_file + ".imported")
+        logger.info(f"{len(rows)} alertas importados de {alerts_file}.")
+        return len(rows)
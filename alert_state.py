@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Estados de um par
+ARMED = "armed"      # Pronto para disparar um alerta novo
+FIRED = "fired"      # Alerta enviado; o movimento continua acima da faixa de rearme
+COOLING = "cooling"  # Movimento voltou para dentro da faixa; aguardando o cooldown
+
+# Ações decididas a cada tick
+NEW = "new"
+UPDATE = "update"
+
+# Faixa de histerese (pontos percentuais abaixo do limiar para rearmar), cooldown
+# em segundos e aumento mínimo do movimento para atualizar um alerta já enviado
+ALERT_HYSTERESIS = float(os.environ.get("ALERT_HYSTERESIS", "0.5"))
+ALERT_COOLDOWN = float(os.environ.get("ALERT_COOLDOWN", str(30 * 60)))
+ALERT_UPDATE_STEP = float(os.environ.get("ALERT_UPDATE_STEP", "1.0"))
+
+class AlertState:
+    """Estado do alerta de um par e o que é preciso para atualizá-lo.
+
+    ``messages`` mapeia chat_id para a mensagem enviada e ``footer`` guarda o
+    trecho de notícias já anexado, para que uma atualização edite as mensagens
+    sem buscar as notícias de novo.
+    """
+
+    __slots__ = ("state", "direction", "reported", "fired_at", "cooling_since", "alert_id", "messages",
+                 "footer", "updates")
+
+    def __init__(self):
+        self.state = ARMED
+        self.direction = 0
+        self.reported = 0.0
+        self.fired_at = None
+        self.cooling_since = None
+        self.alert_id = None
+        self.messages = {}
+        self.footer = None
+        self.updates = 0
+
+class AlertStateMachine:
+    """Máquina de estados dos alertas de variação, um estado por par.
+
+    - ``armed``: um movimento de pelo menos ``threshold`` dispara um alerta
+      novo e leva a ``fired``.
+    - ``fired``: o alerta só é atualizado se o movimento crescer mais
+      ``update_step`` pontos ou inverter de direção; quando o movimento cai
+      abaixo de ``threshold - hysteresis``, vai para ``cooling``.
+    - ``cooling``: depois de ``cooldown`` segundos abaixo da faixa, volta a
+      ``armed``; se o limiar for cruzado antes disso, o alerta existente é
+      atualizado em vez de enviar outro.
+    """
+
+    def __init__(self, hysteresis=ALERT_HYSTERESIS, cooldown=ALERT_COOLDOWN, update_step=ALERT_UPDATE_STEP):
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.update_step = update_step
+        self.states = {}
+
+    def get(self, pair):
+        """Estado do alerta de um par (``armed`` se ainda não houver)."""
+        state = self.states.get(pair)
+        if state is None:
+            state = self.states[pair] = AlertState()
+        return state
+
+    def evaluate(self, pair, move, threshold, now=None):
+        """Avança o estado do par com o movimento (%) do tick; retorna ``NEW``, ``UPDATE`` ou None."""
+        now = time.monotonic() if now is None else now
+        state = self.get(pair)
+        magnitude = abs(move) if move is not None else 0.0
+        direction = 1 if move and move > 0 else -1
+
+        if state.state == COOLING and now - state.cooling_since >= self.cooldown:
+            state.state = ARMED
+
+        if state.state == ARMED:
+            if magnitude < threshold:
+                return None
+            state = self.states[pair] = AlertState()
+            state.state = FIRED
+            state.direction = direction
+            state.reported = magnitude
+            state.fired_at = now
+            return NEW
+
+        if state.state == FIRED:
+            if magnitude < threshold - self.hysteresis:
+                state.state = COOLING
+                state.cooling_since = now
+                return None
+            if magnitude >= threshold and (
+                direction != state.direction or magnitude >= state.reported + self.update_step
+            ):
+                return self._update(state, magnitude, direction)
+            return None
+
+        # Em cooling: um novo cruzamento antes do fim do cooldown é agrupado no alerta existente
+        if magnitude >= threshold:
+            state.state = FIRED
+            return self._update(state, magnitude, direction)
+        return None
+
+    @staticmethod
+    def _update(state, magnitude, direction):
+        state.direction = direction
+        state.reported = magnitude
+        state.updates += 1
+        return UPDATE
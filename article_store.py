@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from database import DB_FILE, SqliteStore
+from history_store import to_epoch_ns
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+ARTICLE_FIELDS = ("type", "language", "title", "content", "source", "url", "timestamp")
+
+def article_hash(article):
+    """Hash de deduplicação: a URL normalizada ou, sem URL, o conteúdo do item."""
+    url = (article.get("url") or "").strip().lower().rstrip("/")
+    key = url or "|".join(str(article.get(field) or "") for field in ("type", "source", "title", "content"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+class ArticleStore(SqliteStore):
+    """Armazenamento normalizado das notícias encontradas.
+
+    Cada notícia é gravada uma única vez (deduplicada por ``article_hash``) e
+    cada busca guarda apenas as referências às notícias, ligada ao par e,
+    quando houver, ao id do alerta que a disparou. Buscas antigas são
+    descartadas pela retenção (``max_searches``) junto com as notícias que
+    ficarem sem referência.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT NOT NULL UNIQUE,
+            type TEXT,
+            language TEXT,
+            title TEXT,
+            content TEXT,
+            source TEXT,
+            url TEXT,
+            timestamp TEXT
+        );
+        CREATE TABLE IF NOT EXISTS news_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pair TEXT NOT NULL,
+            variation REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            ts_ns INTEGER NOT NULL,
+            alert_id INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_news_searches_pair_ts ON news_searches (pair, ts_ns);
+        CREATE INDEX IF NOT EXISTS idx_news_searches_alert ON news_searches (alert_id);
+        CREATE TABLE IF NOT EXISTS search_articles (
+            search_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            article_id INTEGER NOT NULL,
+            PRIMARY KEY (search_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_articles_article ON search_articles (article_id);
+    """
+
+    # Intervalo (em buscas) entre as limpezas de notícias sem referência
+    PRUNE_EVERY = 100
+
+    def __init__(self, db_file=DB_FILE, max_searches=10_000):
+        super().__init__(db_file)
+        self.max_searches = max_searches
+
+    def _insert_search(self, conn, pair, variation, timestamp, articles, alert_id):
+        search_id = conn.execute(
+            "INSERT INTO news_searches (pair, variation, timestamp, ts_ns, alert_id) VALUES (?, ?, ?, ?, ?)",
+            (pair, variation, timestamp, to_epoch_ns(timestamp), alert_id)
+        ).lastrowid
+        links = []
+        for position, article in enumerate(articles):
+            digest = article_hash(article)
+            conn.execute(
+                "INSERT OR IGNORE INTO articles (hash, type, language, title, content, source, url, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, *(article.get(field) for field in ARTICLE_FIELDS))
+            )
+            article_id = conn.execute("SELECT id FROM articles WHERE hash = ?", (digest,)).fetchone()[0]
+            links.append((search_id, position, article_id))
+        conn.executemany(
+            "INSERT INTO search_articles (search_id, position, article_id) VALUES (?, ?, ?)", links
+        )
+        return search_id
+
+    def _apply_retention(self, conn, search_id):
+        if not self.max_searches or search_id <= self.max_searches:
+            return
+        cutoff = search_id - self.max_searches
+        conn.execute("DELETE FROM news_searches WHERE id <= ?", (cutoff,))
+        conn.execute("DELETE FROM search_articles WHERE search_id <= ?", (cutoff,))
+        if search_id % self.PRUNE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM articles WHERE NOT EXISTS "
+                "(SELECT 1 FROM search_articles WHERE article_id = articles.id)"
+            )
+
+    def record_search(self, pair, variation, articles, alert_id=None, timestamp=None):
+        """Registra uma busca e suas notícias (só as novas são gravadas) e retorna o id da busca."""
+        timestamp = timestamp or datetime.now().isoformat()
+        with self.transaction() as conn:
+            search_id = self._insert_search(conn, pair, variation, timestamp, articles, alert_id)
+            self._apply_retention(conn, search_id)
+        return search_id
+
+    @staticmethod
+    def _row_to_article(row):
+        article = dict(zip(("id",) + ARTICLE_FIELDS, row))
+        # Mantém o formato dos itens do buscador (tweets não têm título)
+        if article["title"] is None:
+            del article["title"]
+        return article
+
+    def articles_for_alert(self, alert_id):
+        """Notícias ligadas a um alerta, na ordem em que foram encontradas."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT a.id, a.type, a.language, a.title, a.content, a.source, a.url, a.timestamp "
+                "FROM news_searches s "
+                "JOIN search_articles sa ON sa.search_id = s.id "
+                "JOIN articles a ON a.id = sa.article_id "
+                "WHERE s.alert_id = ? ORDER BY s.id, sa.position",
+                (alert_id,)
+            ).fetchall()
+        return [self._row_to_article(row) for row in rows]
+
+    def articles_for_pair(self, pair, since=None, until=None, alerts_only=False):
+        """Notícias distintas encontradas para um par no intervalo [since, until).
+
+        ``since``/``until`` aceitam datetime, timestamp ISO ou epoch em ns; com
+        ``alerts_only``, só conta buscas ligadas a alertas. A consulta usa o
+        índice (par, horário) das buscas.
+        """
+        conditions = ["s.pair = ?"]
+        params = [pair]
+        if since is not None:
+            conditions.append("s.ts_ns >= ?")
+            params.append(to_epoch_ns(since))
+        if until is not None:
+            conditions.append("s.ts_ns < ?")
+            params.append(to_epoch_ns(until))
+        if alerts_only:
+            conditions.append("s.alert_id IS NOT NULL")
+
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT a.id, a.type, a.language, a.title, a.content, a.source, a.url, a.timestamp "
+                "FROM articles a WHERE a.id IN ("
+                "SELECT sa.article_id FROM news_searches s "
+                "JOIN search_articles sa ON sa.search_id = s.id "
+                "WHERE " + " AND ".join(conditions) + ") ORDER BY a.id",
+                params
+            ).fetchall()
+        return [self._row_to_article(row) for row in rows]
+
+    def count(self):
+        """Número de notícias distintas armazenadas."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def import_json(self, news_file):
+        """Importa (uma única vez) o news.json legado e o renomeia para ``*.imported``."""
+        if not os.path.exists(news_file):
+            return 0
+        try:
+            with open(news_file, 'r') as f:
+                searches = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Arquivo de notícias inválido em {news_file}. Ignorando importação.")
+            searches = []
+
+        imported = 0
+        with self.transaction() as conn:
+            for search in searches:
+                try:
+                    self._insert_search(
+                        conn, search["pair"], search["variation"], search["timestamp"],
+                        search.get("results", []), None
+                    )
+                    imported += 1
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    logger.warning(f"Busca de notícias inválida ignorada em {news_file}.")
+        os.replace(news_file, news_file + ".imported")
+        logger.info(f"{imported} buscas de notícias importadas de {news_file}.")
+        return imported
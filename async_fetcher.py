@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import httpx
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+class AsyncFetcher:
+    """Cliente HTTP assíncrono com pool de conexões keep-alive reutilizadas.
+
+    O cliente é criado na primeira requisição e fica preso ao event loop em que
+    foi criado; use ``aclose`` antes de encerrar o loop.
+    """
+
+    def __init__(self, timeout=5.0, max_connections=20, headers=None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.headers = headers or DEFAULT_HEADERS
+        self._client = None
+
+    @property
+    def client(self):
+        """Cliente httpx compartilhado (criado sob demanda)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def get_json(self, url, params=None, timeout=None):
+        """Faz um GET e retorna o JSON, respeitando um prazo total por requisição."""
+        response = await asyncio.wait_for(
+            self.client.get(url, params=params),
+            timeout or self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def gather_json(self, requests, timeout=None):
+        """Executa várias requisições ``{chave: (url, params)}`` concorrentemente.
+
+        Retorna ``{chave: json}``; requisições que falharam ou estouraram o
+        prazo aparecem com a exceção correspondente no lugar do JSON.
+        """
+        keys = list(requests)
+        results = await asyncio.gather(
+            *(self.get_json(url, params, timeout) for url, params in requests.values()),
+            return_exceptions=True
+        )
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Falha na requisição de {key}: {result!r}")
+        return dict(zip(keys, results))
+
+    async def aclose(self):
+        """Fecha as conexões do pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
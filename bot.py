@@ -1,14 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import sys
+import startup_profile
+
+# --profile-startup mede o tempo de importação de cada módulo a partir daqui
+if "--profile-startup" in sys.argv:
+    startup_profile.install()
+
 import asyncio
 import logging
 import os
-import json
-from datetime import datetime
 from price_monitor import PriceMonitor
 from scheduler import PriceScheduler
-from news_searcher import NewsSearcher
+from news_searcher import NewsSearcher, NEWS_CACHE_FILE
+from loop_watchdog import LoopWatchdog
+from subscribers import SubscriberStore
+from alert_journal import AlertJournal
+from charts import ChartRenderer, RANGES, DEFAULT_RANGE
+from price_targets import ABOVE, PriceTargets, parse_rule
 
 # Configuração de logging
 logging.basicConfig(
@@ -26,67 +36,68 @@ os.makedirs(DATA_DIR, exist_ok=True)
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
 ALERTS_FILE = os.path.join(DATA_DIR, "alerts.json")
 
-# Inicializa o arquivo de usuários se não existir
-if not os.path.exists(USERS_FILE):
-    with open(USERS_FILE, 'w') as f:
-        json.dump([], f)
+# Recebimento de updates: "polling" (padrão) ou "webhook"; --polling/--webhook têm prioridade
+BOT_MODE = os.environ.get("BOT_MODE", "polling")
 
-# Inicializa o monitor de preços, o agendador e o buscador de notícias
-price_monitor = PriceMonitor()
-news_searcher = NewsSearcher()
+# Inicializa os assinantes e o diário de alertas (importando os JSON legados), os
+# alvos de preço dos usuários, o monitor de preços, o agendador, o buscador de notícias e o gerador de gráficos.
+# O histórico de preços é carregado em segundo plano, depois que o polling começa.
+with startup_profile.phase("assinantes"):
+    subscribers = SubscriberStore()
+    subscribers.import_json(USERS_FILE)
+with startup_profile.phase("diário de alertas"):
+    alert_journal = AlertJournal()
+    alert_journal.import_json(ALERTS_FILE)
+with startup_profile.phase("alvos de preço"):
+    price_targets = PriceTargets()
+with startup_profile.phase("monitor de preços"):
+    price_monitor = PriceMonitor(lazy=True)
+with startup_profile.phase("buscador de notícias"):
+    news_searcher = NewsSearcher(price_monitor.registry, cache_file=NEWS_CACHE_FILE)
+chart_renderer = ChartRenderer(price_monitor, alert_journal)
 scheduler = None
 
-def load_users():
-    """Carrega a lista de usuários registrados."""
-    try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        logger.warning("Erro ao carregar usuários. Criando nova lista.")
-        return []
-
-def save_user(chat_id, username=None, first_name=None):
-    """Salva um usuário na lista de usuários registrados."""
-    users = load_users()
-    
-    # Verifica se o usuário já está registrado
-    for user in users:
-        if user.get("chat_id") == chat_id:
-            return False
-    
-    # Adiciona o novo usuário
-    users.append({
-        "chat_id": chat_id,
-        "username": username,
-        "first_name": first_name,
-        "registered_at": datetime.now().isoformat()
-    })
-    
-    # Salva a lista atualizada
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
-    
-    return True
-
-async def send_news_for_alert(bot, chat_ids, pair, variation_pct):
-    """Busca notícias relacionadas a um alerta e envia para os usuários."""
+def monitored_pairs():
+    """Lista os nomes dos pares monitorados para exibição."""
+    return ", ".join(price_monitor.registry.names())
+
+def monitoring_intervals():
+    """Intervalos de verificação de cada par para exibição."""
+    return scheduler.describe_intervals() if scheduler else "a cada 5 minutos"
+
+async def stream_news_for_alert(broadcaster, messages, pair, variation_pct, alert_text, alert_id=None):
+    """Acrescenta as notícias às mensagens de alerta já enviadas, à medida que chegam.
+    
+    ``messages`` mapeia chat_id para a mensagem de alerta enviada. Cada fonte
+    que responde gera uma edição das mensagens; respostas que chegam enquanto
+    uma edição está em andamento são agrupadas na edição seguinte. Retorna o
+    trecho de notícias acrescentado a ``alert_text`` (None em caso de erro).
+    """
     try:
-        # Busca notícias relacionadas
-        news_list = news_searcher.search_news_for_pair(pair, variation_pct)
-        
-        if not news_list:
-            message = f"Não foram encontradas notícias relacionadas à variação de {variation_pct:.2f}% em {pair}."
-        else:
-            message = news_searcher.format_news_message(pair, variation_pct, news_list)
-        
-        # Envia a mensagem para todos os chats registrados
-        for chat_id in chat_ids:
-            await bot.send_message(chat_id=chat_id, text=message)
+        last_text = None
+        text = alert_text
+        async for news_list in news_searcher.stream_news(pair, variation_pct, alert_id=alert_id):
+            if news_list:
+                text = alert_text + news_searcher.format_news_items(news_list)
+            elif news_list.pending:
+                continue
+            else:
+                text = alert_text + f"Não foram encontradas notícias relacionadas à variação de {variation_pct:.2f}% em {pair}."
+            
+            # Edita as mensagens só quando o conteúdo muda
+            if broadcaster and messages and text != last_text:
+                await broadcaster.fan_out(
+                    list(messages),
+                    lambda chat_id: broadcaster.bot.edit_message_text(
+                        text=text, chat_id=chat_id, message_id=messages[chat_id].message_id
+                    )
+                )
+                last_text = text
         
-        return True
+        return text[len(alert_text):]
     except Exception as e:
         logger.error(f"Erro ao buscar e enviar notícias: {e}")
-        return False
+        return None
 
 # Comandos básicos
 async def start(update, context):
@@ -94,16 +105,12 @@ async def start(update, context):
     user = update.effective_user
     chat_id = update.effective_chat.id
     
-    # Registra o usuário para receber alertas
-    is_new = save_user(chat_id, user.username, user.first_name)
-    
-    # Adiciona o chat_id ao agendador
-    if scheduler:
-        scheduler.add_chat_id(chat_id)
+    # Registra (ou reativa) o usuário para receber alertas
+    is_new = await asyncio.to_thread(subscribers.add, chat_id, user.username, user.first_name)
     
     welcome_text = (
         f"Olá, {user.first_name}! 👋\n\n"
-        f"Bem-vindo ao Radar Financeiro Bot! Estou aqui para monitorar os pares BTC/USD e USD/BRL "
+        f"Bem-vindo ao Radar Financeiro Bot! Estou aqui para monitorar os pares {monitored_pairs()} "
         f"e te alertar sobre variações significativas de preço.\n\n"
     )
     
@@ -124,10 +131,12 @@ async def help_command(update, context):
         "/help - Mostra esta mensagem de ajuda\n"
         "/status - Verifica o status atual do monitoramento\n"
         "/preco - Mostra os preços atuais dos pares monitorados\n"
+        f"/grafico <par> <período> - Gráfico de preços ({', '.join(RANGES)}), ex.: /grafico BTC/USD 24h\n"
+        "/alerta <par> > ou < <preço> - Avisa quando o par atingir o preço, ex.: /alerta BTC/USD > 70000\n"
         "/config - Mostra a configuração atual do bot\n"
         "/parar - Para de receber alertas\n"
         "/continuar - Volta a receber alertas\n\n"
-        "Este bot monitora automaticamente os pares BTC/USD e USD/BRL a cada 5 minutos "
+        f"Este bot monitora automaticamente os pares {monitored_pairs()} ({monitoring_intervals()}) "
         "e envia alertas quando há variação de 2% ou mais, junto com notícias relacionadas."
     )
 
@@ -135,23 +144,47 @@ async def status_command(update, context):
     """Envia o status atual do monitoramento."""
     last_check = "Nunca" if not scheduler or not scheduler.last_check_time else scheduler.last_check_time.strftime('%d/%m/%Y %H:%M:%S')
     
+    # Atraso dos ticks (início real menos o prazo) de cada par
+    lag_lines = ""
+    if scheduler and scheduler.ticks:
+        for pair in list(scheduler.ticks.ticks):
+            stats = scheduler.ticks.stats(pair)
+            if stats["ticks"]:
+                skipped = f", {stats['skipped']} pulada(s)" if stats["skipped"] else ""
+                lag_lines += f"{pair}: {stats['ticks']} verificações, atraso p95 de {stats['lag_p95_ms']:.0f} ms{skipped}\n"
+        if lag_lines:
+            lag_lines += "\n"
+    
+    # Saúde dos provedores de cotações (circuit breakers)
+    provider_lines = ""
+    if hasattr(price_monitor.provider, "stats"):
+        for provider in price_monitor.provider.stats():
+            latency = f"{provider['latency_ms']:.0f} ms" if provider["latency_ms"] is not None else "sem medição"
+            if provider["state"] == "closed":
+                provider_lines += f"{provider['name']}: ✅ {latency}, {provider['success']:.0%} de sucesso\n"
+            else:
+                provider_lines += f"{provider['name']}: ⛔ fora do ar (novo teste em {provider['retry_in']:.0f}s)\n"
+        provider_lines += "\n"
+    
     await update.message.reply_text(
         "🔍 Status do Monitoramento:\n\n"
         f"✅ Bot ativo e funcionando\n"
-        f"✅ Monitorando BTC/USD\n"
-        f"✅ Monitorando USD/BRL\n"
-        f"✅ Verificação a cada 5 minutos\n"
+        f"✅ Monitorando {monitored_pairs()}\n"
+        f"✅ Verificação: {monitoring_intervals()}\n"
         f"✅ Alertas configurados para variações de 2% ou mais\n"
         f"✅ Busca automática de notícias ativada\n\n"
+        f"{lag_lines}"
+        f"{provider_lines}"
         f"Última verificação: {last_check}"
     )
 
 async def price_command(update, context):
-    """Envia os preços atuais dos pares monitorados."""
-    await update.message.reply_text("Obtendo preços atuais... Por favor, aguarde.")
+    """Envia os preços atuais dos pares monitorados (servidos do cache de cotações)."""
+    if not price_monitor.quote_cache.is_fresh():
+        await update.message.reply_text("Obtendo preços atuais... Por favor, aguarde.")
     
     try:
-        message = price_monitor.format_price_message()
+        message = await price_monitor.fetch_price_message()
         await update.message.reply_text(message)
     except Exception as e:
         logger.error(f"Erro ao obter preços: {e}")
@@ -159,15 +192,121 @@ async def price_command(update, context):
             "❌ Erro ao obter preços atuais. Por favor, tente novamente mais tarde."
         )
 
+def find_pair(text):
+    """Encontra um par monitorado pelo nome, sem diferenciar maiúsculas e aceitando ``BTCUSD``."""
+    wanted = text.upper().replace("/", "")
+    for name in price_monitor.registry.names():
+        if name.upper().replace("/", "") == wanted:
+            return name
+    return None
+
+async def chart_command(update, context):
+    """Envia o gráfico de preços de um par no período pedido (/grafico <par> <período>)."""
+    args = context.args or []
+    pair = find_pair(args[0]) if args else price_monitor.registry.names()[0]
+    range_name = args[1].lower() if len(args) > 1 else DEFAULT_RANGE
+    
+    if pair is None or range_name not in RANGES:
+        await update.message.reply_text(
+            f"Uso: /grafico <par> <período>\n\nPares: {monitored_pairs()}\nPeríodos: {', '.join(RANGES)}"
+        )
+        return
+    
+    try:
+        key, file_id, png = await chart_renderer.get(pair, range_name)
+        caption = f"📊 {pair} - {range_name}"
+        
+        if file_id is not None:
+            try:
+                # Reenvia a imagem já enviada (sem gerar nem fazer upload de novo)
+                await update.message.reply_photo(photo=file_id, caption=caption)
+                return
+            except Exception as e:
+                logger.warning(f"file_id em cache recusado ({e}). Gerando o gráfico novamente.")
+                chart_renderer.forget(key)
+                key, file_id, png = await chart_renderer.get(pair, range_name)
+        
+        if png is None:
+            await update.message.reply_text(f"Ainda não há histórico de {pair} para o período {range_name}.")
+            return
+        
+        message = await update.message.reply_photo(photo=png, caption=caption)
+        chart_renderer.remember(key, message.photo[-1].file_id)
+    except Exception as e:
+        logger.error(f"Erro ao gerar gráfico de {pair}: {e}")
+        await update.message.reply_text("❌ Erro ao gerar o gráfico. Por favor, tente novamente mais tarde.")
+
+TARGET_USAGE = (
+    "Uso:\n"
+    "/alerta <par> > <preço> - avisa quando o preço subir até o alvo\n"
+    "/alerta <par> < <preço> - avisa quando o preço cair até o alvo\n"
+    "/alerta - lista seus alvos\n"
+    "/alerta remover <número> - remove um alvo\n\n"
+    "Ex.: /alerta BTC/USD > 70000"
+)
+
+def format_target(rule):
+    """Descreve um alvo de preço, ex.: ``BTC/USD acima de $70,000.00``."""
+    config = price_monitor.registry.get(rule["pair"])
+    side = "acima de" if rule["direction"] == ABOVE else "abaixo de"
+    return f"{rule['pair']} {side} {config.format_price(rule['target'])}"
+
+async def target_command(update, context):
+    """Cria, lista ou remove alvos de preço do usuário (/alerta BTC/USD > 70000)."""
+    chat_id = update.effective_chat.id
+    args = context.args or []
+    
+    # Sem argumentos: lista os alvos pendentes
+    if not args:
+        rules = price_targets.for_chat(chat_id)
+        if not rules:
+            await update.message.reply_text(f"Você não tem alvos de preço.\n\n{TARGET_USAGE}")
+            return
+        lines = [f"#{rule['id']} - {format_target(rule)}" for rule in rules]
+        await update.message.reply_text("🎯 Seus alvos de preço:\n\n" + "\n".join(lines))
+        return
+    
+    if args[0].lower() == "remover":
+        try:
+            target_id = int(args[1].lstrip("#"))
+        except (IndexError, ValueError):
+            await update.message.reply_text(TARGET_USAGE)
+            return
+        if await asyncio.to_thread(price_targets.remove, chat_id, target_id):
+            await update.message.reply_text(f"🗑️ Alvo #{target_id} removido.")
+        else:
+            await update.message.reply_text(f"Alvo #{target_id} não encontrado.")
+        return
+    
+    try:
+        # Valores como "5,125" são desfeitos pelo preço atual do par (último tick)
+        name, direction, target = parse_rule(
+            " ".join(args), reference=lambda name: price_targets.last_prices.get(find_pair(name))
+        )
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}.\n\n{TARGET_USAGE}")
+        return
+    pair = find_pair(name)
+    if pair is None:
+        await update.message.reply_text(f"Par não monitorado: {name}\n\nPares: {monitored_pairs()}")
+        return
+    
+    try:
+        target_id = await asyncio.to_thread(price_targets.add, chat_id, pair, direction, target)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}.")
+        return
+    rule = {"pair": pair, "direction": direction, "target": target}
+    await update.message.reply_text(f"🎯 Alvo #{target_id} criado: {format_target(rule)}.\n\nVocê será avisado quando o preço atingir o alvo.")
+
 async def config_command(update, context):
     """Envia a configuração atual do bot."""
     threshold = "2%" if not scheduler else f"{scheduler.alert_threshold}%"
-    interval = "5 minutos" if not scheduler else f"{scheduler.check_interval // 60} minutos"
     
     await update.message.reply_text(
         "⚙️ Configuração Atual:\n\n"
-        f"Pares monitorados: BTC/USD, USD/BRL\n"
-        f"Intervalo de verificação: {interval}\n"
+        f"Pares monitorados: {monitored_pairs()}\n"
+        f"Intervalo de verificação: {monitoring_intervals()}\n"
         f"Limiar de alerta: {threshold} de variação\n"
         f"Busca de notícias: Ativada (português e inglês)\n"
         f"Modo de execução: 24/7\n\n"
@@ -178,8 +317,8 @@ async def stop_alerts(update, context):
     """Para de enviar alertas para o usuário."""
     chat_id = update.effective_chat.id
     
-    if scheduler:
-        scheduler.remove_chat_id(chat_id)
+    # Pausa os alertas de forma persistente
+    await asyncio.to_thread(subscribers.set_active, chat_id, False)
     
     await update.message.reply_text(
         "🔕 Você não receberá mais alertas de variação de preço.\n\n"
@@ -191,12 +330,8 @@ async def resume_alerts(update, context):
     user = update.effective_user
     chat_id = update.effective_chat.id
     
-    # Registra o usuário para receber alertas
-    save_user(chat_id, user.username, user.first_name)
-    
-    # Adiciona o chat_id ao agendador
-    if scheduler:
-        scheduler.add_chat_id(chat_id)
+    # Registra (ou reativa) o usuário para receber alertas
+    await asyncio.to_thread(subscribers.add, chat_id, user.username, user.first_name)
     
     await update.message.reply_text(
         "🔔 Você voltará a receber alertas de variação de preço.\n\n"
@@ -216,111 +351,40 @@ async def error_handler(update, context):
 class EnhancedPriceScheduler(PriceScheduler):
     """Versão aprimorada do PriceScheduler com suporte a notícias."""
     
-    async def check_prices(self):
-        """Verifica os preços e envia alertas com notícias se necessário."""
-        logger.info("Verificando preços...")
-        self.last_check_time = datetime.now()
-        
-        # Obtém os dados de preço atuais
-        data = self.monitor.get_price_data()
+    async def _follow_up(self, pair, quote, report, alert_id):
+        """Edita o alerta enviado, acrescentando as notícias relacionadas conforme chegam.
         
-        alerts_sent = False
-        
-        # Verifica BTC/USD
-        btc_usd = data["BTC/USD"]
-        if btc_usd["variation"] is not None and abs(btc_usd["variation"]) >= self.alert_threshold:
-            logger.info(f"Alerta! Variação de {btc_usd['variation']:.2f}% em BTC/USD")
-            
-            # Salva o alerta
-            alert_index = self._save_alert(
-                "BTC/USD", 
-                btc_usd["variation"], 
-                btc_usd["price"], 
-                btc_usd["timestamp"]
-            )
-            
-            # Formata a mensagem de alerta
-            direction = "aumento" if btc_usd["variation"] > 0 else "queda"
-            emoji = "🔺" if btc_usd["variation"] > 0 else "🔻"
-            
-            message = (
-                f"{emoji} ALERTA DE VARIAÇÃO {emoji}\n\n"
-                f"Par: BTC/USD\n"
-                f"Variação: {btc_usd['variation']:.2f}%\n"
-                f"Preço atual: ${btc_usd['price']:,.2f}\n"
-                f"Direção: {direction}\n"
-                f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
-                f"Buscando notícias relacionadas..."
-            )
-            
-            # Envia o alerta para todos os chats registrados
-            if self.bot and self.chat_ids:
-                for chat_id in self.chat_ids:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-            
-            # Busca e envia notícias relacionadas
-            await send_news_for_alert(self.bot, self.chat_ids, "BTC/USD", btc_usd["variation"])
-            
-            alerts_sent = True
-        
-        # Verifica USD/BRL
-        usd_brl = data["USD/BRL"]
-        if usd_brl["variation"] is not None and abs(usd_brl["variation"]) >= self.alert_threshold:
-            logger.info(f"Alerta! Variação de {usd_brl['variation']:.2f}% em USD/BRL")
-            
-            # Salva o alerta
-            alert_index = self._save_alert(
-                "USD/BRL", 
-                usd_brl["variation"], 
-                usd_brl["price"], 
-                usd_brl["timestamp"]
-            )
-            
-            # Formata a mensagem de alerta
-            direction = "aumento" if usd_brl["variation"] > 0 else "queda"
-            emoji = "🔺" if usd_brl["variation"] > 0 else "🔻"
-            
-            message = (
-                f"{emoji} ALERTA DE VARIAÇÃO {emoji}\n\n"
-                f"Par: USD/BRL\n"
-                f"Variação: {usd_brl['variation']:.2f}%\n"
-                f"Preço atual: R${usd_brl['price']:,.2f}\n"
-                f"Direção: {direction}\n"
-                f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
-                f"Buscando notícias relacionadas..."
-            )
-            
-            # Envia o alerta para todos os chats registrados
-            if self.bot and self.chat_ids:
-                for chat_id in self.chat_ids:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-            
-            # Busca e envia notícias relacionadas
-            await send_news_for_alert(self.bot, self.chat_ids, "USD/BRL", usd_brl["variation"])
-            
-            alerts_sent = True
-        
-        if not alerts_sent:
-            logger.info("Nenhuma variação significativa detectada.")
-        
-        return data
+        Retorna o rodapé com as notícias, reaproveitado nas atualizações do alerta.
+        """
+        footer = "📰 Notícias relacionadas:\n\n"
+        alert_text = self._format_alert_message(pair, quote, footer=footer)
+        messages = report.results if report else {}
+        news = await stream_news_for_alert(self.broadcaster, messages, pair, quote["variation"], alert_text, alert_id)
+        return footer + news if news is not None else None
 
-async def run_bot():
-    """Função para executar o bot do Telegram."""
-    global scheduler
+def build_application(token=TOKEN, base_url=None):
+    """Cria a aplicação do Telegram com os handlers dos comandos.
     
+    ``base_url`` substitui o endereço da Bot API (ex.: um servidor local de testes).
+    """
     # Importações dentro da função para evitar problemas de circular import
-    from telegram import Update
-    from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+    with startup_profile.phase("importação do telegram"):
+        from telegram.ext import Application, CommandHandler, MessageHandler, filters
     
     # Cria a aplicação e passa o token do bot
-    application = Application.builder().token(TOKEN).build()
+    with startup_profile.phase("criação da aplicação"):
+        builder = Application.builder().token(token)
+        if base_url:
+            builder = builder.base_url(base_url)
+        application = builder.build()
 
     # Adiciona handlers para comandos
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("preco", price_command))
+    application.add_handler(CommandHandler("grafico", chart_command))
+    application.add_handler(CommandHandler("alerta", target_command))
     application.add_handler(CommandHandler("config", config_command))
     application.add_handler(CommandHandler("parar", stop_alerts))
     application.add_handler(CommandHandler("continuar", resume_alerts))
@@ -331,48 +395,104 @@ async def run_bot():
     # Handler para erros
     application.add_error_handler(error_handler)
     
-    # Inicializa o agendador com a aplicação
-    scheduler = EnhancedPriceScheduler(application.bot, [user["chat_id"] for user in load_users()])
+    return application
+
+async def start_webhook(application, **kwargs):
+    """Inicia o servidor de webhook, que entrega os updates à aplicação, e registra a URL no Telegram.
+    
+    O segredo vem de ``WEBHOOK_SECRET`` (ou é gerado a cada início) e a URL
+    pública de ``WEBHOOK_URL`` ou do domínio do Railway.
+    """
+    from telegram import Update
+    from webhook import WebhookServer, webhook_url
+    
+    async def handle_update(data):
+        await application.process_update(Update.de_json(data, application.bot))
+    
+    server = WebhookServer(handle_update, secret_token=os.environ.get("WEBHOOK_SECRET"), **kwargs)
+    await server.start()
+    
+    url = webhook_url(server.path)
+    if url:
+        await application.bot.set_webhook(
+            url, secret_token=server.secret_token, allowed_updates=Update.ALL_TYPES, max_connections=server.workers
+        )
+        logger.info(f"Webhook registrado em {url}")
+    else:
+        logger.warning("WEBHOOK_URL não definida: o webhook não foi registrado no Telegram.")
+    return server
+
+async def run_bot(mode=BOT_MODE):
+    """Função para executar o bot do Telegram por polling ou por webhook."""
+    global scheduler
+    from telegram import Update
+    
+    application = build_application()
     
-    # Inicia o bot
-    await application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Inicializa o agendador com a aplicação, os assinantes e o monitor compartilhados
+    scheduler = EnhancedPriceScheduler(
+        application.bot, subscribers, monitor=price_monitor, alerts=alert_journal, targets=price_targets
+    )
+    
+    # Recebimento de updates, monitoramento periódico e comandos compartilham o mesmo event loop
+    with startup_profile.phase("initialize (getMe)"):
+        await application.initialize()
+    async with application:
+        server = None
+        with startup_profile.phase(f"início do {mode}"):
+            await application.start()
+            if mode == "webhook":
+                server = await start_webhook(application)
+            else:
+                await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+        if startup_profile.enabled():
+            logger.info(startup_profile.report("Pronto para receber updates"))
+        try:
+            await run_monitoring(scheduler)
+        finally:
+            if server is not None:
+                await server.stop()
+            else:
+                await application.updater.stop()
+            await application.stop()
+            chart_renderer.close()
 
 async def run_price_monitor():
     """Função para executar o monitoramento de preços."""
     global scheduler
     
     # Inicializa o agendador sem bot (apenas para monitoramento)
-    scheduler = EnhancedPriceScheduler()
+    scheduler = EnhancedPriceScheduler(
+        subscribers=subscribers, monitor=price_monitor, alerts=alert_journal, targets=price_targets
+    )
+    
+    await run_monitoring(scheduler)
+
+async def run_monitoring(price_scheduler):
+    """Executa o monitoramento periódico no event loop atual até ser cancelado."""
+    # Registra travamentos do event loop
+    watchdog = LoopWatchdog()
+    watchdog.start()
     
-    # Inicia o monitoramento
-    await scheduler.start_monitoring()
+    try:
+        await price_scheduler.start_monitoring()
+    finally:
+        price_scheduler.stop_monitoring()
+        watchdog.stop()
+        await price_monitor.fetcher.aclose()
 
 def main():
     """Função principal que decide qual modo executar."""
-    import sys
-    
     # Verifica se há argumentos de linha de comando
-    if len(sys.argv) > 1 and sys.argv[1] == "--monitor-only":
+    if "--monitor-only" in sys.argv[1:]:
         print("Iniciando apenas o monitoramento de preços (sem bot do Telegram)...")
         asyncio.run(run_price_monitor())
     else:
-        print("Iniciando o bot do Telegram com monitoramento de preços...")
+        mode = "webhook" if "--webhook" in sys.argv[1:] else "polling" if "--polling" in sys.argv[1:] else BOT_MODE
+        print(f"Iniciando o bot do Telegram ({mode}) com monitoramento de preços...")
         try:
-            # Executa o monitoramento em uma thread separada
-            import threading
-            
-            def run_async_monitoring():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(run_price_monitor())
-                
-            # Inicia o monitoramento em uma thread separada
-            monitoring_thread = threading.Thread(target=run_async_monitoring)
-            monitoring_thread.daemon = True  # Thread será encerrada quando o programa principal terminar
-            monitoring_thread.start()
-            
-            # Executa o bot na thread principal
-            asyncio.run(run_bot())
+            # Bot e monitoramento rodam no mesmo processo e no mesmo event loop
+            asyncio.run(run_bot(mode))
             
         except KeyboardInterrupt:
             print("Bot encerrado pelo usuário.")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import logging
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Limites do Telegram: ~30 mensagens/s no total e ~1 mensagem/s por chat
+GLOBAL_RATE = 25
+PER_CHAT_RATE = 1
+
+async def _aiter(items):
+    """Percorre um iterável comum ou assíncrono."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+class TokenBucket:
+    """Token bucket para limitar a taxa de chamadas dentro de um event loop."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    async def acquire(self):
+        """Aguarda até haver um token disponível e o consome."""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def is_full(self):
+        """Indica se o bucket está cheio (nenhum envio recente)."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+class BroadcastReport:
+    """Resultado de uma transmissão: entregas, falhas por chat e latências."""
+
+    def __init__(self, total=0):
+        self.total = total
+        self.results = {}
+        self.failed = {}
+        self.blocked = set()
+        self.retries = 0
+        self.latencies = []
+        self.duration = 0.0
+
+    @property
+    def sent(self):
+        return len(self.results)
+
+    def percentile(self, pct):
+        """Percentil das latências de entrega (em segundos, desde o início da transmissão)."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self):
+        """Resumo legível da transmissão para o log."""
+        if not self.latencies:
+            return f"0/{self.total} enviadas, {len(self.failed)} falhas"
+        return (
+            f"{self.sent}/{self.total} enviadas, {len(self.failed)} falhas, {self.retries} novas tentativas "
+            f"em {self.duration:.2f}s (p50 {self.percentile(50):.2f}s, "
+            f"p95 {self.percentile(95):.2f}s, p99 {self.percentile(99):.2f}s)"
+        )
+
+class Broadcaster:
+    """Envio concorrente de mensagens respeitando os limites do Telegram.
+
+    Cada envio consome um token do bucket do chat e um do bucket global, com no
+    máximo ``concurrency`` chamadas em andamento. Um ``RetryAfter`` (HTTP 429)
+    pausa todos os envios pelo tempo pedido antes de tentar de novo; erros de
+    rede temporários são repetidos até ``max_retries`` vezes. A falha de um chat
+    nunca interrompe os demais.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE, per_chat_rate=PER_CHAT_RATE,
+                 concurrency=20, max_retries=3):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets = {}
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # Descarta buckets ociosos para não crescer com o número de chats
+            if len(self.chat_buckets) > 10_000:
+                self.chat_buckets = {k: b for k, b in self.chat_buckets.items() if not b.is_full()}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    async def _wait_pause(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, chat_id, func, report=None):
+        """Executa ``func()`` (uma chamada à API para ``chat_id``) com limites e novas tentativas."""
+        attempt = 0
+        while True:
+            await self._chat_bucket(chat_id).acquire()
+            await self._wait_pause()
+            await self.global_bucket.acquire()
+            try:
+                return await func()
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = e.retry_after
+                retry_after = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                logger.warning(f"Limite do Telegram atingido. Pausando envios por {retry_after:.1f}s.")
+            except (TimedOut, NetworkError) as e:
+                if isinstance(e, BadRequest) or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            attempt += 1
+            if report is not None:
+                report.retries += 1
+
+    async def fan_out(self, chat_ids, make_call):
+        """Executa ``make_call(chat_id)`` para todos os chats e retorna um BroadcastReport.
+        
+        ``chat_ids`` pode ser um iterável comum ou assíncrono; ele é consumido
+        sob demanda, com no máximo ``concurrency`` envios em andamento.
+        """
+        report = BroadcastReport(0)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+        start = time.monotonic()
+
+        async def deliver(chat_id):
+            try:
+                report.results[chat_id] = await self.call(chat_id, lambda: make_call(chat_id), report)
+                report.latencies.append(time.monotonic() - start)
+            except Exception as e:
+                report.failed[chat_id] = e
+                if isinstance(e, Forbidden):
+                    report.blocked.add(chat_id)
+                logger.error(f"Erro ao enviar mensagem para {chat_id}: {e}")
+            finally:
+                semaphore.release()
+
+        async for chat_id in _aiter(chat_ids):
+            await semaphore.acquire()
+            report.total += 1
+            task = asyncio.create_task(deliver(chat_id))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending)
+        report.duration = time.monotonic() - start
+        logger.info(f"Transmissão concluída: {report.summary()}")
+        return report
+
+    async def broadcast(self, chat_ids, text, **kwargs):
+        """Envia ``text`` para todos os chats."""
+        return await self.fan_out(
+            chat_ids,
+            lambda chat_id: self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        )
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import asyncio
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Períodos aceitos pelo /grafico
+RANGES = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "1a": timedelta(days=365)
+}
+DEFAULT_RANGE = "24h"
+
+# Quantidade aproximada de pontos por gráfico
+MAX_POINTS = 300
+
+def render_chart(pair, currency, bars, alerts, range_name):
+    """Desenha o gráfico de preços de um par e retorna o PNG em bytes.
+
+    ``bars`` são barras OHLC ``(início_ns, abertura, máxima, mínima, fechamento,
+    amostras)`` e ``alerts`` pares ``(timestamp ISO, preço, variação)``. Roda
+    em um processo separado, por isso o matplotlib é importado aqui.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    times = [datetime.fromtimestamp(bar[0] / 1e9) for bar in bars]
+    closes = [bar[4] for bar in bars]
+
+    fig, ax = plt.subplots(figsize=(8, 4), dpi=100)
+    try:
+        ax.fill_between(times, [bar[3] for bar in bars], [bar[2] for bar in bars], color="tab:blue", alpha=0.15, linewidth=0)
+        ax.plot(times, closes, color="tab:blue", linewidth=1.5)
+
+        # Marca os alertas disparados no período
+        for timestamp, price, variation in alerts:
+            moment = datetime.fromisoformat(timestamp)
+            marker, color = ("^", "tab:green") if variation > 0 else ("v", "tab:red")
+            ax.scatter([moment], [price], marker=marker, color=color, s=60, zorder=3)
+            ax.annotate(f"{variation:+.1f}%", (moment, price), textcoords="offset points", xytext=(0, 8),
+                        ha="center", fontsize=8, color=color)
+
+        ax.set_title(f"{pair} - {range_name}")
+        ax.yaxis.set_major_formatter(lambda value, _: f"{currency}{value:,.2f}")
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m %H:%M"))
+        ax.grid(True, alpha=0.3)
+        fig.autofmt_xdate()
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+class ChartRenderer:
+    """Gera gráficos em um pool de processos e guarda o ``file_id`` dos já enviados.
+
+    A chave do cache é ``(par, período, resolução, última barra)``: enquanto
+    não surgir uma barra nova, pedidos repetidos reaproveitam a imagem já
+    enviada ao Telegram. Pedidos simultâneos de um gráfico ainda não gerado
+    compartilham a mesma renderização.
+    """
+
+    def __init__(self, monitor, alerts, max_workers=2, max_entries=128):
+        self.monitor = monitor
+        self.alerts = alerts
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.file_ids = OrderedDict()
+        self.rendering = {}
+        self.render_count = 0
+        self._executor = None
+
+    @property
+    def executor(self):
+        """Pool de processos de renderização (criado sob demanda)."""
+        if self._executor is None:
+            # Workers iniciados sem fork: o processo do bot tem threads e um
+            # event loop que não devem ser copiados para os filhos
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return self._executor
+
+    async def get(self, pair, range_name):
+        """Retorna ``(chave, file_id, png)`` do gráfico de um par no período.
+
+        Se o gráfico já foi enviado desde a última barra, ``file_id`` vem do
+        cache e ``png`` é None; senão, o PNG é gerado no pool de processos.
+        ``(chave, None, None)`` indica que não há histórico no período.
+        """
+        since = datetime.now() - RANGES[range_name]
+        resolution, bars = await asyncio.to_thread(self.monitor.get_ohlc, pair, since, None, None, MAX_POINTS)
+        key = (pair, range_name, resolution, bars[-1][0] if bars else None)
+        if not bars:
+            return key, None, None
+        file_id = self.file_ids.get(key)
+        if file_id is not None:
+            self.file_ids.move_to_end(key)
+            return key, file_id, None
+
+        # Pedidos simultâneos do mesmo gráfico compartilham a renderização
+        future = self.rendering.get(key)
+        if future is None:
+            future = self.rendering[key] = asyncio.ensure_future(self._render(pair, range_name, since, bars))
+            future.add_done_callback(lambda _: self.rendering.pop(key, None))
+        return key, None, await asyncio.shield(future)
+
+    async def _render(self, pair, range_name, since, bars):
+        alerts = await asyncio.to_thread(self.alerts.query, pair=pair, since=since)
+        config = self.monitor.registry.get(pair)
+        self.render_count += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, render_chart, pair, config.currency, bars,
+            [(alert["timestamp"], alert["price"], alert["variation"]) for alert in alerts], range_name
+        )
+
+    def forget(self, key):
+        """Descarta um ``file_id`` que o Telegram não aceitou mais."""
+        self.file_ids.pop(key, None)
+
+    def remember(self, key, file_id):
+        """Guarda o ``file_id`` do Telegram de um gráfico enviado (LRU)."""
+        self.file_ids[key] = file_id
+        self.file_ids.move_to_end(key)
+        while len(self.file_ids) > self.max_entries:
+            self.file_ids.popitem(last=False)
+
+    def close(self):
+        """Encerra o pool de processos."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
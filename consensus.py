@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import logging
+from statistics import median
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Configuração padrão (variáveis de ambiente opcionais): fontes que precisam
+# concordar, multiplicador do MAD para descartar outliers, divergência mínima
+# tolerada (%) e meia-vida (s) do peso de uma fonte cujo preço não muda
+CONSENSUS_QUORUM = int(os.environ.get("CONSENSUS_QUORUM", "2"))
+CONSENSUS_MAD = float(os.environ.get("CONSENSUS_MAD", "3.0"))
+CONSENSUS_TOLERANCE = float(os.environ.get("CONSENSUS_TOLERANCE", "0.5"))
+CONSENSUS_HALF_LIFE = float(os.environ.get("CONSENSUS_HALF_LIFE", "300"))
+
+MIN_WEIGHT = 0.05  # Peso mínimo de uma fonte, por mais antigo que seja seu preço
+
+def weighted_median(values, weights):
+    """Mediana ponderada: o menor valor em que o peso acumulado chega à metade do total."""
+    pairs = sorted(zip(values, weights))
+    half = sum(weights) / 2
+    accumulated = 0.0
+    for value, weight in pairs:
+        accumulated += weight
+        if accumulated >= half:
+            return value
+    return pairs[-1][0]
+
+def robust_consensus(observations, mad_multiplier=CONSENSUS_MAD, tolerance=CONSENSUS_TOLERANCE):
+    """Consenso de ``[(fonte, preço, peso)]``: mediana ponderada sem os outliers.
+
+    Um preço é outlier quando se afasta da mediana mais que ``mad_multiplier``
+    vezes o MAD normalizado (com três ou mais fontes) ou mais que
+    ``tolerance`` por cento da mediana, o que for maior. Com duas fontes, o
+    MAD não separa quem está errado: ou as duas concordam dentro da
+    tolerância, ou as duas são descartadas.
+
+    Retorna ``(preço, fontes aceitas, fontes descartadas)``; o preço é None
+    se nenhuma fonte sobrar.
+    """
+    if not observations:
+        return None, [], []
+    prices = [price for _, price, _ in observations]
+    center = median(prices)
+    scale = 1.4826 * median(abs(price - center) for price in prices) if len(prices) >= 3 else 0.0
+    limit = max(mad_multiplier * scale, abs(center) * tolerance / 100)
+
+    kept = [item for item in observations if abs(item[1] - center) <= limit]
+    rejected = [item for item in observations if abs(item[1] - center) > limit]
+    if not kept:
+        return None, [], [source for source, _, _ in rejected]
+    price = weighted_median([price for _, price, _ in kept], [weight for _, _, weight in kept])
+    return price, [source for source, _, _ in kept], [source for source, _, _ in rejected]
+
+def _supports(source, symbol):
+    supports = getattr(source, "supports", None)
+    return supports(symbol) if supports else True
+
+def _available(source):
+    available = getattr(source, "available", None)
+    return available() if available else True
+
+class ConsensusProvider:
+    """QuoteProvider que consulta várias fontes concorrentemente e devolve o preço de consenso.
+
+    Cada fonte (em geral, uma ProviderChain) recebe os símbolos que suporta.
+    A cada resposta, o consenso de cada símbolo é recalculado com
+    ``robust_consensus``; o símbolo fica decidido quando ``quorum`` fontes
+    aceitas concordam (o quórum cai para o número de fontes disponíveis que
+    suportam o símbolo). Quando todos os símbolos estão decididos, a busca
+    termina e as fontes mais lentas são canceladas (menos as que testam um
+    provedor em cooldown, que terminam em segundo plano), então as fontes
+    extras não acrescentam latência.
+
+    O peso de cada fonte no consenso cai pela metade a cada ``half_life``
+    segundos em que o preço dela não muda, para que uma fonte congelada
+    perca influência. Símbolos sem quórum ficam de fora do resultado e o
+    monitor serve o último preço registrado, marcado como desatualizado.
+    """
+
+    name = "consensus"
+
+    def __init__(self, sources, quorum=CONSENSUS_QUORUM, mad_multiplier=CONSENSUS_MAD, tolerance=CONSENSUS_TOLERANCE,
+                 half_life=CONSENSUS_HALF_LIFE, clock=time.monotonic):
+        self.sources = list(sources)
+        self.quorum = quorum
+        self.mad_multiplier = mad_multiplier
+        self.tolerance = tolerance
+        self.half_life = half_life
+        self.clock = clock
+        self.changes = {}
+        self.results = {}
+        self.rejections = 0
+        self._background = set()
+
+    def _name(self, index):
+        return getattr(self.sources[index], "name", f"fonte {index}")
+
+    def supports(self, symbol):
+        return any(_supports(source, symbol) for source in self.sources)
+
+    def quorum_for(self, symbol):
+        """Quórum de um símbolo: ``quorum`` limitado às fontes disponíveis que o suportam (mínimo 1)."""
+        available = sum(1 for source in self.sources if _supports(source, symbol) and _available(source))
+        return max(1, min(self.quorum, available))
+
+    def _weight(self, index, symbol, price, now):
+        """Peso da fonte pela idade do seu preço (tempo desde a última mudança)."""
+        key = (index, symbol)
+        last = self.changes.get(key)
+        if last is None or last[0] != price:
+            self.changes[key] = (price, now)
+            return 1.0
+        return max(MIN_WEIGHT, 0.5 ** ((now - last[1]) / self.half_life))
+
+    def _consensus(self, observations):
+        return robust_consensus(observations, self.mad_multiplier, self.tolerance)
+
+    async def fetch_quotes(self, symbols):
+        symbols = list(dict.fromkeys(symbols))
+        quorums = {symbol: self.quorum_for(symbol) for symbol in symbols}
+        observations = {symbol: [] for symbol in symbols}
+        tasks = {}
+        for index, source in enumerate(self.sources):
+            supported = [symbol for symbol in symbols if _supports(source, symbol)]
+            if supported:
+                tasks[asyncio.ensure_future(source.fetch_quotes(supported))] = index
+
+        decided = {}
+        pending = set(tasks)
+        try:
+            while pending and len(decided) < len(symbols):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                now = self.clock()
+                for task in done:
+                    index = tasks[task]
+                    try:
+                        quotes = task.result()
+                    except Exception as e:
+                        logger.warning(f"Fonte {self._name(index)} falhou: {e!r}")
+                        continue
+                    for symbol, price in quotes.items():
+                        if symbol in observations:
+                            observations[symbol].append((index, price, self._weight(index, symbol, price, now)))
+                for symbol in symbols:
+                    if symbol not in decided and observations[symbol]:
+                        price, kept, _ = self._consensus(observations[symbol])
+                        if price is not None and len(kept) >= quorums[symbol]:
+                            decided[symbol] = price
+        finally:
+            # As fontes que ainda não responderam não atrasam o resultado; as que estão
+            # testando um provedor em cooldown terminam em segundo plano, para fechar o circuito
+            for task in pending:
+                if getattr(self.sources[tasks[task]], "probing", lambda: False)():
+                    self._background.add(task)
+                    task.add_done_callback(self._background.discard)
+                else:
+                    task.cancel()
+
+        quotes = {}
+        for symbol in symbols:
+            price, kept, rejected = self._consensus(observations[symbol])
+            # Fontes cujo circuito abriu nesta busca deixam de contar para o quórum
+            quorum = min(quorums[symbol], self.quorum_for(symbol))
+            if rejected:
+                self.rejections += len(rejected)
+                logger.warning(
+                    f"Cotação de {symbol} descartada (outlier): "
+                    f"{', '.join(f'{self._name(i)}={p:g}' for i, p, _ in observations[symbol] if i in rejected)}"
+                )
+            if price is None or len(kept) < quorum:
+                if observations[symbol]:
+                    logger.error(f"Sem consenso para {symbol}: {len(kept)} de {quorum} fonte(s) necessárias concordam")
+                continue
+            quotes[symbol] = price
+            self.results[symbol] = {
+                "price": price,
+                "sources": [self._name(index) for index in kept],
+                "rejected": [self._name(index) for index in rejected],
+                "quorum": quorum
+            }
+        return quotes
+
+    def stats(self):
+        """Saúde dos provedores de todas as fontes (as que expõem ``stats``)."""
+        return [provider for source in self.sources if hasattr(source, "stats") for provider in source.stats()]
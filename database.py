@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Banco de dados SQLite compartilhado pelos armazenamentos do bot
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+DB_FILE = os.path.join(DATA_DIR, "radar.db")
+
+def connect(db_file=DB_FILE):
+    """Abre uma conexão SQLite em modo WAL, utilizável a partir de várias threads.
+
+    As conexões usam autocommit; escritas que precisem ser atômicas devem usar
+    ``SqliteStore.transaction``. O acesso concorrente deve ser serializado
+    pelo chamador (ver ``SqliteStore``).
+    """
+    conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+class SqliteStore:
+    """Base dos armazenamentos em SQLite: uma conexão protegida por um lock."""
+
+    SCHEMA = ""
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self.conn = connect(db_file)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Executa o bloco em uma transação, com o lock da conexão adquirido."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        """Fecha a conexão com o banco."""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import struct
+import logging
+from datetime import datetime
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Diretório para armazenar dados históricos
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+os.makedirs(HISTORY_DIR, exist_ok=True)
+
+# Registro binário de tamanho fixo: timestamp (epoch em ns, int64) + preço (float64)
+RECORD = struct.Struct("<qd")
+RECORD_SIZE = RECORD.size
+SEGMENT_SUFFIX = ".seg"
+
+def to_epoch_ns(timestamp):
+    """Converte um timestamp ISO (ou datetime) para epoch em nanossegundos."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        return int(round(timestamp.timestamp() * 1_000_000)) * 1000
+    return int(timestamp)
+
+def from_epoch_ns(timestamp_ns):
+    """Converte epoch em nanossegundos para um timestamp ISO local."""
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+class HistoryBackend:
+    """Interface dos backends de histórico de preços."""
+
+    def append(self, timestamp, price):
+        """Acrescenta uma amostra (timestamp ISO ou epoch ns, preço) ao histórico."""
+        raise NotImplementedError
+
+    def tail(self, n):
+        """Retorna as últimas n amostras como tuplas (epoch_ns, preço)."""
+        raise NotImplementedError
+
+    def read_range(self, start_ns=None, end_ns=None):
+        """Retorna as amostras com start_ns <= timestamp < end_ns."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Libera recursos abertos pelo backend."""
+        pass
+
+class JsonHistoryBackend(HistoryBackend):
+    """Backend legado: lista JSON reescrita por inteiro a cada gravação."""
+
+    def __init__(self, file_path, max_records=1000):
+        self.file_path = file_path
+        self.max_records = max_records
+        try:
+            with open(file_path, 'r') as f:
+                entries = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            entries = []
+        self.records = [(to_epoch_ns(e["timestamp"]), float(e["price"])) for e in entries]
+
+    def append(self, timestamp, price):
+        self.records.append((to_epoch_ns(timestamp), float(price)))
+        if len(self.records) > self.max_records:
+            del self.records[:-self.max_records]
+        with open(self.file_path, 'w') as f:
+            json.dump(
+                [{"timestamp": from_epoch_ns(ts), "price": p} for ts, p in self.records],
+                f,
+                indent=2
+            )
+
+    def tail(self, n):
+        return list(self.records[-n:]) if n > 0 else []
+
+    def read_range(self, start_ns=None, end_ns=None):
+        return [
+            (ts, p) for ts, p in self.records
+            if (start_ns is None or ts >= start_ns) and (end_ns is None or ts < end_ns)
+        ]
+
+    def __len__(self):
+        return len(self.records)
+
+class SegmentHistoryStore(HistoryBackend):
+    """Log append-only em segmentos binários rotativos de registros de 16 bytes.
+
+    Cada segmento guarda até ``segment_records`` registros; ao encher, um novo
+    segmento é aberto. A compactação descarta segmentos inteiros mais antigos
+    quando o total passa de ``max_records``. Na abertura, um registro parcial no
+    fim do último segmento (gravação interrompida) é truncado.
+    """
+
+    def __init__(self, directory, segment_records=4096, max_records=100_000, fsync=False):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.max_records = max_records
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        # Lista de [caminho, quantidade de registros] em ordem cronológica
+        self.segments = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(SEGMENT_SUFFIX):
+                path = os.path.join(directory, name)
+                self.segments.append([path, os.path.getsize(path) // RECORD_SIZE])
+
+        self._recover()
+        self._count = sum(count for _, count in self.segments)
+        self._active = None
+
+    def _recover(self):
+        """Remove bytes de um registro incompleto no último segmento."""
+        if not self.segments:
+            return
+        path = self.segments[-1][0]
+        size = os.path.getsize(path)
+        if size % RECORD_SIZE:
+            logger.warning(f"Registro incompleto em {path}. Truncando {size % RECORD_SIZE} bytes.")
+            with open(path, 'r+b') as f:
+                f.truncate(size - size % RECORD_SIZE)
+        if self.segments[-1][1] == 0 and len(self.segments) > 1:
+            os.remove(path)
+            self.segments.pop()
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:08d}{SEGMENT_SUFFIX}")
+
+    def _roll(self):
+        """Fecha o segmento ativo e abre o próximo."""
+        if self._active:
+            self._active.close()
+        if self.segments:
+            last = os.path.basename(self.segments[-1][0])
+            number = int(last[:-len(SEGMENT_SUFFIX)]) + 1
+        else:
+            number = 0
+        path = self._segment_path(number)
+        self.segments.append([path, 0])
+        self._active = open(path, 'ab', buffering=0)
+        self.compact()
+
+    def append(self, timestamp, price):
+        if not self.segments or self.segments[-1][1] >= self.segment_records:
+            self._roll()
+        elif self._active is None:
+            self._active = open(self.segments[-1][0], 'ab', buffering=0)
+
+        self._active.write(RECORD.pack(to_epoch_ns(timestamp), float(price)))
+        if self.fsync:
+            os.fsync(self._active.fileno())
+        self.segments[-1][1] += 1
+        self._count += 1
+
+    def compact(self):
+        """Descarta segmentos antigos inteiros mantendo ao menos max_records registros."""
+        if not self.max_records:
+            return
+        while len(self.segments) > 1 and self._count - self.segments[0][1] >= self.max_records:
+            path, count = self.segments.pop(0)
+            os.remove(path)
+            self._count -= count
+
+    def _read_segment(self, path, start=0, count=None):
+        """Lê registros [start, start + count) de um segmento."""
+        with open(path, 'rb') as f:
+            f.seek(start * RECORD_SIZE)
+            data = f.read(-1 if count is None else count * RECORD_SIZE)
+        return list(RECORD.iter_unpack(data[:len(data) - len(data) % RECORD_SIZE]))
+
+    def _bisect_segment(self, f, count, timestamp_ns):
+        """Primeira posição do segmento com timestamp >= timestamp_ns."""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid * RECORD_SIZE)
+            ts, _ = RECORD.unpack(f.read(RECORD_SIZE))
+            if ts < timestamp_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def tail(self, n):
+        if n <= 0:
+            return []
+        chunks = []
+        remaining = n
+        for path, count in reversed(self.segments):
+            if remaining <= 0:
+                break
+            take = min(remaining, count)
+            chunks.append(self._read_segment(path, count - take, take))
+            remaining -= take
+        records = []
+        for chunk in reversed(chunks):
+            records.extend(chunk)
+        return records
+
+    def read_range(self, start_ns=None, end_ns=None):
+        records = []
+        for path, count in self.segments:
+            if count == 0:
+                continue
+            with open(path, 'rb') as f:
+                first = 0 if start_ns is None else self._bisect_segment(f, count, start_ns)
+                last = count if end_ns is None else self._bisect_segment(f, count, end_ns)
+                if first >= last:
+                    continue
+                f.seek(first * RECORD_SIZE)
+                records.extend(RECORD.iter_unpack(f.read((last - first) * RECORD_SIZE)))
+        return records
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        if self._active:
+            self._active.close()
+            self._active = None
+
+def import_json_history(json_file, store):
+    """Importa (uma única vez) um histórico JSON legado para um backend.
+
+    Após a importação o arquivo é renomeado para ``*.imported``, de modo que
+    não volte a ser importado. Retorna a quantidade de amostras importadas.
+    """
+    if not os.path.exists(json_file):
+        return 0
+    try:
+        with open(json_file, 'r') as f:
+            entries = json.load(f)
+    except json.JSONDecodeError:
+        logger.warning(f"Histórico legado inválido em {json_file}. Ignorando importação.")
+        entries = []
+
+    imported = 0
+    if len(store) == 0:
+        for entry in entries:
+            try:
+                store.append(entry["timestamp"], entry["price"])
+                imported += 1
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Entrada inválida ignorada em {json_file}: {entry}")
+
+    os.replace(json_file, json_file + ".imported")
+    logger.info(f"{imported} amostras importadas de {json_file}.")
+    return imported
+
+# Função para teste
+if __name__ == "__main__":
+    for name in ["btc_usd", "usd_brl"]:
+        store = SegmentHistoryStore(os.path.join(HISTORY_DIR, name))
+        count = import_json_history(os.path.join(DATA_DIR, f"{name}_history.json"), store)
+        print(f"{name}: {count} amostras importadas, {len(store)} no total")
+        store.close()
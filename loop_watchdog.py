@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+import logging
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Limiar de travamento do event loop em segundos (variável de ambiente opcional)
+DEFAULT_STALL_THRESHOLD = float(os.environ.get("LOOP_STALL_THRESHOLD", "0.25"))
+
+class LoopWatchdog:
+    """Detecta travamentos do event loop medindo o atraso de um heartbeat.
+
+    A cada ``interval`` segundos o watchdog agenda um despertar; se ele acordar
+    mais de ``threshold`` segundos depois do previsto, algum código bloqueou o
+    loop e um aviso é registrado no log.
+    """
+
+    def __init__(self, threshold=DEFAULT_STALL_THRESHOLD, interval=0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self._task = None
+
+    async def run(self):
+        """Executa o heartbeat até ser cancelado."""
+        loop = asyncio.get_running_loop()
+        logger.info(f"Watchdog do event loop ativo (limiar de {self.threshold * 1000:.0f} ms).")
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - expected
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stall_count += 1
+                logger.warning(f"Event loop travado por {lag * 1000:.0f} ms (limiar de {self.threshold * 1000:.0f} ms).")
+
+    def start(self):
+        """Inicia o watchdog como uma task no loop atual."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        """Cancela a task do watchdog."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
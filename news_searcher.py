@@ -4,9 +4,15 @@
 import sys
 import os
 import json
+import time
+import asyncio
 import logging
-import requests
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+from pairs import load_registry
+from article_store import ArticleStore
 
 # Configuração de logging
 logging.basicConfig(
@@ -19,31 +25,219 @@ logger = logging.getLogger(__name__)
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 NEWS_FILE = os.path.join(DATA_DIR, "news.json")
+NEWS_CACHE_FILE = os.path.join(DATA_DIR, "news_cache.json")
 
-# Inicializa o arquivo de notícias se não existir
-if not os.path.exists(NEWS_FILE):
-    with open(NEWS_FILE, 'w') as f:
-        json.dump([], f)
+# Prazo total em segundos para a busca de notícias de um alerta (variável de ambiente opcional)
+NEWS_DEADLINE = float(os.environ.get("NEWS_DEADLINE", "3"))
 
-class NewsSearcher:
-    def __init__(self):
-        """Inicializa o buscador de notícias."""
-        self.news_cache = {}
-        self.cache_duration = timedelta(hours=1)  # Cache válido por 1 hora
+class NewsCache:
+    """Cache de resultados de busca com TTL, limite LRU e deduplicação de buscas simultâneas.
+    
+    As chaves combinam a consulta normalizada, o idioma e a fonte. Enquanto
+    uma busca está em andamento, chamadas idênticas de outras threads aguardam
+    o mesmo resultado em vez de repetir a busca. Com ``cache_file``, as
+    entradas válidas são gravadas em disco e recarregadas na inicialização.
+    """
+    
+    def __init__(self, ttl=timedelta(hours=1), max_entries=256, cache_file=None):
+        self.ttl = ttl.total_seconds() if isinstance(ttl, timedelta) else ttl
+        self.max_entries = max_entries
+        self.cache_file = cache_file
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        if cache_file:
+            self._load()
+    
+    @staticmethod
+    def make_key(query, language, source):
+        """Chave normalizada: termos em minúsculas, sem repetição e em ordem."""
+        terms = " ".join(sorted(set(query.lower().split())))
+        return f"{source}|{language}|{terms}"
+    
+    def get_or_load(self, key, loader):
+        """Retorna o valor em cache ou executa ``loader()`` uma única vez por chave."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self.inflight[key] = Future()
+            else:
+                self.shared += 1
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            # Resultados vazios (ex.: fonte indisponível) não são guardados
+            if value:
+                self._store(key, value)
+            return value
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+    
+    def _store(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        if self.cache_file:
+            self._save()
+    
+    def _save(self):
+        """Grava as entradas em disco (escrita atômica via arquivo temporário)."""
+        try:
+            tmp_file = self.cache_file + ".tmp"
+            with self.save_lock:
+                with self.lock:
+                    snapshot = list(self.entries.items())
+                with open(tmp_file, 'w') as f:
+                    json.dump([[key, expires, value] for key, (expires, value) in snapshot], f)
+                os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Erro ao salvar cache de notícias: {e}")
     
-    def _load_news(self):
-        """Carrega o histórico de notícias."""
+    def _load(self):
+        """Recarrega do disco as entradas ainda válidas."""
         try:
-            with open(NEWS_FILE, 'r') as f:
-                return json.load(f)
+            with open(self.cache_file, 'r') as f:
+                items = json.load(f)
         except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning("Erro ao carregar histórico de notícias. Criando novo histórico.")
-            return []
+            return
+        now = time.time()
+        for key, expires, value in items[-self.max_entries:]:
+            if expires > now:
+                self.entries[key] = (expires, value)
+    
+    def stats(self):
+        """Contadores de acertos, falhas e buscas compartilhadas."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "entries": len(self.entries)
+        }
+
+class NewsResults(list):
+    """Lista de notícias que indica as fontes que não responderam dentro do prazo."""
+    
+    def __init__(self, items=(), missing=(), pending=0):
+        super().__init__(items)
+        self.missing = list(missing)
+        self.pending = pending
+    
+    @property
+    def partial(self):
+        """Indica se alguma fonte ficou de fora do resultado."""
+        return bool(self.missing)
+
+class NewsSource:
+    """Fonte de notícias plugável.
+    
+    Subclasses definem ``name`` e implementam ``search``, uma corrotina que
+    recebe a consulta e o idioma e retorna itens já normalizados (dicionários
+    com ``type``, ``language``, ``content``, ``source``, ``url`` e ``timestamp``).
+    """
+    
+    name = "source"
+    
+    async def search(self, query, language):
+        raise NotImplementedError
+
+class TwitterSource(NewsSource):
+    """Tweets recentes, obtidos pelo buscador (com cache) em uma thread."""
+    
+    name = "twitter"
+    
+    def __init__(self, searcher, count=5):
+        self.searcher = searcher
+        self.count = count
+    
+    async def search(self, query, language):
+        tweets = await asyncio.to_thread(
+            self.searcher._cached_search, self.name, query, language,
+            lambda: self.searcher._search_twitter(query, count=self.count, lang=language)
+        )
+        return [
+            {
+                "type": "tweet",
+                "language": language,
+                "content": tweet["text"],
+                "source": f"@{tweet['user']['screen_name']}",
+                "url": f"https://twitter.com/{tweet['user']['screen_name']}/status/{tweet['id']}",
+                "timestamp": tweet["created_at"]
+            }
+            for tweet in tweets
+        ]
+
+class NewsApiSource(NewsSource):
+    """Artigos de uma API de notícias, obtidos pelo buscador (com cache) em uma thread."""
+    
+    name = "news_api"
+    
+    def __init__(self, searcher):
+        self.searcher = searcher
+    
+    async def search(self, query, language):
+        articles = await asyncio.to_thread(
+            self.searcher._cached_search, self.name, query, language,
+            lambda: self.searcher._search_news_api(query, language=language)
+        )
+        return [
+            {
+                "type": "news",
+                "language": language,
+                "title": news["title"],
+                "content": news["description"],
+                "source": news["source"]["name"],
+                "url": news["url"],
+                "timestamp": news["publishedAt"]
+            }
+            for news in articles
+        ]
+
+class NewsSearcher:
+    def __init__(self, registry=None, cache_file=None, sources=None, deadline=NEWS_DEADLINE, articles=None):
+        """Inicializa o buscador de notícias com os termos de busca do registro de pares.
+        
+        ``cache_file`` ativa a persistência do cache de buscas (ex.: NEWS_CACHE_FILE).
+        ``sources`` substitui as fontes padrão (Twitter e API de notícias) e
+        ``deadline`` é o prazo total, em segundos, de cada busca. As buscas são
+        registradas em ``articles`` (por padrão o ArticleStore do banco do bot,
+        que importa o news.json legado).
+        """
+        self.registry = registry or load_registry()
+        if articles is None:
+            articles = ArticleStore()
+            articles.import_json(NEWS_FILE)
+        self.articles = articles
+        self.sources = sources if sources is not None else [TwitterSource(self), NewsApiSource(self)]
+        self.deadline = deadline
+        self.cache_duration = timedelta(hours=1)  # Cache válido por 1 hora
+        self.news_cache = NewsCache(ttl=self.cache_duration, cache_file=cache_file)
     
-    def _save_news(self, news_list):
-        """Salva o histórico de notícias."""
-        with open(NEWS_FILE, 'w') as f:
-            json.dump(news_list, f, indent=2)
+    def _cached_search(self, source, query, language, search):
+        """Executa ``search()`` através do cache de notícias."""
+        key = NewsCache.make_key(query, language, source)
+        return self.news_cache.get_or_load(key, search)
     
     def _search_twitter(self, query, count=10, lang=None):
         """Busca tweets relacionados ao query."""
@@ -262,20 +456,14 @@ class NewsSearcher:
             logger.error(f"Erro ao buscar notícias: {e}")
             return []
     
-    def search_news_for_pair(self, pair, variation_pct):
-        """Busca notícias relacionadas a um par específico e sua variação."""
-        logger.info(f"Buscando notícias para {pair} com variação de {variation_pct:.2f}%")
-        
-        # Define os termos de busca com base no par
-        if pair == "BTC/USD":
-            query_pt = "Bitcoin BTC criptomoeda preço variação"
-            query_en = "Bitcoin BTC cryptocurrency price movement"
-        elif pair == "USD/BRL":
-            query_pt = "Dólar real câmbio variação economia"
-            query_en = "USD BRL exchange rate forex Brazil"
-        else:
+    def _build_queries(self, pair, variation_pct):
+        """Monta as consultas por idioma para um par e a direção da variação."""
+        config = self.registry.get(pair)
+        if config is None or not config.news_queries:
             logger.error(f"Par não suportado: {pair}")
-            return []
+            return None
+        query_pt = config.news_queries.get("pt", pair)
+        query_en = config.news_queries.get("en", pair)
         
         # Adiciona termos relacionados à direção da variação
         if variation_pct > 0:
@@ -285,95 +473,101 @@ class NewsSearcher:
             query_pt += " queda baixa redução"
             query_en += " fall decrease drop"
         
-        # Busca tweets em português e inglês
-        tweets_pt = self._search_twitter(query_pt, count=5, lang="pt")
-        tweets_en = self._search_twitter(query_en, count=5, lang="en")
-        
-        # Busca notícias em português e inglês
-        news_pt = self._search_news_api(query_pt, language="pt")
-        news_en = self._search_news_api(query_en, language="en")
-        
-        # Combina os resultados
+        return {"pt": query_pt, "en": query_en}
+    
+    def _record_news(self, pair, variation_pct, results, alert_id=None):
+        """Salva os resultados de uma busca no histórico (só as notícias novas são gravadas)."""
+        try:
+            self.articles.record_search(pair, variation_pct, results, alert_id=alert_id)
+        except Exception as e:
+            logger.error(f"Erro ao salvar notícias de {pair}: {e}")
+    
+    def _collect(self, jobs, tasks, final):
+        """Combina, na ordem das fontes, os resultados das consultas já concluídas."""
         results = []
+        missing = []
+        pending = 0
+        for (source, language, _), task in zip(jobs, tasks):
+            if not task.done():
+                if final:
+                    missing.append(f"{source.name}/{language}")
+                else:
+                    pending += 1
+            elif task.cancelled() or task.exception() is not None:
+                missing.append(f"{source.name}/{language}")
+            else:
+                results.extend(task.result())
+        return NewsResults(results, missing, pending)
+    
+    async def stream_news(self, pair, variation_pct, deadline=None, alert_id=None):
+        """Busca notícias de um par em todas as fontes, entregando-as à medida que chegam.
         
-        # Adiciona tweets em português
-        for tweet in tweets_pt:
-            results.append({
-                "type": "tweet",
-                "language": "pt",
-                "content": tweet["text"],
-                "source": f"@{tweet['user']['screen_name']}",
-                "url": f"https://twitter.com/{tweet['user']['screen_name']}/status/{tweet['id']}",
-                "timestamp": tweet["created_at"]
-            })
+        As consultas (fonte × idioma) correm em paralelo sob um prazo total. A
+        cada fonte que responde é produzido um NewsResults parcial (com
+        ``pending`` > 0); o último, com ``pending`` igual a zero, traz em
+        ``missing`` as fontes que falharam ou não responderam dentro do prazo
+        e é salvo no histórico, ligado a ``alert_id`` quando informado.
+        """
+        logger.info(f"Buscando notícias para {pair} com variação de {variation_pct:.2f}%")
         
-        # Adiciona tweets em inglês
-        for tweet in tweets_en:
-            results.append({
-                "type": "tweet",
-                "language": "en",
-                "content": tweet["text"],
-                "source": f"@{tweet['user']['screen_name']}",
-                "url": f"https://twitter.com/{tweet['user']['screen_name']}/status/{tweet['id']}",
-                "timestamp": tweet["created_at"]
-            })
+        queries = self._build_queries(pair, variation_pct)
+        if queries is None:
+            yield NewsResults()
+            return
         
-        # Adiciona notícias em português
-        for news in news_pt:
-            results.append({
-                "type": "news",
-                "language": "pt",
-                "title": news["title"],
-                "content": news["description"],
-                "source": news["source"]["name"],
-                "url": news["url"],
-                "timestamp": news["publishedAt"]
-            })
+        jobs = [(source, language, query) for source in self.sources for language, query in queries.items()]
+        tasks = [asyncio.ensure_future(source.search(query, language)) for source, language, query in jobs]
+        start = time.monotonic()
+        deadline_at = start + (self.deadline if deadline is None else deadline)
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        logger.error(f"Erro em uma fonte de notícias: {task.exception()}")
+                if pending:
+                    yield self._collect(jobs, tasks, final=False)
+        finally:
+            for task in pending:
+                task.cancel()
         
-        # Adiciona notícias em inglês
-        for news in news_en:
-            results.append({
-                "type": "news",
-                "language": "en",
-                "title": news["title"],
-                "content": news["description"],
-                "source": news["source"]["name"],
-                "url": news["url"],
-                "timestamp": news["publishedAt"]
-            })
+        news = self._collect(jobs, tasks, final=True)
+        logger.info(f"{len(news)} notícias para {pair} em {time.monotonic() - start:.2f}s"
+                    + (f" (parcial, sem {', '.join(news.missing)})" if news.missing else ""))
         
         # Salva os resultados no histórico
-        all_news = self._load_news()
-        all_news.append({
-            "pair": pair,
-            "variation": variation_pct,
-            "timestamp": datetime.now().isoformat(),
-            "results": results
-        })
-        
-        # Limita o histórico a 1000 entradas
-        if len(all_news) > 1000:
-            all_news = all_news[-1000:]
+        await asyncio.to_thread(self._record_news, pair, variation_pct, news, alert_id)
         
-        self._save_news(all_news)
-        
-        return results
+        yield news
     
-    def format_news_message(self, pair, variation_pct, news_list, max_items=5):
-        """Formata uma mensagem com as notícias encontradas."""
-        if not news_list:
-            return f"Não foram encontradas notícias relacionadas à variação de {variation_pct:.2f}% em {pair}."
-        
-        direction = "alta" if variation_pct > 0 else "queda"
-        emoji = "📈" if variation_pct > 0 else "📉"
-        
-        message = f"{emoji} NOTÍCIAS RELACIONADAS À {direction.upper()} DE {pair} ({variation_pct:.2f}%) {emoji}\n\n"
+    async def search_news_async(self, pair, variation_pct, deadline=None, alert_id=None):
+        """Busca notícias de um par e retorna só o resultado final de ``stream_news``."""
+        news = NewsResults()
+        async for news in self.stream_news(pair, variation_pct, deadline, alert_id):
+            pass
+        return news
+    
+    def search_news_for_pair(self, pair, variation_pct):
+        """Busca notícias relacionadas a um par específico e sua variação.
         
-        # Limita o número de itens
-        news_list = news_list[:max_items]
+        Versão síncrona de ``search_news_async``; dentro do event loop use a assíncrona.
+        """
+        return asyncio.run(self.search_news_async(pair, variation_pct))
+    
+    def format_news_items(self, news_list, max_items=5):
+        """Formata a lista de notícias (sem cabeçalho), com os avisos de busca parcial."""
+        missing = getattr(news_list, "missing", [])
+        pending = getattr(news_list, "pending", 0)
+        message = ""
         
-        # Adiciona as notícias à mensagem
-        for i, news in enumerate(news_list, 1):
+        # Adiciona as notícias à mensagem, limitando o número de itens
+        for i, news in enumerate(news_list[:max_items], 1):
             lang_emoji = "🇧🇷" if news["language"] == "pt" else "🇺🇸"
             
             if news["type"] == "news":
@@ -385,6 +579,23 @@ class NewsSearcher:
                 message += f"   {news['content']}\n"
                 message += f"   {news['url']}\n\n"
         
+        if pending:
+            message += "⏳ Buscando mais notícias...\n"
+        elif missing:
+            message += f"⚠️ Resultados parciais: {', '.join(missing)} não responderam a tempo.\n"
+        
+        return message
+    
+    def format_news_message(self, pair, variation_pct, news_list, max_items=5):
+        """Formata uma mensagem com as notícias encontradas."""
+        if not news_list:
+            return f"Não foram encontradas notícias relacionadas à variação de {variation_pct:.2f}% em {pair}."
+        
+        direction = "alta" if variation_pct > 0 else "queda"
+        emoji = "📈" if variation_pct > 0 else "📉"
+        
+        message = f"{emoji} NOTÍCIAS RELACIONADAS À {direction.upper()} DE {pair} ({variation_pct:.2f}%) {emoji}\n\n"
+        message += self.format_news_items(news_list, max_items)
         message += f"Atualizado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
         
         return message
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+import logging
+import threading
+from database import DB_FILE, SqliteStore
+from history_store import to_epoch_ns
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+DAY = 86400
+
+# Níveis de agregação: (nome, resolução em segundos, retenção em segundos; None = sem limite)
+TIERS = (
+    ("1m", 60, 7 * DAY),
+    ("15m", 15 * 60, 90 * DAY),
+    ("1h", 3600, 2 * 365 * DAY),
+    ("1d", DAY, None)
+)
+
+class Bar:
+    """Barra OHLC de uma resolução, iniciada em ``start_ns``."""
+
+    __slots__ = ("start_ns", "open", "high", "low", "close", "count")
+
+    def __init__(self, start_ns, price):
+        self.start_ns = start_ns
+        self.open = self.high = self.low = self.close = price
+        self.count = 1
+
+    def update(self, price):
+        """Incorpora um novo preço à barra."""
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.count += 1
+
+    def as_tuple(self):
+        return (self.start_ns, self.open, self.high, self.low, self.close, self.count)
+
+class OhlcStore(SqliteStore):
+    """Barras OHLC concluídas de cada par e resolução, com retenção por nível."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ohlc (
+            pair TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            start_ns INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (pair, resolution, start_ns)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_file=DB_FILE, tiers=TIERS):
+        super().__init__(db_file)
+        self.tiers = tiers
+        self.retention = {resolution: retention for _, resolution, retention in tiers}
+
+    def save_bars(self, pair, bars):
+        """Grava barras concluídas ``[(resolução, Bar)]`` e aplica a retenção de cada nível."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ohlc (pair, resolution, start_ns, open, high, low, close, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(pair, resolution, *bar.as_tuple()) for resolution, bar in bars]
+            )
+            newest = {}
+            for resolution, bar in bars:
+                newest[resolution] = max(newest.get(resolution, 0), bar.start_ns)
+            for resolution, start_ns in newest.items():
+                retention = self.retention.get(resolution)
+                if retention:
+                    conn.execute(
+                        "DELETE FROM ohlc WHERE pair = ? AND resolution = ? AND start_ns < ?",
+                        (pair, resolution, start_ns - retention * NS_PER_SECOND)
+                    )
+
+    def watermarks(self, pair):
+        """Início da última barra concluída de cada resolução de um par."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT resolution, MAX(start_ns) FROM ohlc WHERE pair = ? GROUP BY resolution", (pair,)
+            ).fetchall()
+        return dict(rows)
+
+    def load(self, pair, resolution, start_ns=None, end_ns=None):
+        """Barras concluídas ``(início, abertura, máxima, mínima, fechamento, amostras)`` no intervalo."""
+        sql = "SELECT start_ns, open, high, low, close, count FROM ohlc WHERE pair = ? AND resolution = ?"
+        params = [pair, resolution]
+        if start_ns is not None:
+            sql += " AND start_ns >= ?"
+            params.append(start_ns)
+        if end_ns is not None:
+            sql += " AND start_ns < ?"
+            params.append(end_ns)
+        with self.lock:
+            return self.conn.execute(sql + " ORDER BY start_ns", params).fetchall()
+
+class OhlcRollup:
+    """Agregação incremental dos preços de um par em barras OHLC de várias resoluções.
+
+    Cada amostra atualiza, em O(1), a barra aberta de cada nível; ao virar o
+    intervalo, a barra concluída é gravada no OhlcStore. Só as barras abertas
+    ficam em memória. Barras já gravadas (até a marca d'água de cada nível)
+    não são refeitas quando o histórico bruto é reprocessado na inicialização.
+    """
+
+    def __init__(self, store, pair):
+        self.store = store
+        self.pair = pair
+        self.resolutions = [resolution for _, resolution, _ in store.tiers]
+        self.watermarks = store.watermarks(pair)
+        self.current = {resolution: None for resolution in self.resolutions}
+        self.completed = []
+        # O monitor grava amostras enquanto a thread dos gráficos lê as barras
+        self.lock = threading.RLock()
+
+    def resume_from(self):
+        """Timestamp (ns) a partir do qual o histórico bruto deve ser reprocessado (None = tudo)."""
+        starts = []
+        for resolution in self.resolutions:
+            watermark = self.watermarks.get(resolution)
+            if watermark is None:
+                return None
+            starts.append(watermark + resolution * NS_PER_SECOND)
+        return min(starts)
+
+    def add(self, ts_ns, price, flush=True):
+        """Incorpora uma amostra; com ``flush``, grava imediatamente as barras concluídas."""
+        with self.lock:
+            for resolution in self.resolutions:
+                bucket = ts_ns - ts_ns % (resolution * NS_PER_SECOND)
+                if bucket <= self.watermarks.get(resolution, -1):
+                    continue
+                bar = self.current[resolution]
+                if bar is None or bucket > bar.start_ns:
+                    if bar is not None:
+                        self.completed.append((resolution, bar))
+                    self.current[resolution] = Bar(bucket, price)
+                elif bucket == bar.start_ns:
+                    bar.update(price)
+            if flush:
+                self.flush()
+
+    def flush(self):
+        """Grava as barras concluídas pendentes."""
+        with self.lock:
+            if not self.completed:
+                return
+            self.store.save_bars(self.pair, self.completed)
+            for resolution, bar in self.completed:
+                self.watermarks[resolution] = max(self.watermarks.get(resolution, bar.start_ns), bar.start_ns)
+            self.completed = []
+
+    def select_resolution(self, resolution, start_ns=None, now_ns=None):
+        """Nível mais grosso com resolução até ``resolution`` que ainda retém ``start_ns``."""
+        candidates = [r for r in self.resolutions if r <= resolution] or [min(self.resolutions)]
+        chosen = max(candidates)
+        if start_ns is not None and now_ns is not None:
+            # Se o nível já descartou o início do intervalo, usa um nível mais grosso
+            for r in sorted(r for r in self.resolutions if r >= chosen):
+                retention = self.store.retention.get(r)
+                if retention is None or start_ns >= now_ns - retention * NS_PER_SECOND:
+                    return r
+        return chosen
+
+    def bars(self, start=None, end=None, resolution=None, max_points=None):
+        """Barras do intervalo [start, end) na resolução adequada.
+
+        ``start``/``end`` aceitam datetime, timestamp ISO ou epoch em ns.
+        ``resolution`` (segundos) ou ``max_points`` definem a resolução
+        desejada; retorna ``(resolução escolhida, [barras])``, incluindo a
+        barra ainda aberta.
+        """
+        start_ns = to_epoch_ns(start) if start is not None else None
+        end_ns = to_epoch_ns(end) if end is not None else None
+        with self.lock:
+            latest = self.current[self.resolutions[0]]
+            now_ns = latest.start_ns if latest else None
+            if resolution is None:
+                if max_points and start_ns is not None:
+                    span = (end_ns or now_ns or start_ns) - start_ns
+                    resolution = math.ceil(span / NS_PER_SECOND / max_points)
+                else:
+                    resolution = self.resolutions[0]
+            resolution = self.select_resolution(resolution, start_ns, now_ns)
+
+            self.flush()
+            bars = self.store.load(self.pair, resolution, start_ns, end_ns)
+            bar = self.current.get(resolution)
+            if bar is not None and (start_ns is None or bar.start_ns >= start_ns) and (end_ns is None or bar.start_ns < end_ns):
+                bars.append(bar.as_tuple())
+        return resolution, bars
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import copy
+import json
+import logging
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Arquivo opcional com a configuração dos pares monitorados
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+PAIRS_FILE = os.path.join(DATA_DIR, "pairs.json")
+
+class PairConfig:
+    """Configuração de um par monitorado."""
+
+    def __init__(self, name, symbol, currency, news_queries, alert_threshold=None,
+                 history_backend="segment", history_key=None, alert_windows=None,
+                 check_interval=None, provider_symbols=None):
+        """Cria a configuração de um par.
+
+        ``news_queries`` mapeia idioma para termos de busca de notícias.
+        ``alert_threshold`` em porcentagem; ``None`` usa o limiar global do
+        agendador. ``history_backend`` é ``"segment"`` ou ``"json"``.
+        ``alert_windows`` lista as janelas (ex.: ``["5m", "1h"]``) avaliadas
+        nos alertas; ``None`` usa as janelas globais do agendador.
+        ``check_interval`` é o intervalo de verificação do par em segundos;
+        ``None`` usa o intervalo global do agendador. ``provider_symbols``
+        mapeia o nome de uma fonte de cotações (ex.: ``"coinbase"``) para o
+        símbolo do par nela, além dos símbolos que a fonte já conhece.
+        """
+        self.name = name
+        self.symbol = symbol
+        self.currency = currency
+        self.news_queries = news_queries
+        self.alert_threshold = alert_threshold
+        self.history_backend = history_backend
+        self.history_key = history_key or name.lower().replace("/", "_")
+        self.alert_windows = alert_windows
+        self.check_interval = check_interval
+        self.provider_symbols = provider_symbols or {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Cria a configuração a partir de um dicionário (ex.: pairs.json)."""
+        return cls(
+            name=data["name"],
+            symbol=data["symbol"],
+            currency=data.get("currency", ""),
+            news_queries=data.get("news_queries", {}),
+            alert_threshold=data.get("alert_threshold"),
+            history_backend=data.get("history_backend", "segment"),
+            history_key=data.get("history_key"),
+            alert_windows=data.get("alert_windows"),
+            check_interval=data.get("check_interval"),
+            provider_symbols=data.get("provider_symbols")
+        )
+
+    def format_price(self, price):
+        """Formata um preço na moeda de exibição do par."""
+        return f"{self.currency}{price:,.2f}"
+
+    def __repr__(self):
+        return f"PairConfig({self.name!r}, {self.symbol!r})"
+
+class PairRegistry:
+    """Registro ordenado dos pares monitorados, indexado por nome e por símbolo."""
+
+    def __init__(self, pairs=None):
+        self._pairs = {}
+        self._by_symbol = {}
+        for pair in pairs or []:
+            self.register(pair)
+
+    def register(self, pair):
+        """Adiciona (ou substitui) um par no registro."""
+        self._pairs[pair.name] = pair
+        self._by_symbol[pair.symbol] = pair
+
+    def get(self, name):
+        """Retorna a configuração de um par ou None se não estiver registrado."""
+        return self._pairs.get(name)
+
+    def by_symbol(self, symbol):
+        """Retorna a configuração do par associado a um símbolo do provedor."""
+        return self._by_symbol.get(symbol)
+
+    def names(self):
+        """Lista os nomes dos pares na ordem de registro."""
+        return list(self._pairs)
+
+    def symbols(self):
+        """Lista os símbolos dos pares na ordem de registro."""
+        return [pair.symbol for pair in self._pairs.values()]
+
+    def provider_symbols(self, provider):
+        """Símbolos dos pares em uma fonte de cotações: ``{símbolo do registro: símbolo na fonte}``."""
+        return {
+            pair.symbol: pair.provider_symbols[provider]
+            for pair in self._pairs.values() if provider in pair.provider_symbols
+        }
+
+    def __iter__(self):
+        return iter(self._pairs.values())
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def __contains__(self, name):
+        return name in self._pairs
+
+DEFAULT_PAIRS = [
+    PairConfig(
+        "BTC/USD", "BTC-USD", "$",
+        news_queries={
+            "pt": "Bitcoin BTC criptomoeda preço variação",
+            "en": "Bitcoin BTC cryptocurrency price movement"
+        },
+        check_interval=15
+    ),
+    PairConfig(
+        "USD/BRL", "USDBRL=X", "R$",
+        news_queries={
+            "pt": "Dólar real câmbio variação economia",
+            "en": "USD BRL exchange rate forex Brazil"
+        }
+    )
+]
+
+def load_registry(file_path=PAIRS_FILE):
+    """Carrega o registro de pares de ``pairs.json`` ou usa cópias dos pares padrão.
+
+    Cada registro recebe seus próprios ``PairConfig``: alterar um par carregado
+    não afeta ``DEFAULT_PAIRS`` nem os outros registros.
+    """
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                return PairRegistry([PairConfig.from_dict(item) for item in json.load(f)])
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning(f"Erro ao carregar {file_path}: {e}. Usando pares padrão.")
+    return PairRegistry(copy.deepcopy(DEFAULT_PAIRS))
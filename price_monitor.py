@@ -3,12 +3,19 @@
 
 import sys
 import os
+import asyncio
 import time
-import json
 import logging
-from datetime import datetime, timedelta
-import pandas as pd
-import requests
+import threading
+from datetime import datetime
+from async_fetcher import AsyncFetcher, DEFAULT_HEADERS
+from history_store import HISTORY_DIR, JsonHistoryBackend, SegmentHistoryStore, from_epoch_ns, import_json_history, to_epoch_ns
+from ohlc import OhlcRollup, OhlcStore
+from pairs import load_registry
+from provider_chain import ProviderChain
+from consensus import ConsensusProvider
+from quote_cache import QuoteCache
+from rolling_window import DEFAULT_WINDOWS, WindowTracker
 
 # Configuração de logging
 logging.basicConfig(
@@ -21,144 +28,439 @@ logger = logging.getLogger(__name__)
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
-class PriceMonitor:
-    def __init__(self):
-        """Inicializa o monitor de preços."""
-        self.btc_usd_history_file = os.path.join(DATA_DIR, "btc_usd_history.json")
-        self.usd_brl_history_file = os.path.join(DATA_DIR, "usd_brl_history.json")
-        
-        # Inicializa os arquivos de histórico se não existirem
-        for file_path in [self.btc_usd_history_file, self.usd_brl_history_file]:
-            if not os.path.exists(file_path):
-                with open(file_path, 'w') as f:
-                    json.dump([], f)
-        
-        # Carrega histórico existente
-        self.btc_usd_history = self._load_history(self.btc_usd_history_file)
-        self.usd_brl_history = self._load_history(self.usd_brl_history_file)
-    
-    def _load_history(self, file_path):
-        """Carrega o histórico de preços de um arquivo."""
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning(f"Erro ao carregar histórico de {file_path}. Criando novo histórico.")
-            return []
-    
-    def _save_history(self, history, file_path):
-        """Salva o histórico de preços em um arquivo."""
-        with open(file_path, 'w') as f:
-            json.dump(history, f, indent=2)
-    
-    def get_btc_usd_price(self):
-        """Obtém o preço atual de BTC/USD usando a API do Yahoo Finance."""
-        try:
-            # Usando a API do Yahoo Finance
-            url = "https://query1.finance.yahoo.com/v8/finance/chart/BTC-USD"
-            params = {
-                "interval": "1d",
-                "range": "1d"
-            }
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, params=params, headers=headers)
-            data = response.json()
-            
-            # Extrai o preço mais recente
-            price = data["chart"]["result"][0]["meta"]["regularMarketPrice"]
-            timestamp = datetime.now().isoformat()
-            
-            # Adiciona ao histórico
-            self.btc_usd_history.append({
-                "timestamp": timestamp,
-                "price": price
-            })
-            
-            # Limita o histórico a 1000 entradas
-            if len(self.btc_usd_history) > 1000:
-                self.btc_usd_history = self.btc_usd_history[-1000:]
-            
-            # Salva o histórico atualizado
-            self._save_history(self.btc_usd_history, self.btc_usd_history_file)
-            
-            return price, timestamp
-        except Exception as e:
-            logger.error(f"Erro ao obter preço BTC/USD: {e}")
-            # Retorna um valor simulado para fins de teste
-            price = 65000.0
-            timestamp = datetime.now().isoformat()
+# Quantidade de entradas mantidas em memória por par
+MAX_HISTORY = 1000
+
+# Endpoints do Yahoo Finance
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_CHART_FALLBACK_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+COINBASE_SPOT_URL = "https://api.coinbase.com/v2/prices/{symbol}/spot"
+KRAKEN_TICKER_URL = "https://api.kraken.com/0/public/Ticker"
+AWESOMEAPI_LAST_URL = "https://economia.awesomeapi.com.br/json/last/{symbol}"
+CHART_PARAMS = {
+    "interval": "1d",
+    "range": "1d"
+}
+REQUEST_TIMEOUT = 10  # Prazo por requisição em segundos
+
+def parse_chart_price(data):
+    """Extrai o preço mais recente de uma resposta do endpoint de chart."""
+    return data["chart"]["result"][0]["meta"]["regularMarketPrice"]
+
+class QuoteProvider:
+    """Interface dos provedores de cotações.
+    
+    ``fetch_quotes`` recebe uma lista de símbolos e retorna ``{símbolo: preço}``
+    apenas com os símbolos obtidos com sucesso.
+    """
+    name = "base"
+    
+    async def fetch_quotes(self, symbols):
+        raise NotImplementedError
+
+class YahooChartProvider(QuoteProvider):
+    """Provedor legado: uma requisição ao endpoint de chart por símbolo."""
+    name = "yahoo-chart"
+    
+    def __init__(self, fetcher, chart_url=YAHOO_CHART_URL):
+        self.fetcher = fetcher
+        self.chart_url = chart_url
+        self.request_count = 0
+    
+    async def fetch_quotes(self, symbols):
+        symbols = list(dict.fromkeys(symbols))
+        self.request_count += len(symbols)
+        responses = await self.fetcher.gather_json({
+            symbol: (self.chart_url.format(symbol=symbol), CHART_PARAMS)
+            for symbol in symbols
+        }, timeout=REQUEST_TIMEOUT)
+        
+        quotes = {}
+        for symbol, data in responses.items():
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                quotes[symbol] = parse_chart_price(data)
+            except Exception as e:
+                logger.error(f"Erro ao obter cotação de {symbol}: {e}")
+        return quotes
+
+class YahooSparkProvider(QuoteProvider):
+    """Provedor em lote: agrupa vários símbolos por requisição ao endpoint spark.
+    
+    Os símbolos são divididos em lotes de ``batch_size``, buscados
+    concorrentemente, e apenas os símbolos que falharam são tentados de novo
+    (até ``max_retries`` vezes).
+    """
+    name = "yahoo-spark"
+    
+    def __init__(self, fetcher, spark_url=YAHOO_SPARK_URL, batch_size=20, max_retries=1):
+        self.fetcher = fetcher
+        self.spark_url = spark_url
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.request_count = 0
+    
+    @staticmethod
+    def _parse_spark(data):
+        """Separa a resposta do spark em ``{símbolo: preço}``."""
+        quotes = {}
+        for item in data["spark"]["result"]:
+            try:
+                price = item["response"][0]["meta"]["regularMarketPrice"]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if price is not None:
+                quotes[item["symbol"]] = price
+        return quotes
+    
+    async def fetch_quotes(self, symbols):
+        pending = list(dict.fromkeys(symbols))
+        quotes = {}
+        
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                logger.info(f"Tentando novamente {len(pending)} símbolo(s): {', '.join(pending)}")
             
-            # Adiciona ao histórico
-            self.btc_usd_history.append({
-                "timestamp": timestamp,
-                "price": price
-            })
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            self.request_count += len(batches)
+            responses = await self.fetcher.gather_json({
+                index: (self.spark_url, {**CHART_PARAMS, "symbols": ",".join(batch)})
+                for index, batch in enumerate(batches)
+            }, timeout=REQUEST_TIMEOUT)
             
-            # Salva o histórico atualizado
-            self._save_history(self.btc_usd_history, self.btc_usd_history_file)
+            for index, batch in enumerate(batches):
+                data = responses[index]
+                if isinstance(data, Exception):
+                    continue
+                try:
+                    batch_quotes = self._parse_spark(data)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Resposta inválida do spark: {e}")
+                    continue
+                for symbol in batch:
+                    if symbol in batch_quotes:
+                        quotes[symbol] = batch_quotes[symbol]
             
-            return price, timestamp
+            pending = [symbol for symbol in pending if symbol not in quotes]
+        
+        for symbol in pending:
+            logger.error(f"Erro ao obter cotação de {symbol}")
+        return quotes
+
+class MappedQuoteProvider(QuoteProvider):
+    """Base dos provedores com símbolos próprios, consultados com uma requisição por símbolo.
+    
+    ``symbols`` mapeia o símbolo do registro (o do Yahoo) para o do provedor,
+    somado aos ``SYMBOLS`` padrão da classe; os demais símbolos não são
+    suportados.
+    """
+    SYMBOLS = {}
+    
+    def __init__(self, fetcher, symbols=None):
+        self.fetcher = fetcher
+        self.symbols = {**self.SYMBOLS, **(symbols or {})}
+        self.request_count = 0
+    
+    def supports(self, symbol):
+        return symbol in self.symbols
+    
+    def request(self, native):
+        """``(url, params)`` da cotação de um símbolo do provedor."""
+        raise NotImplementedError
+    
+    def parse(self, data):
+        """Extrai o preço da resposta JSON."""
+        raise NotImplementedError
+    
+    async def fetch_quotes(self, symbols):
+        wanted = [symbol for symbol in dict.fromkeys(symbols) if symbol in self.symbols]
+        self.request_count += len(wanted)
+        responses = await self.fetcher.gather_json(
+            {symbol: self.request(self.symbols[symbol]) for symbol in wanted}, timeout=REQUEST_TIMEOUT
+        )
+        
+        quotes = {}
+        for symbol, data in responses.items():
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                quotes[symbol] = self.parse(data)
+            except Exception as e:
+                logger.error(f"Erro ao obter cotação de {symbol} ({self.name}): {e}")
+        return quotes
+
+class CoinbaseProvider(MappedQuoteProvider):
+    """Preço spot da Coinbase (criptomoedas)."""
+    name = "coinbase"
+    SYMBOLS = {"BTC-USD": "BTC-USD", "ETH-USD": "ETH-USD"}
+    
+    def request(self, native):
+        return COINBASE_SPOT_URL.format(symbol=native), None
+    
+    def parse(self, data):
+        return float(data["data"]["amount"])
+
+class KrakenProvider(MappedQuoteProvider):
+    """Último negócio na Kraken (criptomoedas)."""
+    name = "kraken"
+    SYMBOLS = {"BTC-USD": "XBTUSD", "ETH-USD": "ETHUSD"}
+    
+    def request(self, native):
+        return KRAKEN_TICKER_URL, {"pair": native}
     
-    def get_usd_brl_price(self):
-        """Obtém o preço atual de USD/BRL usando a API do Yahoo Finance."""
+    def parse(self, data):
+        if data.get("error"):
+            raise ValueError(", ".join(data["error"]))
+        return float(next(iter(data["result"].values()))["c"][0])
+
+class AwesomeApiProvider(MappedQuoteProvider):
+    """Cotação de compra da AwesomeAPI (câmbio em reais)."""
+    name = "awesomeapi"
+    SYMBOLS = {"USDBRL=X": "USD-BRL", "EURBRL=X": "EUR-BRL"}
+    
+    def request(self, native):
+        return AWESOMEAPI_LAST_URL.format(symbol=native), None
+    
+    def parse(self, data):
+        return float(next(iter(data.values()))["bid"])
+
+class PriceMonitor:
+    def __init__(self, registry=None, history_backend=None, fetcher=None, provider=None, windows=DEFAULT_WINDOWS,
+                 ohlc=None, lazy=False):
+        """Inicializa o monitor de preços.
+
+        ``registry`` é o PairRegistry dos pares monitorados (por padrão,
+        ``pairs.load_registry()``). ``history_backend`` é uma fábrica
+        ``(nome) -> HistoryBackend`` que substitui o backend configurado em cada
+        par. ``fetcher`` é o cliente HTTP assíncrono compartilhado e ``provider``
+        o QuoteProvider usado por ``fetch_price_data`` (por padrão, o consenso
+        entre o Yahoo e as fontes independentes que cotam os pares; veja
+        ``_default_provider``). ``windows`` são as janelas deslizantes
+        acompanhadas para todos os pares, além das ``alert_windows`` de cada par.
+        ``ohlc`` é o OhlcStore das barras agregadas (por padrão, o do banco do bot).
+        Com ``lazy``, o histórico só é carregado por ``load()``/``load_async()``
+        ou no primeiro uso, para não atrasar a inicialização do bot.
+        """
+        self.registry = registry or load_registry()
+        self.history_backend = history_backend
+        self.fetcher = fetcher or AsyncFetcher(timeout=REQUEST_TIMEOUT)
+        self.provider = provider or self._default_provider()
+        
+        # Cache das últimas cotações, alimentado a cada verificação do agendador
+        self.quote_cache = QuoteCache(self.fetch_live_price_data)
+        
+        self.windows = list(windows)
+        self.stores = {}
+        self.histories = {}
+        self.trackers = {}
+        self.ohlc = ohlc
+        self.rollups = {}
+        self.loaded = False
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.load()
+    
+    def _default_provider(self):
+        """Consenso entre o Yahoo e as fontes independentes que cotam algum par do registro.
+        
+        O Yahoo é uma ProviderChain com o spark em lote e, como reserva, o
+        endpoint de chart em outro host; cada outra fonte tem sua própria
+        cadeia, e portanto seu próprio circuit breaker.
+        """
+        sources = [ProviderChain([
+            YahooSparkProvider(self.fetcher, max_retries=0),
+            YahooChartProvider(self.fetcher, chart_url=YAHOO_CHART_FALLBACK_URL)
+        ], name="yahoo")]
+        for provider_class in (CoinbaseProvider, KrakenProvider, AwesomeApiProvider):
+            provider = provider_class(self.fetcher, symbols=self.registry.provider_symbols(provider_class.name))
+            if any(provider.supports(symbol) for symbol in self.registry.symbols()):
+                sources.append(ProviderChain([provider]))
+        return ConsensusProvider(sources)
+    
+    def load(self):
+        """Abre os backends, carrega o final do histórico e prepara as janelas de cada par.
+        
+        Só executa uma vez; chamadas concorrentes esperam o primeiro carregamento.
+        """
+        if self.loaded:
+            return
+        with self._load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            self.ohlc = self.ohlc or OhlcStore()
+            for pair in self.registry:
+                self.stores[pair.name] = self._open_backend(pair)
+                self.histories[pair.name] = self._load_history(self.stores[pair.name])
+                self.trackers[pair.name] = self._open_tracker(pair, self.histories[pair.name])
+                self.rollups[pair.name] = self._open_rollup(pair, self.stores[pair.name])
+            self.loaded = True
+            logger.info(f"Histórico de {len(self.histories)} par(es) carregado em {time.perf_counter() - started:.2f}s")
+    
+    async def load_async(self):
+        """Versão assíncrona de ``load``, executada fora do event loop."""
+        if not self.loaded:
+            await asyncio.to_thread(self.load)
+    
+    def _open_backend(self, pair):
+        """Abre o backend de histórico de um par.
+        
+        O backend ``segment`` (padrão) importa na primeira execução o arquivo
+        JSON legado ``<chave>_history.json``.
+        """
+        if self.history_backend:
+            return self.history_backend(pair.history_key)
+        legacy_file = os.path.join(DATA_DIR, f"{pair.history_key}_history.json")
+        if pair.history_backend == "json":
+            return JsonHistoryBackend(legacy_file, max_records=MAX_HISTORY)
+        store = SegmentHistoryStore(os.path.join(HISTORY_DIR, pair.history_key))
+        import_json_history(legacy_file, store)
+        return store
+    
+    def _load_history(self, store):
+        """Carrega as últimas entradas do histórico de preços de um backend em um PriceRing."""
+        # Importado aqui para que o NumPy só seja carregado junto com o histórico
+        from price_ring import PriceRing
+        history = PriceRing(MAX_HISTORY)
+        try:
+            history.extend(store.tail(MAX_HISTORY))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Erro ao carregar histórico: {e}. Criando novo histórico.")
+        return history
+    
+    def _open_tracker(self, pair, history):
+        """Cria as janelas deslizantes de um par, preenchidas com o histórico carregado."""
+        names = self.windows + [name for name in pair.alert_windows or [] if name not in self.windows]
+        tracker = WindowTracker(names)
+        for ts_ns, price in zip(history.timestamps.tolist(), history.prices.tolist()):
+            tracker.add(ts_ns, price)
+        return tracker
+    
+    def _open_rollup(self, pair, store):
+        """Cria a agregação OHLC de um par, completando-a com o histórico bruto ainda não agregado."""
+        rollup = OhlcRollup(self.ohlc, pair.name)
+        try:
+            for ts_ns, price in store.read_range(rollup.resume_from()):
+                rollup.add(ts_ns, price, flush=False)
+            rollup.flush()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Erro ao agregar histórico de {pair.name}: {e}")
+        return rollup
+    
+    def _remember_price(self, pair, ts_ns, price):
+        """Acrescenta um preço ao histórico em memória e às janelas deslizantes do par."""
+        # Adiciona ao histórico (o PriceRing descarta a amostra mais antiga quando cheio)
+        self.histories[pair].append(ts_ns, price)
+        
+        # Atualiza as janelas deslizantes (O(1) amortizado por janela)
+        self.trackers[pair].add(ts_ns, price)
+    
+    def _persist_price(self, pair, ts_ns, price):
+        """Grava um preço no backend do par e nas barras OHLC (bloqueante)."""
+        self.stores[pair].append(ts_ns, price)
+        
+        # Atualiza as barras OHLC (grava apenas as barras que se completaram)
+        self.rollups[pair].add(ts_ns, price)
+    
+    def _record_price(self, pair, price):
+        """Registra um preço no histórico em memória e no backend do par."""
+        timestamp = datetime.now().isoformat()
+        ts_ns = to_epoch_ns(timestamp)
+        self._remember_price(pair, ts_ns, price)
+        self._persist_price(pair, ts_ns, price)
+        return price, timestamp
+    
+    def last_price(self, pair):
+        """Último preço registrado de um par como ``(preço, timestamp)``, ou None sem histórico.
+        
+        É o valor servido (marcado como desatualizado) quando nenhum provedor
+        responde; nunca é gravado de novo no histórico.
+        """
+        self.load()
+        history = self.histories.get(pair)
+        if history is None or not len(history):
+            return None
+        ts_ns, price = history[-1]
+        return price, from_epoch_ns(ts_ns)
+    
+    def _fetch_price(self, pair):
+        """Obtém (de forma síncrona) e registra o preço atual de um par pela API do Yahoo Finance.
+        
+        Retorna ``(preço, timestamp)`` ou None se a API falhar.
+        """
+        import requests
+        self.load()
         try:
             # Usando a API do Yahoo Finance
-            url = "https://query1.finance.yahoo.com/v8/finance/chart/USDBRL=X"
-            params = {
-                "interval": "1d",
-                "range": "1d"
-            }
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, params=params, headers=headers)
-            data = response.json()
-            
-            # Extrai o preço mais recente
-            price = data["chart"]["result"][0]["meta"]["regularMarketPrice"]
-            timestamp = datetime.now().isoformat()
-            
-            # Adiciona ao histórico
-            self.usd_brl_history.append({
-                "timestamp": timestamp,
-                "price": price
-            })
-            
-            # Limita o histórico a 1000 entradas
-            if len(self.usd_brl_history) > 1000:
-                self.usd_brl_history = self.usd_brl_history[-1000:]
-            
-            # Salva o histórico atualizado
-            self._save_history(self.usd_brl_history, self.usd_brl_history_file)
-            
-            return price, timestamp
+            url = YAHOO_CHART_URL.format(symbol=self.registry.get(pair).symbol)
+            response = requests.get(url, params=CHART_PARAMS, headers=DEFAULT_HEADERS, timeout=REQUEST_TIMEOUT)
+            price = parse_chart_price(response.json())
+            return self._record_price(pair, price)
         except Exception as e:
-            logger.error(f"Erro ao obter preço USD/BRL: {e}")
-            # Retorna um valor simulado para fins de teste
-            price = 5.20
+            logger.error(f"Erro ao obter preço {pair}: {e}")
+            return None
+    
+    def get_price(self, pair):
+        """Obtém (de forma síncrona) o preço atual de um par.
+        
+        Se a API falhar, retorna o último preço registrado sem gravá-lo de novo
+        (ou ``(None, None)`` sem histórico).
+        """
+        return self._fetch_price(pair) or self.last_price(pair) or (None, None)
+    
+    async def fetch_prices(self, pairs=None):
+        """Obtém os preços dos pares em uma única passada em lote.
+        
+        ``pairs`` lista os nomes dos pares (por padrão, todos os do registro).
+        Retorna ``{par: (preço, timestamp)}`` só com os pares cujo símbolo foi
+        obtido; os demais ficam de fora, sem nada gravado no histórico.
+        """
+        configs = [self.registry.get(name) for name in pairs] if pairs is not None else list(self.registry)
+        quotes, _ = await asyncio.gather(
+            self.provider.fetch_quotes([pair.symbol for pair in configs]), self.load_async()
+        )
+        
+        # O histórico em memória e as janelas deslizantes são lidos no event
+        # loop, então são atualizados aqui; só as gravações em disco vão para
+        # uma thread
+        prices, samples = self._remember_quotes(quotes, configs)
+        await asyncio.to_thread(self._persist_prices, samples)
+        return prices
+    
+    def _remember_quotes(self, quotes, pairs):
+        """Registra em memória as cotações ``{símbolo: preço}`` dos pares.
+        
+        Retorna ``({par: (preço, timestamp)}, [(par, ts_ns, preço)])``; a
+        segunda lista é o que falta gravar com ``_persist_prices``.
+        """
+        prices, samples = {}, []
+        for pair in pairs:
+            if pair.symbol not in quotes:
+                logger.error(f"Erro ao obter preço {pair.name}: cotação indisponível")
+                continue
+            price = quotes[pair.symbol]
             timestamp = datetime.now().isoformat()
-            
-            # Adiciona ao histórico
-            self.usd_brl_history.append({
-                "timestamp": timestamp,
-                "price": price
-            })
-            
-            # Salva o histórico atualizado
-            self._save_history(self.usd_brl_history, self.usd_brl_history_file)
-            
-            return price, timestamp
+            ts_ns = to_epoch_ns(timestamp)
+            self._remember_price(pair.name, ts_ns, price)
+            prices[pair.name] = (price, timestamp)
+            samples.append((pair.name, ts_ns, price))
+        return prices, samples
+    
+    def _persist_prices(self, samples):
+        """Grava no disco as amostras ``(par, ts_ns, preço)`` registradas em memória."""
+        for pair, ts_ns, price in samples:
+            self._persist_price(pair, ts_ns, price)
     
     def check_price_variation(self, pair="BTC/USD"):
         """Verifica a variação de preço para um par específico."""
+        self.load()
         try:
-            if pair == "BTC/USD":
-                history = self.btc_usd_history
-            elif pair == "USD/BRL":
-                history = self.usd_brl_history
-            else:
+            history = self.histories.get(pair)
+            if history is None:
                 logger.error(f"Par não suportado: {pair}")
                 return None, None
             
@@ -167,58 +469,145 @@ class PriceMonitor:
                 logger.info(f"Histórico insuficiente para {pair}. Aguardando mais dados.")
                 return 0, None
             
-            # Obtém o preço atual e o anterior
-            current_price = history[-1]["price"]
-            previous_price = history[-2]["price"]
-            
-            # Calcula a variação percentual
-            variation_pct = ((current_price - previous_price) / previous_price) * 100
-            
-            return variation_pct, current_price
+            # Variação percentual entre o preço anterior e o atual
+            return history.variation(n=2), history[-1][1]
         except Exception as e:
             logger.error(f"Erro ao verificar variação de {pair}: {e}")
             return None, None
     
+    def sources_for(self, pair):
+        """Fontes que formaram o último preço de consenso do par (None sem consenso)."""
+        result = getattr(self.provider, "results", {}).get(self.registry.get(pair).symbol)
+        return result["sources"] if result else None
+    
+    def _stale_quote(self, pair):
+        """Dados de preço de um par sem cotação nova: o último preço registrado, marcado como desatualizado."""
+        last = self.last_price(pair)
+        if last is None:
+            return None
+        price, timestamp = last
+        return {
+            "price": price,
+            "timestamp": timestamp,
+            "variation": None,
+            "windows": self.trackers[pair].stats(),
+            "stale": True
+        }
+    
+    def _build_price_data(self, prices, pairs=None):
+        """Monta o dicionário de dados de preço a partir de ``{par: (preço, timestamp)}``.
+        
+        Os ``pairs`` pedidos (por padrão, todos) que ficaram sem cotação
+        recebem o último preço registrado com ``stale`` verdadeiro; pares sem
+        nenhum histórico ficam de fora.
+        """
+        data = {}
+        for pair in pairs if pairs is not None else self.registry.names():
+            if pair in prices:
+                price, timestamp = prices[pair]
+                variation, _ = self.check_price_variation(pair)
+                data[pair] = {
+                    "price": price,
+                    "timestamp": timestamp,
+                    "variation": variation,
+                    "windows": self.trackers[pair].stats(),
+                    "stale": False,
+                    "sources": self.sources_for(pair)
+                }
+            else:
+                quote = self._stale_quote(pair)
+                if quote is not None:
+                    data[pair] = quote
+        return data
+    
     def get_price_data(self):
         """Obtém os dados de preço atuais para todos os pares monitorados."""
-        btc_usd_price, btc_usd_timestamp = self.get_btc_usd_price()
-        usd_brl_price, usd_brl_timestamp = self.get_usd_brl_price()
+        prices = {pair.name: self._fetch_price(pair.name) for pair in self.registry}
+        return self._build_price_data({pair: price for pair, price in prices.items() if price is not None})
+    
+    async def fetch_price_data(self, pairs=None):
+        """Versão assíncrona de get_price_data, sem bloquear o event loop na rede.
         
-        btc_usd_variation, _ = self.check_price_variation("BTC/USD")
-        usd_brl_variation, _ = self.check_price_variation("USD/BRL")
+        Registra as cotações dos ``pairs`` (por padrão, todos) no histórico e
+        publica os dados no cache de cotações.
+        """
+        data = self._build_price_data(await self.fetch_prices(pairs), pairs)
+        self.quote_cache.publish(data)
+        return data
+    
+    async def fetch_live_price_data(self, pairs=None):
+        """Obtém as cotações atuais dos ``pairs`` (por padrão, todos) sem registrá-las no histórico.
         
-        return {
-            "BTC/USD": {
-                "price": btc_usd_price,
-                "timestamp": btc_usd_timestamp,
-                "variation": btc_usd_variation
-            },
-            "USD/BRL": {
-                "price": usd_brl_price,
-                "timestamp": usd_brl_timestamp,
-                "variation": usd_brl_variation
+        A variação é calculada em relação à última amostra registrada; pares sem
+        cotação recebem o último preço registrado, marcado como desatualizado.
+        """
+        configs = [self.registry.get(name) for name in pairs] if pairs is not None else list(self.registry)
+        quotes, _ = await asyncio.gather(
+            self.provider.fetch_quotes([pair.symbol for pair in configs]), self.load_async()
+        )
+        timestamp = datetime.now().isoformat()
+        
+        data = {}
+        for pair in configs:
+            if pair.symbol not in quotes:
+                quote = self._stale_quote(pair.name)
+                if quote is not None:
+                    data[pair.name] = quote
+                continue
+            history = self.histories[pair.name]
+            last_price = history[-1][1] if len(history) else None
+            price = quotes[pair.symbol]
+            data[pair.name] = {
+                "price": price,
+                "timestamp": timestamp,
+                "variation": ((price - last_price) / last_price) * 100 if last_price else None,
+                "windows": self.trackers[pair.name].stats(),
+                "stale": False
             }
-        }
+        return data
+    
+    def get_ohlc(self, pair, start=None, end=None, resolution=None, max_points=None):
+        """Barras OHLC de um par no intervalo, no nível mais grosso que atende à resolução.
+        
+        Retorna ``(resolução em segundos, [(início_ns, abertura, máxima, mínima, fechamento, amostras)])``.
+        """
+        self.load()
+        return self.rollups[pair].bars(start, end, resolution, max_points)
     
     def format_price_message(self):
         """Formata uma mensagem com os preços atuais."""
-        data = self.get_price_data()
-        
-        btc_usd = data["BTC/USD"]
-        usd_brl = data["USD/BRL"]
-        
-        btc_usd_variation_str = f"{btc_usd['variation']:.2f}%" if btc_usd['variation'] is not None else "N/A"
-        usd_brl_variation_str = f"{usd_brl['variation']:.2f}%" if usd_brl['variation'] is not None else "N/A"
+        return self._format_price_message(self.get_price_data())
+    
+    async def fetch_price_message(self, max_age=None):
+        """Formata a mensagem de preços a partir do cache de cotações.
         
-        btc_usd_arrow = "🔺" if btc_usd['variation'] and btc_usd['variation'] > 0 else "🔻" if btc_usd['variation'] and btc_usd['variation'] < 0 else "➡️"
-        usd_brl_arrow = "🔺" if usd_brl['variation'] and usd_brl['variation'] > 0 else "🔻" if usd_brl['variation'] and usd_brl['variation'] < 0 else "➡️"
+        Só busca cotações novas se as do cache tiverem mais de ``max_age``
+        segundos; requisições concorrentes compartilham a mesma busca.
+        """
+        data, age = await self.quote_cache.get(max_age)
+        return self._format_price_message(data, self.quote_cache.timestamp, age)
+    
+    def _format_price_message(self, data, updated_at=None, age=None):
+        """Formata a mensagem de preços a partir dos dados de get_price_data."""
+        message = "💰 Preços Atuais:\n\n"
+        for pair in self.registry:
+            quote = data.get(pair.name)
+            if quote is None:
+                message += f"{pair.name}: indisponível\n"
+                continue
+            if quote.get("stale"):
+                since = datetime.fromisoformat(quote["timestamp"]).strftime('%d/%m %H:%M')
+                message += f"{pair.name}: {pair.format_price(quote['price'])} ⚠️ (desatualizado, último preço de {since})\n"
+                continue
+            variation = quote['variation']
+            variation_str = f"{variation:.2f}%" if variation is not None else "N/A"
+            arrow = "🔺" if variation and variation > 0 else "🔻" if variation and variation < 0 else "➡️"
+            message += f"{pair.name}: {pair.format_price(quote['price'])} {arrow} ({variation_str})\n"
         
-        message = (
-            "💰 Preços Atuais:\n\n"
-            f"BTC/USD: ${btc_usd['price']:,.2f} {btc_usd_arrow} ({btc_usd_variation_str})\n"
-            f"USD/BRL: R${usd_brl['price']:,.2f} {usd_brl_arrow} ({usd_brl_variation_str})\n\n"
-            f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-        )
+        updated_at = updated_at or datetime.now()
+        message += f"\nÚltima atualização: {updated_at.strftime('%d/%m/%Y %H:%M:%S')}"
+        if age is not None:
+            message += f" (há {age:.0f}s)"
         
         return message
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import numpy as np
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+class PriceRing:
+    """Histórico de preços em memória com capacidade fixa e 16 bytes por amostra.
+
+    Timestamps (epoch em ns, int64) e preços (float64) ficam em arrays NumPy
+    pré-alocados. Os arrays têm uma folga de ``slack`` posições: as amostras são
+    gravadas em sequência e, quando a folga acaba, as ``capacity`` mais recentes
+    são movidas para o início em uma única cópia. Assim, as amostras válidas
+    estão sempre contíguas e ``window`` retorna views sem cópia. As views
+    apontam para o buffer e só valem até a próxima escrita; copie-as para
+    guardar os dados.
+    """
+
+    def __init__(self, capacity, slack=None):
+        self.capacity = capacity
+        self.slack = max(1, capacity // 4 if slack is None else slack)
+        self._timestamps = np.zeros(capacity + self.slack, dtype=np.int64)
+        self._prices = np.zeros(capacity + self.slack, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def append(self, ts_ns, price):
+        """Acrescenta uma amostra, descartando a mais antiga quando cheio."""
+        if self._end == len(self._prices):
+            # Sem folga: move as amostras mais recentes para o início do buffer
+            keep = self.capacity - 1
+            self._timestamps[:keep] = self._timestamps[self._end - keep:self._end]
+            self._prices[:keep] = self._prices[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        self._timestamps[self._end] = ts_ns
+        self._prices[self._end] = price
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, samples):
+        """Acrescenta várias amostras ``(epoch_ns, preço)`` em ordem."""
+        for ts_ns, price in samples:
+            self.append(ts_ns, price)
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        """Amostra ``(epoch_ns, preço)`` na posição ``index`` (aceita índices negativos)."""
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("índice fora do histórico")
+        position = self._start + index
+        return int(self._timestamps[position]), float(self._prices[position])
+
+    def last(self):
+        """Última amostra ``(epoch_ns, preço)`` ou None se o histórico estiver vazio."""
+        return self[-1] if len(self) else None
+
+    @property
+    def timestamps(self):
+        """View somente leitura dos timestamps válidos, do mais antigo ao mais recente."""
+        return self._view(self._timestamps, self._start)
+
+    @property
+    def prices(self):
+        """View somente leitura dos preços válidos, do mais antigo ao mais recente."""
+        return self._view(self._prices, self._start)
+
+    def _view(self, array, start):
+        view = array[start:self._end]
+        view.flags.writeable = False
+        return view
+
+    def window(self, since_ns=None, n=None):
+        """Views ``(timestamps, preços)`` das amostras desde ``since_ns`` ou das últimas ``n``."""
+        start = self._start
+        if since_ns is not None:
+            start += int(np.searchsorted(self.timestamps, since_ns, side="left"))
+        if n is not None:
+            start = max(start, self._end - n)
+        return self._view(self._timestamps, start), self._view(self._prices, start)
+
+    def variation(self, since_ns=None, n=None):
+        """Variação percentual entre a primeira e a última amostra da janela."""
+        _, prices = self.window(since_ns, n)
+        if len(prices) < 2 or not prices[0]:
+            return None
+        return float((prices[-1] - prices[0]) / prices[0] * 100)
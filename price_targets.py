@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import math
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from database import SqliteStore
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Direções de um alvo: dispara quando o preço sobe até o alvo (">") ou cai até ele ("<")
+ABOVE = ">"
+BELOW = "<"
+
+# Alvos pendentes permitidos por chat
+MAX_TARGETS_PER_CHAT = 50
+
+_RULE_PATTERN = re.compile(r"^\s*(\S+?)\s*([<>])\s*([0-9][0-9.,]*)\s*$")
+_GROUPED = re.compile(r"[0-9]{1,3}([.,])[0-9]{3}(?:\1[0-9]{3})+")
+_SINGLE_GROUP = re.compile(r"[1-9][0-9]{0,2}[.,][0-9]{3}")
+_INTEGER_GROUPS = re.compile(r"[0-9]{1,3}([.,])[0-9]{3}(?:\1[0-9]{3})*")
+
+def _parse_number(value, reference=None):
+    """Converte um valor com "," ou "." como separador de milhar ou decimal.
+
+    Dois ou mais grupos (``1,234,567``) ou separadores misturados
+    (``70.000,50``) definem o formato; um único separador seguido de um, dois
+    ou quatro ou mais dígitos é decimal (``5,1``, ``0,001``). Já ``5,125`` ou
+    ``70.000`` podem ser as duas coisas: vale o candidato mais próximo de
+    ``reference`` (o preço atual do par) e, sem ela, o valor é recusado como
+    ambíguo.
+    """
+    if _GROUPED.fullmatch(value):
+        return float(re.sub(r"[.,]", "", value))
+    if _SINGLE_GROUP.fullmatch(value):
+        grouped, decimal = float(re.sub(r"[.,]", "", value)), float(value.replace(",", "."))
+        if not reference or reference <= 0:
+            raise ValueError(
+                f"Valor ambíguo: {value} pode ser {grouped:g} ou {decimal:g}; "
+                f"escreva sem separador de milhar (ex.: {grouped:.0f} ou {decimal:g})"
+            )
+        return min((grouped, decimal), key=lambda candidate: abs(math.log(candidate / reference)))
+    last = max(value.rfind(","), value.rfind("."))
+    if last < 0:
+        return float(value)
+    integer, decimals = value[:last], value[last + 1:]
+    if re.search(r"[.,]", integer) and (value[last] in integer or not _INTEGER_GROUPS.fullmatch(integer)):
+        raise ValueError(f"Número inválido: {value!r}")
+    return float(re.sub(r"[.,]", "", integer) + "." + decimals)
+
+def parse_rule(text, reference=None):
+    """Interpreta ``"BTC/USD > 70000"`` como ``(par, direção, alvo)``; levanta ValueError se inválido.
+
+    ``reference(par)`` retorna o preço atual do par (ou None) e desfaz valores
+    ambíguos como ``5,125``.
+    """
+    match = _RULE_PATTERN.match(text or "")
+    if not match:
+        raise ValueError(f"Regra inválida: {text!r}")
+    pair, direction, value = match.groups()
+    target = _parse_number(value, reference(pair) if reference else None)
+    if target <= 0:
+        raise ValueError(f"Alvo inválido: {value!r}")
+    return pair, direction, target
+
+class _SortedTargets:
+    """Alvos de uma direção em listas paralelas ordenadas pelo preço."""
+
+    def __init__(self):
+        self.prices = []
+        self.ids = []
+
+    def add(self, target_id, price):
+        index = bisect_right(self.prices, price)
+        self.prices.insert(index, price)
+        self.ids.insert(index, target_id)
+
+    def remove(self, target_id, price):
+        index = bisect_left(self.prices, price)
+        while index < len(self.prices) and self.prices[index] == price:
+            if self.ids[index] == target_id:
+                del self.prices[index]
+                del self.ids[index]
+                return True
+            index += 1
+        return False
+
+    def pop_range(self, lo, hi):
+        """Remove e retorna os ids das posições ``[lo, hi)``."""
+        ids = self.ids[lo:hi]
+        del self.prices[lo:hi]
+        del self.ids[lo:hi]
+        return ids
+
+    def __len__(self):
+        return len(self.prices)
+
+class TargetIndex:
+    """Alvos pendentes de um par, ordenados por preço em cada direção.
+
+    Um tick de ``previous`` para ``price`` só cruza os alvos ``>`` no intervalo
+    ``(previous, price]`` e os alvos ``<`` em ``[price, previous)``; cada faixa
+    é localizada por busca binária, então o custo é O(log n + k) para k alvos
+    cruzados, sem percorrer os demais.
+    """
+
+    def __init__(self):
+        self.above = _SortedTargets()
+        self.below = _SortedTargets()
+
+    def _side(self, direction):
+        return self.above if direction == ABOVE else self.below
+
+    def add(self, target_id, direction, price):
+        self._side(direction).add(target_id, price)
+
+    def remove(self, target_id, direction, price):
+        return self._side(direction).remove(target_id, price)
+
+    def crossed(self, previous, price):
+        """Remove e retorna os ids dos alvos cruzados entre ``previous`` e ``price``."""
+        if price > previous:
+            prices = self.above.prices
+            return self.above.pop_range(bisect_right(prices, previous), bisect_right(prices, price))
+        if price < previous:
+            prices = self.below.prices
+            return self.below.pop_range(bisect_left(prices, price), bisect_left(prices, previous))
+        return []
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+class PriceTargetStore(SqliteStore):
+    """Alvos de preço dos usuários; os disparados ficam registrados com preço e horário."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS price_targets (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            pair TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            target REAL NOT NULL,
+            created_at TEXT NOT NULL,
+            triggered_at TEXT,
+            triggered_price REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_price_targets_chat ON price_targets (chat_id, triggered_at);
+    """
+
+    def add(self, chat_id, pair, direction, target):
+        """Grava um alvo pendente e retorna seu id."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO price_targets (chat_id, pair, direction, target, created_at) VALUES (?, ?, ?, ?, ?)",
+                (chat_id, pair, direction, target, datetime.now().isoformat())
+            )
+        return cursor.lastrowid
+
+    def delete(self, target_id):
+        """Apaga um alvo."""
+        with self.lock:
+            self.conn.execute("DELETE FROM price_targets WHERE id = ?", (target_id,))
+
+    def mark_triggered(self, target_ids, price, timestamp):
+        """Marca alvos como disparados no preço e horário informados."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE price_targets SET triggered_at = ?, triggered_price = ? WHERE id = ?",
+                [(timestamp, price, target_id) for target_id in target_ids]
+            )
+
+    def pending(self):
+        """Todos os alvos pendentes ``(id, chat_id, par, direção, alvo)``."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, chat_id, pair, direction, target FROM price_targets WHERE triggered_at IS NULL"
+            ).fetchall()
+
+class PriceTargets:
+    """Alvos de preço por usuário, persistidos no PriceTargetStore e indexados em memória por par.
+
+    ``check(par, preço)`` é chamado a cada tick e devolve os alvos cruzados
+    desde o tick anterior do par. Cada alvo dispara uma única vez.
+    """
+
+    def __init__(self, store=None, max_per_chat=MAX_TARGETS_PER_CHAT):
+        self.store = store or PriceTargetStore()
+        self.max_per_chat = max_per_chat
+        self.indexes = {}
+        self.rules = {}
+        self.by_chat = {}
+        self.last_prices = {}
+        self.lock = threading.Lock()
+        for target_id, chat_id, pair, direction, target in self.store.pending():
+            self._index(target_id, chat_id, pair, direction, target)
+
+    def _index(self, target_id, chat_id, pair, direction, target):
+        self.rules[target_id] = {"id": target_id, "chat_id": chat_id, "pair": pair, "direction": direction, "target": target}
+        self.by_chat.setdefault(chat_id, set()).add(target_id)
+        self.indexes.setdefault(pair, TargetIndex()).add(target_id, direction, target)
+
+    def _forget(self, rule):
+        ids = self.by_chat.get(rule["chat_id"])
+        if ids is not None:
+            ids.discard(rule["id"])
+            if not ids:
+                del self.by_chat[rule["chat_id"]]
+
+    def add(self, chat_id, pair, direction, target):
+        """Cria um alvo e retorna seu id.
+
+        Levanta ValueError se o chat já tiver alvos demais ou se o preço atual
+        (último tick do par) já estiver além do alvo.
+        """
+        if len(self.for_chat(chat_id)) >= self.max_per_chat:
+            raise ValueError(f"Limite de {self.max_per_chat} alvos por chat atingido")
+        last = self.last_prices.get(pair)
+        if last is not None and (last >= target if direction == ABOVE else last <= target):
+            raise ValueError("O preço atual já está além do alvo")
+        target_id = self.store.add(chat_id, pair, direction, target)
+        with self.lock:
+            self._index(target_id, chat_id, pair, direction, target)
+        return target_id
+
+    def remove(self, chat_id, target_id):
+        """Remove um alvo pendente do chat. Retorna False se não existir."""
+        with self.lock:
+            rule = self.rules.get(target_id)
+            if rule is None or rule["chat_id"] != chat_id:
+                return False
+            del self.rules[target_id]
+            self._forget(rule)
+            self.indexes[rule["pair"]].remove(target_id, rule["direction"], rule["target"])
+        self.store.delete(target_id)
+        return True
+
+    def for_chat(self, chat_id):
+        """Alvos pendentes de um chat, por par e preço."""
+        with self.lock:
+            rules = [self.rules[target_id] for target_id in self.by_chat.get(chat_id, ())]
+        return sorted(rules, key=lambda rule: (rule["pair"], rule["target"]))
+
+    def seed(self, pair, price):
+        """Define o preço anterior de um par que ainda não teve tick (ex.: o último do histórico).
+
+        Assim, um alvo cruzado enquanto o bot estava parado dispara no primeiro tick.
+        """
+        with self.lock:
+            self.last_prices.setdefault(pair, price)
+
+    def check(self, pair, price, timestamp=None):
+        """Registra o tick de um par e retorna os alvos cruzados desde o tick anterior."""
+        with self.lock:
+            previous = self.last_prices.get(pair)
+            self.last_prices[pair] = price
+            index = self.indexes.get(pair)
+            if previous is None or index is None:
+                return []
+            triggered = [self.rules.pop(target_id) for target_id in index.crossed(previous, price)]
+            for rule in triggered:
+                self._forget(rule)
+        if triggered:
+            self.store.mark_triggered(
+                [rule["id"] for rule in triggered], price, timestamp or datetime.now().isoformat()
+            )
+        return triggered
+
+    def __len__(self):
+        return len(self.rules)
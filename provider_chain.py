@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import logging
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Estados do circuit breaker de um provedor
+CLOSED = "closed"        # Provedor saudável, usado normalmente
+OPEN = "open"            # Falhas seguidas: provedor ignorado até o fim do cooldown
+HALF_OPEN = "half_open"  # Cooldown encerrado: uma única tentativa de teste
+
+# Configuração padrão (variáveis de ambiente opcionais): prazo máximo por
+# tentativa (s), falhas seguidas que abrem o circuito e cooldown inicial (s)
+PROVIDER_TIMEOUT = float(os.environ.get("PROVIDER_TIMEOUT", "3.0"))
+PROVIDER_FAILURES = int(os.environ.get("PROVIDER_FAILURES", "3"))
+PROVIDER_COOLDOWN = float(os.environ.get("PROVIDER_COOLDOWN", "30"))
+
+class CircuitBreaker:
+    """Circuit breaker de um provedor.
+
+    Depois de ``failure_threshold`` falhas seguidas o circuito abre e o
+    provedor deixa de ser chamado por ``reset_timeout`` segundos. Em seguida
+    uma única tentativa é liberada (``half_open``): se ela funcionar o
+    circuito fecha, senão reabre com o cooldown dobrado (até
+    ``max_reset_timeout``).
+    """
+
+    def __init__(self, failure_threshold=PROVIDER_FAILURES, reset_timeout=PROVIDER_COOLDOWN, max_reset_timeout=600,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.opened_at = None
+        self.probing = False
+
+    def due(self):
+        """Indica se o circuito está aberto e o cooldown já terminou."""
+        return self.state == OPEN and self.clock() - self.opened_at >= self.timeout
+
+    def allow(self):
+        """Indica se o provedor pode ser chamado agora (libera a tentativa de teste)."""
+        if self.due():
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.state == OPEN or (self.state == HALF_OPEN and self.probing):
+            return False
+        if self.state == HALF_OPEN:
+            self.probing = True
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.timeout = self.reset_timeout
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probing = False
+        if self.state == HALF_OPEN:
+            self.timeout = min(self.timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def release(self):
+        """Devolve uma tentativa de teste interrompida sem resultado: o circuito volta a aberto, já vencido."""
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+        self.probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = self.clock()
+
+    def retry_in(self):
+        """Segundos até a próxima tentativa de teste (0 se o circuito não estiver aberto)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.timeout - self.clock())
+
+class _ProviderSlot:
+    """Provedor da cadeia com seu circuit breaker e as médias móveis de latência e sucesso."""
+
+    ALPHA = 0.2  # Peso da amostra mais recente nas médias móveis exponenciais
+
+    def __init__(self, provider, breaker):
+        self.provider = provider
+        self.breaker = breaker
+        self.latency = None
+        self.success = 1.0
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def name(self):
+        return getattr(self.provider, "name", type(self.provider).__name__)
+
+    def supported(self, symbols):
+        """Símbolos que o provedor cota (todos, se ele não declarar ``supports``)."""
+        supports = getattr(self.provider, "supports", None)
+        return [symbol for symbol in symbols if supports(symbol)] if supports else list(symbols)
+
+    def record(self, ok, elapsed):
+        self.calls += 1
+        self.errors += not ok
+        self.success += self.ALPHA * ((1.0 if ok else 0.0) - self.success)
+        if ok:
+            self.latency = elapsed if self.latency is None else self.latency + self.ALPHA * (elapsed - self.latency)
+
+    def cost(self):
+        """Custo esperado de uma cotação: latência média dividida pela taxa de sucesso.
+
+        Provedores ainda sem medição têm custo zero, para serem medidos logo.
+        """
+        return (self.latency or 0.0) / max(self.success, 0.05)
+
+    def timeout(self, ceiling, floor):
+        """Prazo da tentativa: quatro vezes a latência média, entre ``floor`` e ``ceiling``."""
+        if self.latency is None:
+            return ceiling
+        return min(ceiling, max(floor, 4 * self.latency))
+
+class ProviderChain:
+    """QuoteProvider que distribui as cotações entre vários provedores com failover.
+
+    A cada busca, os provedores com o circuito fechado são tentados do menor
+    para o maior custo (latência média sobre taxa de sucesso); os símbolos que
+    um provedor não devolve passam para o seguinte. Cada tentativa tem um prazo
+    adaptado à latência do provedor (no máximo ``timeout``), e provedores com o
+    circuito aberto são pulados sem nenhuma chamada, de modo que o failover não
+    espera um prazo inteiro a cada tick. Quando o cooldown de um provedor
+    termina, a tentativa de teste roda em segundo plano se os outros já
+    atenderam a busca.
+    """
+
+    def __init__(self, providers, timeout=PROVIDER_TIMEOUT, min_timeout=0.5, failure_threshold=PROVIDER_FAILURES,
+                 reset_timeout=PROVIDER_COOLDOWN, clock=time.monotonic, name=None):
+        self.slots = [
+            _ProviderSlot(provider, CircuitBreaker(failure_threshold, reset_timeout, clock=clock))
+            for provider in providers
+        ]
+        self.name = name or "+".join(slot.name for slot in self.slots)
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.clock = clock
+        self._probes = set()
+
+    @property
+    def providers(self):
+        return [slot.provider for slot in self.slots]
+
+    def supports(self, symbol):
+        """Indica se algum provedor da cadeia tem cotação para o símbolo."""
+        return any(slot.supported([symbol]) for slot in self.slots)
+
+    def available(self):
+        """Indica se algum provedor pode ser chamado (circuito fechado ou com o cooldown encerrado)."""
+        return any(slot.breaker.state == CLOSED or slot.breaker.due() for slot in self.slots)
+
+    def probing(self):
+        """Indica se alguma tentativa de teste está em andamento."""
+        return any(slot.breaker.state == HALF_OPEN and slot.breaker.probing for slot in self.slots)
+
+    def ranked(self):
+        """Provedores com o circuito fechado, do menor para o maior custo."""
+        return sorted((slot for slot in self.slots if slot.breaker.state == CLOSED), key=lambda slot: slot.cost())
+
+    async def _attempt(self, slot, symbols):
+        """Busca ``symbols`` em um provedor e atualiza seu breaker e suas médias."""
+        started = self.clock()
+        try:
+            quotes = await asyncio.wait_for(
+                slot.provider.fetch_quotes(symbols), slot.timeout(self.timeout, self.min_timeout)
+            )
+            error = None if quotes else "nenhuma cotação"
+        except asyncio.TimeoutError:
+            quotes, error = {}, "prazo esgotado"
+        except asyncio.CancelledError:
+            # Cancelada por quem pediu (ex.: consenso já decidido): não é falha, mas libera o teste
+            slot.breaker.release()
+            raise
+        except Exception as e:
+            quotes, error = {}, repr(e)
+        elapsed = self.clock() - started
+
+        slot.record(error is None, elapsed)
+        if error is None:
+            slot.breaker.record_success()
+        else:
+            was_open = slot.breaker.state
+            slot.breaker.record_failure()
+            logger.warning(f"Provedor {slot.name} falhou em {elapsed * 1000:.0f} ms: {error}")
+            if slot.breaker.state == OPEN and was_open != OPEN:
+                logger.warning(f"Circuito do provedor {slot.name} aberto por {slot.breaker.timeout:.0f}s.")
+        return quotes or {}
+
+    def _probe(self, slot, symbols):
+        """Dispara a tentativa de teste de um provedor sem esperar o resultado."""
+        task = asyncio.ensure_future(self._attempt(slot, symbols))
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+
+    async def fetch_quotes(self, symbols):
+        requested = list(dict.fromkeys(symbols))
+        pending = list(requested)
+        quotes = {}
+
+        for slot in self.ranked():
+            wanted = slot.supported(pending)
+            if wanted and slot.breaker.allow():
+                quotes.update(await self._attempt(slot, wanted))
+                pending = [symbol for symbol in pending if symbol not in quotes]
+
+        # Provedores com o cooldown encerrado: testados em linha só se ainda faltarem símbolos
+        for slot in self.slots:
+            if not slot.breaker.due():
+                continue
+            missing = slot.supported(pending)
+            if missing and slot.breaker.allow():
+                quotes.update(await self._attempt(slot, missing))
+                pending = [symbol for symbol in pending if symbol not in quotes]
+            elif slot.supported(requested) and slot.breaker.allow():
+                self._probe(slot, slot.supported(requested))
+
+        if pending:
+            logger.error(f"Nenhum provedor retornou cotação para: {', '.join(pending)}")
+        return quotes
+
+    def stats(self):
+        """Estado, saúde e latência média (ms) de cada provedor, na ordem configurada."""
+        return [
+            {
+                "name": slot.name,
+                "state": slot.breaker.state,
+                "success": round(slot.success, 3),
+                "latency_ms": round(slot.latency * 1000, 1) if slot.latency is not None else None,
+                "calls": slot.calls,
+                "errors": slot.errors,
+                "retry_in": round(slot.breaker.retry_in(), 1)
+            }
+            for slot in self.slots
+        ]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Idade máxima das cotações servidas pelo cache em segundos (variável de ambiente opcional)
+DEFAULT_MAX_AGE = float(os.environ.get("QUOTE_MAX_AGE", "60"))
+
+class QuoteCache:
+    """Cache em memória das últimas cotações com atualização single-flight.
+
+    ``fetch(pares)`` é uma corrotina que retorna os dados de preço dos pares
+    pedidos (todos, se ``pares`` for None). A idade é controlada por par:
+    enquanto todos tiverem menos de ``max_age`` segundos, ``get`` responde da
+    memória; quando algum expira, apenas os pares expirados são buscados, em
+    uma única atualização que todas as chamadas concorrentes aguardam. Assim
+    um par verificado pelo agendador a cada poucos segundos continua servido
+    da memória mesmo que outro par só seja verificado a cada cinco minutos.
+    """
+
+    def __init__(self, fetch, max_age=DEFAULT_MAX_AGE):
+        self.fetch = fetch
+        self.max_age = max_age
+        self.data = None
+        self.updated = {}
+        self.updated_at = None
+        self.timestamp = None
+        self.fetch_count = 0
+        self._refresh = None
+
+    def publish(self, data):
+        """Atualiza o cache com dados obtidos em outro lugar (ex.: pelo agendador).
+
+        ``data`` pode trazer só parte dos pares; cada par guarda a hora da sua
+        última cotação. Cotações desatualizadas (``stale``) só preenchem pares
+        ainda ausentes do cache e não renovam sua idade.
+        """
+        now = time.monotonic()
+        data = {
+            key: quote for key, quote in data.items()
+            if not quote.get("stale") or key not in (self.data or {})
+        }
+        self.data = {**(self.data or {}), **data}
+        for key, quote in data.items():
+            if not quote.get("stale"):
+                self.updated[key] = now
+        # Idade exibida: a do par atualizado há mais tempo
+        self.updated_at = min(self.updated.values(), default=now)
+        self.timestamp = datetime.now() - timedelta(seconds=now - self.updated_at)
+
+    def age(self):
+        """Idade dos dados em segundos, pelo par mais antigo (None se o cache estiver vazio)."""
+        if self.updated_at is None:
+            return None
+        return time.monotonic() - self.updated_at
+
+    def stale(self, max_age=None):
+        """Pares cuja última cotação tem mais de ``max_age`` segundos."""
+        limit = time.monotonic() - (self.max_age if max_age is None else max_age)
+        return [key for key, updated in self.updated.items() if updated < limit]
+
+    def is_fresh(self, max_age=None):
+        """Indica se todos os pares têm cotação de no máximo ``max_age`` segundos."""
+        return bool(self.updated) and not self.stale(max_age)
+
+    async def _do_refresh(self, keys):
+        try:
+            self.fetch_count += 1
+            self.publish(await self.fetch(keys))
+        finally:
+            self._refresh = None
+
+    async def get(self, max_age=None):
+        """Retorna ``(dados, idade)``, buscando só os pares expirados (ou todos, com o cache vazio)."""
+        if not self.is_fresh(max_age):
+            if self._refresh is None:
+                keys = self.stale(max_age) or None
+                self._refresh = asyncio.ensure_future(self._do_refresh(keys))
+            # shield: o cancelamento de um chamador não cancela a atualização compartilhada
+            await asyncio.shield(self._refresh)
+        return self.data, self.age()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import deque
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+
+# Janelas padrão acompanhadas para cada par
+DEFAULT_WINDOWS = ("5m", "1h", "24h")
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(text):
+    """Converte uma duração como ``"5m"``, ``"1h"`` ou ``"24h"`` em segundos."""
+    try:
+        return int(text[:-1]) * _UNITS[text[-1]]
+    except (KeyError, ValueError, IndexError, TypeError):
+        raise ValueError(f"Duração inválida: {text!r}")
+
+class RollingWindow:
+    """Janela deslizante de preços com primeiro, mínimo e máximo em O(1) amortizado.
+
+    A janela cobre pelo menos ``duration`` segundos: a amostra mais recente
+    anterior ao início da janela é mantida como referência, de modo que uma
+    janela de 5 minutos com amostras a cada 5 minutos compara as duas últimas.
+    O mínimo e o máximo são mantidos em deques monotônicos.
+    """
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.duration_ns = int(duration * NS_PER_SECOND)
+        self.samples = deque()
+        self.mins = deque()
+        self.maxs = deque()
+
+    def add(self, ts_ns, price):
+        """Acrescenta uma amostra (timestamp em ns, em ordem crescente) e descarta as antigas."""
+        self.samples.append((ts_ns, price))
+        while self.mins and self.mins[-1][1] >= price:
+            self.mins.pop()
+        self.mins.append((ts_ns, price))
+        while self.maxs and self.maxs[-1][1] <= price:
+            self.maxs.pop()
+        self.maxs.append((ts_ns, price))
+        self._evict(ts_ns)
+
+    def _evict(self, now_ns):
+        cutoff = now_ns - self.duration_ns
+        samples = self.samples
+        while len(samples) > 1 and samples[1][0] <= cutoff:
+            samples.popleft()
+        start = samples[0][0]
+        while self.mins[0][0] < start:
+            self.mins.popleft()
+        while self.maxs[0][0] < start:
+            self.maxs.popleft()
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def first(self):
+        return self.samples[0][1] if self.samples else None
+
+    @property
+    def last(self):
+        return self.samples[-1][1] if self.samples else None
+
+    @property
+    def min(self):
+        return self.mins[0][1] if self.mins else None
+
+    @property
+    def max(self):
+        return self.maxs[0][1] if self.maxs else None
+
+    def change(self):
+        """Variação percentual do último preço em relação ao primeiro da janela."""
+        if len(self.samples) < 2 or not self.first:
+            return None
+        return (self.last - self.first) / self.first * 100
+
+    def move(self):
+        """Maior movimento percentual do último preço a partir do mínimo ou do máximo da janela.
+
+        Positivo quando a subida desde o mínimo supera a queda desde o máximo.
+        """
+        if len(self.samples) < 2 or not self.min or not self.max:
+            return None
+        rise = (self.last - self.min) / self.min * 100
+        fall = (self.last - self.max) / self.max * 100
+        return rise if rise >= -fall else fall
+
+    def stats(self):
+        """Resumo da janela: primeiro, mínimo, máximo, último, variação e movimento."""
+        return {
+            "first": self.first,
+            "min": self.min,
+            "max": self.max,
+            "last": self.last,
+            "change": self.change(),
+            "move": self.move()
+        }
+
+class WindowTracker:
+    """Conjunto de janelas deslizantes (ex.: 5m, 1h e 24h) de um par."""
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = {name: RollingWindow(parse_duration(name)) for name in windows}
+
+    def add(self, ts_ns, price):
+        """Acrescenta uma amostra a todas as janelas."""
+        for window in self.windows.values():
+            window.add(ts_ns, price)
+
+    def stats(self):
+        """``{janela: estatísticas}`` de todas as janelas."""
+        return {name: window.stats() for name, window in self.windows.items()}
+
+    def __getitem__(self, name):
+        return self.windows[name]
@@ -4,9 +4,16 @@
 import asyncio
 import logging
 import os
-import json
+import time
 from datetime import datetime
+from functools import partial
 from price_monitor import PriceMonitor
+from broadcast import Broadcaster
+from subscribers import SubscriberStore
+from alert_journal import AlertJournal
+from price_targets import ABOVE
+from alert_state import NEW, AlertStateMachine
+from tick_scheduler import TICK_JITTER, TICK_OVERRUN, TickScheduler, format_interval
 
 # Configuração de logging
 logging.basicConfig(
@@ -21,128 +28,273 @@ os.makedirs(DATA_DIR, exist_ok=True)
 ALERTS_FILE = os.path.join(DATA_DIR, "alerts.json")
 
 class PriceScheduler:
-    def __init__(self, bot=None, chat_ids=None):
-        """Inicializa o agendador de verificação de preços."""
-        self.monitor = PriceMonitor()
+    def __init__(self, bot=None, subscribers=None, monitor=None, alerts=None, targets=None):
+        """Inicializa o agendador de verificação de preços.
+        
+        ``subscribers`` é o SubscriberStore com os chats que recebem alertas e
+        ``alerts`` o AlertJournal onde os alertas são registrados (por padrão, o
+        do banco do bot, importando o alerts.json legado). ``targets`` são os
+        PriceTargets com os alvos de preço dos usuários, avaliados a cada tick
+        (None desativa os alvos).
+        """
+        self.monitor = monitor or PriceMonitor()
         self.bot = bot
-        self.chat_ids = chat_ids or []
+        self.broadcaster = Broadcaster(bot) if bot else None
+        self.subscribers = subscribers or SubscriberStore()
+        if alerts is None:
+            alerts = AlertJournal()
+            alerts.import_json(ALERTS_FILE)
+        self.alerts = alerts
+        self.targets = targets
         self.alert_threshold = 2.0  # Limiar de alerta em porcentagem
-        self.check_interval = 5 * 60  # Intervalo de verificação em segundos (5 minutos)
+        self.alert_windows = ["5m", "1h"]  # Janelas deslizantes avaliadas nos alertas
+        self.alert_states = AlertStateMachine()  # Armado/disparado/em cooldown, por par
+        self.check_interval = 5 * 60  # Intervalo de verificação padrão em segundos (5 minutos)
+        self.overrun = TICK_OVERRUN  # Política para verificações que passam do prazo ("skip" ou "catch_up")
+        self.jitter = TICK_JITTER  # Fração máxima do intervalo sorteada como atraso de cada tick
+        self.clock = time.monotonic  # Relógio dos prazos (substituível nos testes, com ``sleep`` e ``rng``)
+        self.sleep = asyncio.sleep
+        self.rng = None
+        self.ticks = None
+        self.deliveries = {}  # Última entrega em andamento de cada fila (par, ou par e "targets")
+        self.targets_seeded = False
         self.last_check_time = None
         self.running = False
         
-        # Inicializa o arquivo de alertas se não existir
-        if not os.path.exists(ALERTS_FILE):
-            with open(ALERTS_FILE, 'w') as f:
-                json.dump([], f)
+    def _save_alert(self, pair, variation, price, timestamp):
+        """Salva um alerta no diário e retorna seu id estável."""
+        return self.alerts.record(pair, variation, price, timestamp)
     
-    def _load_alerts(self):
-        """Carrega o histórico de alertas."""
-        try:
-            with open(ALERTS_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning(f"Erro ao carregar histórico de alertas. Criando novo histórico.")
-            return []
+    def _threshold_for(self, pair):
+        """Limiar de alerta de um par (o do registro ou o global do agendador)."""
+        config = self.monitor.registry.get(pair)
+        if config and config.alert_threshold is not None:
+            return config.alert_threshold
+        return self.alert_threshold
     
-    def _save_alert(self, pair, variation, price, timestamp):
-        """Salva um alerta no histórico."""
-        alerts = self._load_alerts()
+    def _windows_for(self, pair):
+        """Janelas de alerta de um par (as do registro ou as globais do agendador)."""
+        config = self.monitor.registry.get(pair)
+        if config and config.alert_windows:
+            return config.alert_windows
+        return self.alert_windows
+    
+    def interval_for(self, pair):
+        """Intervalo de verificação de um par em segundos (o do registro ou o global do agendador)."""
+        config = self.monitor.registry.get(pair)
+        if config and config.check_interval:
+            return config.check_interval
+        return self.check_interval
+    
+    def describe_intervals(self):
+        """Intervalos de verificação por par, ex.: ``BTC/USD a cada 15s, USD/BRL a cada 5 min``."""
+        return ", ".join(f"{pair.name} a cada {format_interval(self.interval_for(pair.name))}" for pair in self.monitor.registry)
+    
+    def _detect_variation(self, pair, quote, now=None):
+        """Retorna ``(ação, janela, variação)`` do maior movimento do par, ou None.
         
-        alerts.append({
-            "pair": pair,
-            "variation": variation,
-            "price": price,
-            "timestamp": timestamp,
-            "news": []  # Será preenchido posteriormente pela função de busca de notícias
-        })
+        Em cada janela, o movimento é medido do mínimo ou do máximo da janela
+        até o preço atual, de modo que uma alta lenta ao longo de uma hora
+        também dispara o alerta. A máquina de estados decide se o movimento
+        gera um alerta novo (``NEW``), atualiza o alerta já enviado
+        (``UPDATE``) ou não gera nada.
+        """
+        windows = quote.get("windows", {})
+        moves = {}
+        for name in self._windows_for(pair):
+            move = windows.get(name, {}).get("move")
+            if move is not None:
+                moves[name] = move
+        window = max(moves, key=lambda name: abs(moves[name])) if moves else None
+        move = moves.get(window)
         
-        # Limita o histórico a 1000 alertas
-        if len(alerts) > 1000:
-            alerts = alerts[-1000:]
+        action = self.alert_states.evaluate(pair, move, self._threshold_for(pair), now)
+        if action is None:
+            return None
+        return action, window, move
+    
+    def _format_alert_message(self, pair, quote, footer="Buscando notícias relacionadas...", updated=False):
+        """Formata a mensagem de alerta de variação de um par, seguida de ``footer``."""
+        config = self.monitor.registry.get(pair)
+        direction = "aumento" if quote["variation"] > 0 else "queda"
+        emoji = "🔺" if quote["variation"] > 0 else "🔻"
+        # Fontes que formaram o preço de consenso
+        sources = f"Fontes: {', '.join(quote['sources'])}\n" if quote.get("sources") else ""
         
-        with open(ALERTS_FILE, 'w') as f:
-            json.dump(alerts, f, indent=2)
+        return (
+            f"{emoji} ALERTA DE VARIAÇÃO{' (ATUALIZADO)' if updated else ''} {emoji}\n\n"
+            f"Par: {pair}\n"
+            f"Variação: {quote['variation']:.2f}%"
+            f"{' em ' + quote['window'] if quote.get('window') else ''}\n"
+            f"Preço atual: {config.format_price(quote['price'])}\n"
+            f"{sources}"
+            f"Direção: {direction}\n"
+            f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
+            f"{footer}"
+        )
+    
+    async def handle_alert(self, pair, quote):
+        """Registra o alerta de um par e o envia para todos os chats registrados."""
+        logger.info(f"Alerta! Variação de {quote['variation']:.2f}% em {pair}")
+        state = self.alert_states.get(pair)
+        
+        # Salva o alerta (fora do event loop)
+        alert_id = await asyncio.to_thread(
+            self._save_alert,
+            pair,
+            quote["variation"],
+            quote["price"],
+            quote["timestamp"]
+        )
+        state.alert_id = alert_id
+        
+        # Envia o alerta para todos os chats registrados
+        message = self._format_alert_message(pair, quote)
+        report = None
+        if self.broadcaster:
+            report = await self.broadcaster.broadcast(self.subscribers.aiter_active(), message)
+            await self._drop_blocked(report)
+            state.messages = report.results
         
-        return len(alerts) - 1  # Retorna o índice do alerta adicionado
+        state.footer = await self._follow_up(pair, quote, report, alert_id)
+        
+        return alert_id
     
-    async def check_prices(self):
-        """Verifica os preços e envia alertas se necessário."""
-        logger.info("Verificando preços...")
-        self.last_check_time = datetime.now()
+    async def _follow_up(self, pair, quote, report, alert_id):
+        """Complementa o alerta ``alert_id`` já enviado; ``report.results`` traz as mensagens por chat.
         
-        # Obtém os dados de preço atuais
-        data = self.monitor.get_price_data()
+        Retorna o rodapé a manter nas atualizações do alerta (None = sem rodapé).
+        """
+    
+    async def update_alert(self, pair, quote):
+        """Atualiza o alerta já enviado do par com o novo movimento, sem nova transmissão nem busca de notícias."""
+        state = self.alert_states.get(pair)
+        logger.info(f"Alerta {state.alert_id} de {pair} atualizado: variação de {quote['variation']:.2f}%")
         
-        alerts_sent = False
+        if state.alert_id is not None:
+            await asyncio.to_thread(self.alerts.update, state.alert_id, quote["variation"], quote["price"])
         
-        # Verifica BTC/USD
-        btc_usd = data["BTC/USD"]
-        if btc_usd["variation"] is not None and abs(btc_usd["variation"]) >= self.alert_threshold:
-            logger.info(f"Alerta! Variação de {btc_usd['variation']:.2f}% em BTC/USD")
-            
-            # Salva o alerta
-            alert_index = self._save_alert(
-                "BTC/USD", 
-                btc_usd["variation"], 
-                btc_usd["price"], 
-                btc_usd["timestamp"]
+        # Edita as mensagens já enviadas, mantendo as notícias encontradas
+        if self.broadcaster and state.messages:
+            text = self._format_alert_message(pair, quote, footer=state.footer or "", updated=True)
+            messages = state.messages
+            report = await self.broadcaster.fan_out(
+                list(messages),
+                lambda chat_id: self.bot.edit_message_text(text=text, chat_id=chat_id, message_id=messages[chat_id].message_id)
             )
-            
-            # Formata a mensagem de alerta
-            direction = "aumento" if btc_usd["variation"] > 0 else "queda"
-            emoji = "🔺" if btc_usd["variation"] > 0 else "🔻"
-            
-            message = (
-                f"{emoji} ALERTA DE VARIAÇÃO {emoji}\n\n"
-                f"Par: BTC/USD\n"
-                f"Variação: {btc_usd['variation']:.2f}%\n"
-                f"Preço atual: ${btc_usd['price']:,.2f}\n"
-                f"Direção: {direction}\n"
-                f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
-                f"Buscando notícias relacionadas..."
-            )
-            
-            # Envia o alerta para todos os chats registrados
-            if self.bot and self.chat_ids:
-                for chat_id in self.chat_ids:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-            
-            alerts_sent = True
+            await self._drop_blocked(report)
         
-        # Verifica USD/BRL
-        usd_brl = data["USD/BRL"]
-        if usd_brl["variation"] is not None and abs(usd_brl["variation"]) >= self.alert_threshold:
-            logger.info(f"Alerta! Variação de {usd_brl['variation']:.2f}% em USD/BRL")
-            
-            # Salva o alerta
-            alert_index = self._save_alert(
-                "USD/BRL", 
-                usd_brl["variation"], 
-                usd_brl["price"], 
-                usd_brl["timestamp"]
-            )
-            
-            # Formata a mensagem de alerta
-            direction = "aumento" if usd_brl["variation"] > 0 else "queda"
-            emoji = "🔺" if usd_brl["variation"] > 0 else "🔻"
-            
-            message = (
-                f"{emoji} ALERTA DE VARIAÇÃO {emoji}\n\n"
-                f"Par: USD/BRL\n"
-                f"Variação: {usd_brl['variation']:.2f}%\n"
-                f"Preço atual: R${usd_brl['price']:,.2f}\n"
-                f"Direção: {direction}\n"
-                f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n"
-                f"Buscando notícias relacionadas..."
+        return state.alert_id
+    
+    def _format_target_message(self, rule, quote):
+        """Formata o aviso de um alvo de preço atingido."""
+        config = self.monitor.registry.get(rule["pair"])
+        side = "acima de" if rule["direction"] == ABOVE else "abaixo de"
+        return (
+            f"🎯 ALVO DE PREÇO ATINGIDO\n\n"
+            f"Par: {rule['pair']}\n"
+            f"Alvo: {side} {config.format_price(rule['target'])}\n"
+            f"Preço atual: {config.format_price(quote['price'])}\n"
+            f"Horário: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+        )
+    
+    async def _check_targets(self, pair, quote):
+        """Registra o tick do par nos alvos de preço e retorna os alvos atingidos."""
+        return await asyncio.to_thread(self.targets.check, pair, quote["price"], quote.get("timestamp"))
+    
+    async def _seed_targets(self):
+        """Usa o último preço do histórico como tick anterior dos alvos, antes da primeira busca."""
+        last_price = getattr(self.monitor, "last_price", None)
+        if last_price is not None:
+            for pair in self.monitor.registry.names():
+                last = await asyncio.to_thread(last_price, pair)
+                if last is not None:
+                    self.targets.seed(pair, last[0])
+        self.targets_seeded = True
+    
+    async def send_targets(self, pair, quote, triggered):
+        """Avisa cada chat dos alvos de preço atingidos no tick."""
+        if not triggered:
+            return
+        logger.info(f"{len(triggered)} alvo(s) de preço atingido(s) em {pair}")
+        
+        # Um chat com vários alvos atingidos no mesmo tick recebe uma única mensagem
+        messages = {}
+        for rule in triggered:
+            messages.setdefault(rule["chat_id"], []).append(self._format_target_message(rule, quote))
+        if self.broadcaster:
+            report = await self.broadcaster.fan_out(
+                list(messages), lambda chat_id: self.bot.send_message(chat_id=chat_id, text="\n\n".join(messages[chat_id]))
             )
-            
-            # Envia o alerta para todos os chats registrados
-            if self.bot and self.chat_ids:
-                for chat_id in self.chat_ids:
-                    await self.bot.send_message(chat_id=chat_id, text=message)
-            
-            alerts_sent = True
+            await self._drop_blocked(report)
+    
+    def _deliver(self, key, send):
+        """Executa ``send()`` em segundo plano, depois das entregas anteriores da mesma fila ``key``.
+        
+        Assim a transmissão, as notícias e as edições de um alerta não seguram
+        o tick, e a atualização de um alerta nunca passa à frente do envio.
+        Os alertas de variação usam o nome do par como fila e os alvos de preço
+        a fila ``(par, "targets")``, para não esperar as notícias do alerta.
+        """
+        previous = self.deliveries.get(key)
+        
+        async def run():
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            try:
+                await send()
+            except Exception as e:
+                logger.error(f"Erro na entrega de alertas de {key}: {e}")
+        
+        def forget(task):
+            if self.deliveries.get(key) is task:
+                del self.deliveries[key]
+        
+        task = asyncio.ensure_future(run())
+        self.deliveries[key] = task
+        task.add_done_callback(forget)
+        return task
+    
+    async def wait_deliveries(self):
+        """Aguarda as entregas de alertas em andamento."""
+        while self.deliveries:
+            await asyncio.gather(*self.deliveries.values(), return_exceptions=True)
+    
+    async def check_prices(self, pairs=None):
+        """Verifica os preços dos ``pairs`` (por padrão, todos) e dispara os alertas necessários.
+        
+        Os preços são registrados e os estados dos alertas e dos alvos são
+        decididos dentro do tick; as entregas rodam em segundo plano, em ordem
+        por par (``wait_deliveries`` aguarda o fim delas).
+        """
+        logger.info(f"Verificando preços{': ' + ', '.join(pairs) if pairs else ''}...")
+        self.last_check_time = datetime.now()
+        
+        if self.targets is not None and not self.targets_seeded:
+            await self._seed_targets()
+        
+        # Obtém os dados de preço atuais dos pares em uma única passada
+        data = await self.monitor.fetch_price_data(pairs)
+        
+        alerts_sent = False
+        for pair, quote in data.items():
+            # Um preço repetido por falta de cotação não gera alertas nem dispara alvos
+            if quote.get("stale"):
+                logger.warning(f"Sem cotação nova para {pair}; alertas suspensos neste tick.")
+                continue
+            detected = self._detect_variation(pair, quote)
+            if detected:
+                action, window, variation = detected
+                alert_quote = dict(quote, variation=variation, window=window)
+                if action == NEW:
+                    self._deliver(pair, partial(self.handle_alert, pair, alert_quote))
+                else:
+                    self._deliver(pair, partial(self.update_alert, pair, alert_quote))
+                alerts_sent = True
+            if self.targets is not None:
+                triggered = await self._check_targets(pair, quote)
+                if triggered:
+                    self._deliver((pair, "targets"), partial(self.send_targets, pair, quote, triggered))
         
         if not alerts_sent:
             logger.info("Nenhuma variação significativa detectada.")
@@ -150,35 +302,61 @@ class PriceScheduler:
         return data
     
     async def start_monitoring(self):
-        """Inicia o monitoramento periódico."""
+        """Inicia o monitoramento periódico, com o intervalo de cada par.
+        
+        Os prazos seguem o relógio monotônico (``TickScheduler``): o período
+        não deriva com a duração das verificações, e os pares que vencem juntos
+        são buscados em uma única passada.
+        """
         self.running = True
-        logger.info(f"Iniciando monitoramento a cada {self.check_interval} segundos...")
+        self.ticks = TickScheduler(overrun=self.overrun, jitter=self.jitter, clock=self.clock, rng=self.rng)
+        for pair in self.monitor.registry:
+            self.ticks.add(pair.name, self.interval_for(pair.name))
+        if self.ticks.next_deadline() is None:
+            logger.warning("Nenhum par no registro; monitoramento não iniciado.")
+            self.running = False
+            return
+        logger.info(f"Iniciando monitoramento: {self.describe_intervals()}...")
         
         while self.running:
+            # Aguarda o próximo prazo
+            delay = self.ticks.next_deadline() - self.clock()
+            if delay > 0:
+                await self.sleep(delay)
+                continue
+            
+            pairs = self.ticks.due()
             try:
-                await self.check_prices()
+                await self.check_prices(pairs)
             except Exception as e:
                 logger.error(f"Erro durante a verificação de preços: {e}")
-            
-            # Aguarda o próximo intervalo
-            await asyncio.sleep(self.check_interval)
+            finally:
+                self.ticks.complete(pairs)
+        
+        await self.wait_deliveries()
     
     def stop_monitoring(self):
         """Para o monitoramento periódico."""
         self.running = False
         logger.info("Monitoramento interrompido.")
     
+    async def _drop_blocked(self, report):
+        """Pausa os alertas dos chats que bloquearam o bot durante uma transmissão."""
+        if report.blocked:
+            await asyncio.to_thread(self.subscribers.deactivate_many, report.blocked)
+            logger.info(f"{len(report.blocked)} chat(s) que bloquearam o bot removidos da lista de alertas.")
+    
     def add_chat_id(self, chat_id):
         """Adiciona um chat ID à lista de destinatários de alertas."""
-        if chat_id not in self.chat_ids:
-            self.chat_ids.append(chat_id)
+        if not self.subscribers.add(chat_id):
+            logger.info(f"Chat ID {chat_id} reativado na lista de alertas.")
+        else:
             logger.info(f"Chat ID {chat_id} adicionado à lista de alertas.")
     
     def remove_chat_id(self, chat_id):
-        """Remove um chat ID da lista de destinatários de alertas."""
-        if chat_id in self.chat_ids:
-            self.chat_ids.remove(chat_id)
-            logger.info(f"Chat ID {chat_id} removido da lista de alertas.")
+        """Remove um chat ID da lista de destinatários de alertas (persistido)."""
+        self.subscribers.set_active(chat_id, False)
+        logger.info(f"Chat ID {chat_id} removido da lista de alertas.")
 
 # Função para teste
 if __name__ == "__main__":
@@ -186,5 +364,6 @@ if __name__ == "__main__":
     
     async def test():
         await scheduler.check_prices()
+        await scheduler.wait_deliveries()
     
     asyncio.run(test())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+from contextlib import contextmanager
+
+# Instante de referência: a importação deste módulo (o primeiro do bot.py)
+START = time.perf_counter()
+
+# Tempos medidos: (nome, tempo total, tempo próprio) por módulo e por etapa
+imports = {}
+phases = []
+_stack = []
+_enabled = False
+
+class _TimedLoader:
+    """Envolve o loader de um módulo para medir o tempo de execução da importação."""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        _stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += elapsed
+            imports[self._name] = (elapsed, elapsed - children)
+
+class _TimingFinder:
+    """Finder que só repassa a busca aos demais e envolve o loader encontrado."""
+
+    @classmethod
+    def find_spec(cls, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is cls or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, name)
+                return spec
+        return None
+
+def install():
+    """Passa a medir o tempo de importação de cada módulo importado daqui em diante."""
+    global _enabled
+    if not _enabled:
+        sys.meta_path.insert(0, _TimingFinder)
+        _enabled = True
+
+def enabled():
+    return _enabled
+
+@contextmanager
+def phase(name):
+    """Mede uma etapa da inicialização (só registra quando o perfil está ativo)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _enabled:
+            phases.append((name, time.perf_counter() - start))
+
+def elapsed():
+    """Segundos desde o início do bot."""
+    return time.perf_counter() - START
+
+def report(title="Perfil de inicialização", top=15):
+    """Monta o relatório com as importações mais lentas e as etapas da inicialização."""
+    lines = [f"⏱️ {title}: {elapsed() * 1000:.0f} ms desde o início", "", "Importações (total / próprio):"]
+    slowest = sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for name, (total, own) in slowest:
+        lines.append(f"  {total * 1000:8.1f} ms / {own * 1000:7.1f} ms  {name}")
+    lines.append("")
+    lines.append("Etapas:")
+    for name, duration in phases:
+        lines.append(f"  {duration * 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+from database import DB_FILE, SqliteStore
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+class SubscriberStore(SqliteStore):
+    """Assinantes dos alertas indexados por chat_id, com estado ativo/pausado persistido."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS subscribers (
+            chat_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            registered_at TEXT NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS idx_subscribers_active ON subscribers (active, chat_id);
+    """
+
+    def __init__(self, db_file=DB_FILE, batch_size=1000):
+        super().__init__(db_file)
+        self.batch_size = batch_size
+
+    def add(self, chat_id, username=None, first_name=None):
+        """Registra (ou reativa) um assinante. Retorna True se for novo."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO subscribers (chat_id, username, first_name, registered_at) "
+                "VALUES (?, ?, ?, ?)",
+                (chat_id, username, first_name, datetime.now().isoformat())
+            )
+            is_new = cursor.rowcount == 1
+            if not is_new:
+                conn.execute("UPDATE subscribers SET active = 1 WHERE chat_id = ?", (chat_id,))
+        return is_new
+
+    def set_active(self, chat_id, active):
+        """Ativa ou pausa os alertas de um assinante já registrado."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE subscribers SET active = ? WHERE chat_id = ?",
+                (1 if active else 0, chat_id)
+            )
+
+    def deactivate_many(self, chat_ids):
+        """Pausa vários assinantes (ex.: chats que bloquearam o bot)."""
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE subscribers SET active = 0 WHERE chat_id = ?",
+                [(chat_id,) for chat_id in chat_ids]
+            )
+
+    def is_active(self, chat_id):
+        """Indica se o assinante está registrado e com alertas ativos."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT active FROM subscribers WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def get(self, chat_id):
+        """Retorna os dados de um assinante ou None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT chat_id, username, first_name, registered_at, active FROM subscribers WHERE chat_id = ?",
+                (chat_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "chat_id": row[0],
+            "username": row[1],
+            "first_name": row[2],
+            "registered_at": row[3],
+            "active": bool(row[4])
+        }
+
+    def count_active(self):
+        """Quantidade de assinantes com alertas ativos."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM subscribers WHERE active = 1").fetchone()[0]
+
+    def _active_batch(self, after):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chat_id FROM subscribers WHERE active = 1 AND chat_id > ? ORDER BY chat_id LIMIT ?",
+                (after, self.batch_size)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_active(self):
+        """Itera os chat_ids ativos em lotes (paginação por chave), sem carregar todos."""
+        after = float("-inf")
+        while True:
+            batch = self._active_batch(after)
+            yield from batch
+            if len(batch) < self.batch_size:
+                return
+            after = batch[-1]
+
+    async def aiter_active(self):
+        """Versão assíncrona de iter_active; cada lote é lido fora do event loop."""
+        after = float("-inf")
+        while True:
+            batch = await asyncio.to_thread(self._active_batch, after)
+            for chat_id in batch:
+                yield chat_id
+            if len(batch) < self.batch_size:
+                return
+            after = batch[-1]
+
+    def import_json(self, users_file):
+        """Importa (uma única vez) o users.json legado e o renomeia para ``*.imported``."""
+        if not os.path.exists(users_file):
+            return 0
+        try:
+            with open(users_file, 'r') as f:
+                users = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Arquivo de usuários inválido em {users_file}. Ignorando importação.")
+            users = []
+
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO subscribers (chat_id, username, first_name, registered_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (user["chat_id"], user.get("username"), user.get("first_name"),
+                     user.get("registered_at") or datetime.now().isoformat())
+                    for user in users if "chat_id" in user
+                ]
+            )
+        os.replace(users_file, users_file + ".imported")
+        logger.info(f"{len(users)} usuários importados de {users_file}.")
+        return len(users)
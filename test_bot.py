@@ -5,7 +5,8 @@ import logging
 import os
 import json
 import time
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 
 # Configuração de logging
 logging.basicConfig(
@@ -20,23 +21,138 @@ logger = logging.getLogger(__name__)
 LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+def _start_stub_server(handler):
+    """Inicia um servidor HTTP local em uma thread; ``handler(path)`` retorna (status, corpo)."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_GET(self):
+            status, body = handler(self.path)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _temp_monitor(tmp_dir, ohlc_file="radar.db", **kwargs):
+    """PriceMonitor com histórico e barras OHLC em ``tmp_dir``; ``kwargs`` vão para o PriceMonitor."""
+    from history_store import SegmentHistoryStore
+    from ohlc import OhlcStore
+    from price_monitor import PriceMonitor
+    
+    return PriceMonitor(
+        history_backend=lambda name: SegmentHistoryStore(os.path.join(tmp_dir, name)),
+        ohlc=OhlcStore(os.path.join(tmp_dir, ohlc_file)),
+        **kwargs
+    )
+
+def _seed_history(tmp_dir, prices, at):
+    """Grava em ``tmp_dir`` um preço real por histórico (``{chave: preço}``) no horário ``at``."""
+    from history_store import SegmentHistoryStore, to_epoch_ns
+    
+    for key, price in prices.items():
+        SegmentHistoryStore(os.path.join(tmp_dir, key)).append(to_epoch_ns(at), price)
+
+class StubProvider:
+    """QuoteProvider local que responde, falha (``mode="error"``) ou trava (``mode="hang"``) de propósito."""
+    
+    def __init__(self, name="stub", prices=None, delay=0.0, mode="ok"):
+        self.name = name
+        self.prices = prices or {"BTC-USD": 64000.0, "USDBRL=X": 5.43}
+        self.delay = delay
+        self.mode = mode
+        self.requests = []
+        self.finished = 0
+    
+    async def fetch_quotes(self, symbols):
+        self.requests.append(list(symbols))
+        if self.mode == "hang":
+            await asyncio.sleep(30)
+        await asyncio.sleep(self.delay)
+        if self.mode == "error":
+            raise ConnectionError(f"{self.name} fora do ar")
+        self.finished += 1
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+class StubSource(StubProvider):
+    """StubProvider que só declara suporte aos símbolos que cota (fonte do consenso)."""
+    
+    def supports(self, symbol):
+        return symbol in self.prices
+
+class FakeMessage:
+    def __init__(self, chat_id, message_id):
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+class FakeBot:
+    """Bot do Telegram falso: registra envios e edições, com atraso, chats bloqueados e 429 opcionais."""
+    
+    def __init__(self, delay=0.0, blocked=(), rate_limited=()):
+        self.delay = delay
+        self.blocked = set(blocked)
+        self.rate_limited = set(rate_limited)  # Chats cujo primeiro envio recebe um RetryAfter
+        self.sent = []   # (chat_id, texto)
+        self.edits = []  # (chat_id, message_id, texto, horário monotônico)
+        self.log = []
+    
+    async def send_message(self, chat_id, text, **kwargs):
+        from telegram.error import Forbidden, RetryAfter
+        
+        await asyncio.sleep(self.delay)
+        if chat_id in self.blocked:
+            raise Forbidden("bot was blocked by the user")
+        if chat_id in self.rate_limited:
+            self.rate_limited.discard(chat_id)
+            raise RetryAfter(timedelta(seconds=0.2))
+        self.sent.append((chat_id, text))
+        self.log.append("send")
+        return FakeMessage(chat_id, 100 + chat_id)
+    
+    async def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        await asyncio.sleep(self.delay)
+        self.edits.append((chat_id, message_id, text, time.monotonic()))
+        self.log.append("edit")
+
 def test_price_monitor():
-    """Testa o monitor de preços."""
+    """Testa o monitor de preços: sem resposta da API, serve o último preço real sem inventar valores."""
     logger.info("Testando o monitor de preços...")
     
     try:
-        from price_monitor import PriceMonitor
-        monitor = PriceMonitor()
+        import tempfile
         
-        # Testa a obtenção de preços
-        btc_usd_price, btc_usd_timestamp = monitor.get_btc_usd_price()
-        usd_brl_price, usd_brl_timestamp = monitor.get_usd_brl_price()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Histórico com um preço real por par, gravado há uma hora
+            seeded = {"btc_usd": 64000.0, "usd_brl": 5.43}
+            _seed_history(tmp_dir, seeded, datetime.now() - timedelta(hours=1))
+            monitor = _temp_monitor(tmp_dir)
+            
+            # Testa a obtenção de preços (com rede, o preço novo é gravado; sem rede, o último é repetido)
+            btc_usd_price, btc_usd_timestamp = monitor.get_price("BTC/USD")
+            usd_brl_price, usd_brl_timestamp = monitor.get_price("USD/BRL")
+            
+            no_fabrication = all(
+                len(monitor.histories[pair]) == 2 or (len(monitor.histories[pair]) == 1 and price == seeded[key])
+                for pair, key, price in (("BTC/USD", "btc_usd", btc_usd_price), ("USD/BRL", "usd_brl", usd_brl_price))
+            )
         
-        if btc_usd_price and usd_brl_price:
+        if btc_usd_price and usd_brl_price and no_fabrication:
             logger.info(f"BTC/USD: ${btc_usd_price:,.2f} | USD/BRL: R${usd_brl_price:,.2f}")
             print(f"✅ Monitor de preços: OK")
-            print(f"   BTC/USD: ${btc_usd_price:,.2f}")
-            print(f"   USD/BRL: R${usd_brl_price:,.2f}")
+            print(f"   BTC/USD: ${btc_usd_price:,.2f} ({btc_usd_timestamp})")
+            print(f"   USD/BRL: R${usd_brl_price:,.2f} ({usd_brl_timestamp})")
             return True
         else:
             logger.error("Falha ao obter preços")
@@ -48,6 +164,479 @@ def test_price_monitor():
         print(f"❌ Monitor de preços: ERRO - {e}")
         return False
 
+def _spark_response(path, prices, skip=()):
+    """Monta uma resposta do endpoint spark para os símbolos pedidos em ``path``."""
+    from urllib.parse import urlparse, parse_qs
+    symbols = parse_qs(urlparse(path).query)["symbols"][0].split(",")
+    return symbols, {"spark": {"result": [
+        {"symbol": symbol, "response": [{"meta": {"regularMarketPrice": prices.get(symbol, 1.0)}}]}
+        for symbol in symbols if symbol not in skip
+    ]}}
+
+def test_async_fetcher():
+    """Testa a busca concorrente de preços contra um servidor HTTP local."""
+    logger.info("Testando a busca assíncrona de preços...")
+    
+    try:
+        import asyncio
+        import tempfile
+        from async_fetcher import AsyncFetcher
+        from price_monitor import YahooSparkProvider
+        
+        prices = {"BTC-USD": 64321.5, "USDBRL=X": 5.43}
+        
+        def handler(path):
+            time.sleep(0.3)
+            if "SLOW" in path:
+                time.sleep(2)
+            if path.startswith("/v7/finance/spark"):
+                return 200, _spark_response(path, prices)[1]
+            return 200, {"chart": {"result": [{"meta": {"regularMarketPrice": 1.0}}]}}
+        
+        server = _start_stub_server(handler)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            async def run():
+                fetcher = AsyncFetcher(timeout=1.0)
+                monitor = _temp_monitor(
+                    tmp_dir, fetcher=fetcher, provider=YahooSparkProvider(fetcher, spark_url=f"{base_url}/v7/finance/spark")
+                )
+                data = await monitor.fetch_price_data()
+                start = time.monotonic()
+                charts = await fetcher.gather_json({
+                    symbol: (f"{base_url}/v8/finance/chart/{symbol}", None)
+                    for symbol in ["A", "B", "C", "SLOW"]
+                }, timeout=0.5)
+                elapsed = time.monotonic() - start
+                await fetcher.aclose()
+                return data, charts, elapsed
+            
+            data, charts, elapsed = asyncio.run(run())
+        server.shutdown()
+        
+        prices_ok = data["BTC/USD"]["price"] == 64321.5 and data["USD/BRL"]["price"] == 5.43
+        # As requisições rodam em paralelo: ~1 round-trip, não a soma
+        concurrent_ok = elapsed < 0.8 and all(not isinstance(charts[s], Exception) for s in "ABC")
+        deadline_ok = isinstance(charts["SLOW"], asyncio.TimeoutError)
+        
+        if prices_ok and concurrent_ok and deadline_ok:
+            logger.info(f"Busca assíncrona em {elapsed:.2f}s")
+            print(f"✅ Busca assíncrona de preços: OK")
+            print(f"   Quatro requisições em {elapsed:.2f}s")
+            return True
+        else:
+            logger.error("Falha na busca assíncrona de preços")
+            print("❌ Busca assíncrona de preços: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar busca assíncrona de preços: {e}")
+        print(f"❌ Busca assíncrona de preços: ERRO - {e}")
+        return False
+
+def test_quote_batching():
+    """Testa o agrupamento de símbolos em lotes e a repetição apenas dos que falharam."""
+    logger.info("Testando cotações em lote...")
+    
+    try:
+        import asyncio
+        from async_fetcher import AsyncFetcher
+        from price_monitor import YahooSparkProvider
+        
+        requested = []
+        flaky_failures = [1]
+        
+        def handler(path):
+            skip = set()
+            if flaky_failures and "FLAKY" in path:
+                flaky_failures.pop()
+                skip.add("FLAKY")
+            symbols, body = _spark_response(path, {}, skip)
+            requested.append(symbols)
+            return 200, body
+        
+        server = _start_stub_server(handler)
+        symbols = [f"SYM{i}" for i in range(44)] + ["FLAKY"]
+        
+        async def run():
+            fetcher = AsyncFetcher(timeout=2.0)
+            provider = YahooSparkProvider(
+                fetcher,
+                spark_url=f"http://127.0.0.1:{server.server_address[1]}/v7/finance/spark",
+                batch_size=20
+            )
+            quotes = await provider.fetch_quotes(symbols)
+            await fetcher.aclose()
+            return provider, quotes
+        
+        provider, quotes = asyncio.run(run())
+        server.shutdown()
+        
+        # 45 símbolos em 3 lotes + 1 nova tentativa só com o símbolo que falhou
+        batching_ok = provider.request_count == 4 and sorted(len(r) for r in requested) == [1, 5, 20, 20]
+        retry_ok = ["FLAKY"] in requested and set(quotes) == set(symbols)
+        
+        if batching_ok and retry_ok:
+            logger.info(f"{len(symbols)} cotações em {provider.request_count} requisições")
+            print(f"✅ Cotações em lote: OK")
+            print(f"   {len(symbols)} símbolos em {provider.request_count} requisições")
+            return True
+        else:
+            logger.error("Falha nas cotações em lote")
+            print("❌ Cotações em lote: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar cotações em lote: {e}")
+        print(f"❌ Cotações em lote: ERRO - {e}")
+        return False
+
+def test_pair_registry():
+    """Testa o registro de pares com centenas de pares em uma única passada."""
+    logger.info("Testando o registro de pares...")
+    
+    try:
+        import asyncio
+        import tempfile
+        from pairs import PairConfig, PairRegistry
+        from scheduler import PriceScheduler
+        
+        registry = PairRegistry([
+            PairConfig(f"P{i}/USD", f"P{i}-USD", "$", {"pt": f"P{i}", "en": f"P{i}"},
+                       alert_threshold=0.5 if i == 0 else None)
+            for i in range(250)
+        ])
+        
+        provider = StubProvider(prices={f"P{i}-USD": 100.0 + i for i in range(250)})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            monitor = _temp_monitor(tmp_dir, registry=registry, provider=provider)
+            data = asyncio.run(monitor.fetch_price_data())
+            scheduler = PriceScheduler(monitor=monitor)
+            message = monitor.registry.get("P7/USD").format_price(data["P7/USD"]["price"])
+        
+        registry_ok = len(data) == 250 and len(provider.requests) == 1 and message == "$107.00"
+        threshold_ok = scheduler._threshold_for("P0/USD") == 0.5 and scheduler._threshold_for("P1/USD") == 2.0
+        
+        if registry_ok and threshold_ok:
+            logger.info(f"{len(data)} pares em {len(provider.requests)} chamada ao provedor")
+            print(f"✅ Registro de pares: OK")
+            print(f"   {len(data)} pares verificados em uma única passada")
+            return True
+        else:
+            logger.error("Falha no registro de pares")
+            print("❌ Registro de pares: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar registro de pares: {e}")
+        print(f"❌ Registro de pares: ERRO - {e}")
+        return False
+
+def test_loop_watchdog():
+    """Testa a detecção de travamentos do event loop."""
+    logger.info("Testando o watchdog do event loop...")
+    
+    try:
+        import asyncio
+        from loop_watchdog import LoopWatchdog
+        
+        async def run():
+            watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+            watchdog.start()
+            await asyncio.sleep(0.05)
+            
+            # Trabalho bloqueante executado em uma thread não trava o loop
+            await asyncio.to_thread(time.sleep, 0.3)
+            stalls_offloaded = watchdog.stall_count
+            
+            # Trabalho bloqueante no próprio loop é detectado
+            time.sleep(0.3)
+            await asyncio.sleep(0.05)
+            watchdog.stop()
+            return stalls_offloaded, watchdog.stall_count
+        
+        stalls_offloaded, stalls_blocking = asyncio.run(run())
+        
+        if stalls_offloaded == 0 and stalls_blocking == 1:
+            logger.info("Watchdog do event loop funcionando corretamente")
+            print(f"✅ Watchdog do event loop: OK")
+            return True
+        else:
+            logger.error("Falha no watchdog do event loop")
+            print("❌ Watchdog do event loop: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar watchdog do event loop: {e}")
+        print(f"❌ Watchdog do event loop: ERRO - {e}")
+        return False
+
+def test_quote_cache():
+    """Testa o cache de cotações com atualização single-flight."""
+    logger.info("Testando o cache de cotações...")
+    
+    try:
+        import asyncio
+        from quote_cache import QuoteCache
+        
+        async def slow_fetch(pairs=None):
+            await asyncio.sleep(0.1)
+            return {"BTC/USD": {"price": 65000.0, "timestamp": None, "variation": 0.0}}
+        
+        requested = []
+        
+        async def fetch_pairs(pairs=None):
+            requested.append(pairs)
+            return {pair: {"price": 1.0, "timestamp": None, "variation": 0.0} for pair in pairs or ("BTC/USD", "USD/BRL")}
+        
+        async def run():
+            cache = QuoteCache(slow_fetch, max_age=0.3)
+            
+            # 500 pedidos simultâneos de /preco com o cache vazio
+            results = await asyncio.gather(*(cache.get() for _ in range(500)))
+            burst_fetches = cache.fetch_count
+            
+            # Dentro do prazo, os dados vêm da memória
+            await cache.get()
+            fresh_fetches = cache.fetch_count
+            
+            # Dados publicados pelo agendador também são servidos sem nova busca
+            await asyncio.sleep(0.35)
+            cache.publish({"BTC/USD": {"price": 66000.0, "timestamp": None, "variation": 1.5}})
+            published, _ = await cache.get()
+            
+            # Depois de expirar, uma nova busca é feita
+            await asyncio.sleep(0.35)
+            await cache.get()
+            
+            # O agendador renova o BTC/USD a cada tick e o USD/BRL bem menos: a idade é
+            # controlada por par, e só o par expirado é buscado de novo
+            per_pair = QuoteCache(fetch_pairs, max_age=0.3)
+            await per_pair.get()
+            for _ in range(4):
+                await asyncio.sleep(0.1)
+                per_pair.publish({"BTC/USD": {"price": 2.0, "timestamp": None, "variation": 0.0}})
+            stale_before = per_pair.stale()
+            await per_pair.get()
+            per_pair_ok = (
+                stale_before == ["USD/BRL"] and requested == [None, ["USD/BRL"]]
+                and per_pair.is_fresh() and per_pair.data["BTC/USD"]["price"] == 2.0
+            )
+            return results, burst_fetches, fresh_fetches, published, cache.fetch_count, per_pair_ok
+        
+        results, burst_fetches, fresh_fetches, published, total_fetches, per_pair_ok = asyncio.run(run())
+        
+        cache_ok = (
+            burst_fetches == 1 and fresh_fetches == 1
+            and all(data["BTC/USD"]["price"] == 65000.0 for data, _ in results)
+            and published["BTC/USD"]["price"] == 66000.0
+            and total_fetches == 2 and per_pair_ok
+        )
+        
+        if cache_ok:
+            logger.info("Cache de cotações funcionando corretamente")
+            print(f"✅ Cache de cotações: OK")
+            print(f"   500 pedidos simultâneos com {burst_fetches} busca")
+            return True
+        else:
+            logger.error("Falha no cache de cotações")
+            print("❌ Cache de cotações: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar cache de cotações: {e}")
+        print(f"❌ Cache de cotações: ERRO - {e}")
+        return False
+
+def test_broadcast():
+    """Testa o envio concorrente de alertas com limites de taxa e falhas isoladas."""
+    logger.info("Testando a transmissão de alertas...")
+    
+    try:
+        import asyncio
+        from broadcast import Broadcaster
+        
+        bot = FakeBot(delay=0.01, blocked=[3], rate_limited=[5])
+        broadcaster = Broadcaster(bot, global_rate=20, concurrency=10)
+        report = asyncio.run(broadcaster.broadcast(range(30), "alerta"))
+        
+        # O bloqueio de um chat não interrompe os demais e o 429 é repetido
+        isolation_ok = report.sent == 29 and 3 in report.blocked and sorted(chat_id for chat_id, _ in bot.sent) == [c for c in range(30) if c != 3]
+        retry_ok = report.retries == 1 and report.results[5].chat_id == 5
+        # 20 envios imediatos (capacidade do bucket) e 10 a 20/s
+        rate_ok = report.duration >= 0.45 and report.percentile(50) <= report.percentile(99)
+        
+        if isolation_ok and retry_ok and rate_ok:
+            logger.info(f"Transmissão: {report.summary()}")
+            print(f"✅ Transmissão de alertas: OK")
+            print(f"   {report.summary()}")
+            return True
+        else:
+            logger.error("Falha na transmissão de alertas")
+            print("❌ Transmissão de alertas: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar transmissão de alertas: {e}")
+        print(f"❌ Transmissão de alertas: ERRO - {e}")
+        return False
+
+def test_subscriber_store():
+    """Testa o armazenamento indexado de assinantes."""
+    logger.info("Testando o armazenamento de assinantes...")
+    
+    try:
+        import asyncio
+        import tempfile
+        from subscribers import SubscriberStore
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = os.path.join(tmp_dir, "radar.db")
+            users_file = os.path.join(tmp_dir, "users.json")
+            with open(users_file, 'w') as f:
+                json.dump([{"chat_id": 100, "username": "legado", "first_name": "Legado"}], f)
+            
+            store = SubscriberStore(db_file, batch_size=3)
+            import_ok = store.import_json(users_file) == 1 and not os.path.exists(users_file)
+            new_ok = store.add(1, "ana", "Ana") and not store.add(1, "ana", "Ana")
+            for chat_id in range(2, 11):
+                store.add(chat_id)
+            
+            # /parar persiste após reiniciar
+            store.set_active(5, False)
+            store.close()
+            store = SubscriberStore(db_file, batch_size=3)
+            paused_ok = not store.is_active(5) and store.is_active(4) and store.get(5)["active"] is False
+            
+            # Iteração em lotes de 3, sem carregar tudo
+            expected = [c for c in range(1, 11) if c != 5] + [100]
+            iter_ok = list(store.iter_active()) == expected and store.count_active() == len(expected)
+            
+            async def collect():
+                return [chat_id async for chat_id in store.aiter_active()]
+            aiter_ok = asyncio.run(collect()) == expected
+            
+            # /start reativa um assinante pausado
+            store.add(5)
+            resume_ok = store.is_active(5)
+            store.close()
+        
+        if import_ok and new_ok and paused_ok and iter_ok and aiter_ok and resume_ok:
+            logger.info("Armazenamento de assinantes funcionando corretamente")
+            print(f"✅ Armazenamento de assinantes: OK")
+            return True
+        else:
+            logger.error("Falha no armazenamento de assinantes")
+            print("❌ Armazenamento de assinantes: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar armazenamento de assinantes: {e}")
+        print(f"❌ Armazenamento de assinantes: ERRO - {e}")
+        return False
+
+def test_alert_journal():
+    """Testa o diário de alertas com retenção e consultas por par e horário."""
+    logger.info("Testando o diário de alertas...")
+    
+    try:
+        import tempfile
+        from datetime import timedelta
+        from alert_journal import AlertJournal
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            alerts_file = os.path.join(tmp_dir, "alerts.json")
+            with open(alerts_file, 'w') as f:
+                json.dump([{"pair": "BTC/USD", "variation": 2.5, "price": 60000.0,
+                            "timestamp": "2025-04-16T10:00:00", "news": []}], f)
+            
+            journal = AlertJournal(os.path.join(tmp_dir, "radar.db"), max_alerts=5)
+            import_ok = journal.import_json(alerts_file) == 1
+            
+            now = datetime.now()
+            ids = []
+            for i in range(8):
+                pair = "BTC/USD" if i % 2 == 0 else "USD/BRL"
+                timestamp = (now - timedelta(hours=30 - 4 * i)).isoformat()
+                ids.append(journal.record(pair, 2.0 + i, 100.0 + i, timestamp))
+            
+            # Ids continuam estáveis após o descarte dos alertas mais antigos
+            ids_ok = ids == list(range(2, 10)) and journal.get(2) is None and journal.get(9)["variation"] == 9.0
+            retention_ok = len(journal.query()) == 5
+            
+            # Alertas de BTC/USD nas últimas 24h
+            recent = journal.query(pair="BTC/USD", since=now - timedelta(hours=24))
+            query_ok = [alert["id"] for alert in recent] == [6, 8] and all(a["pair"] == "BTC/USD" for a in recent)
+            journal.close()
+        
+        if import_ok and ids_ok and retention_ok and query_ok:
+            logger.info("Diário de alertas funcionando corretamente")
+            print(f"✅ Diário de alertas: OK")
+            return True
+        else:
+            logger.error("Falha no diário de alertas")
+            print("❌ Diário de alertas: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar diário de alertas: {e}")
+        print(f"❌ Diário de alertas: ERRO - {e}")
+        return False
+
+def test_history_store():
+    """Testa o log segmentado de histórico de preços."""
+    logger.info("Testando o armazenamento de histórico...")
+    
+    try:
+        import tempfile
+        from history_store import SegmentHistoryStore, import_json_history, RECORD_SIZE
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_dir = os.path.join(tmp_dir, "btc_usd")
+            store = SegmentHistoryStore(store_dir, segment_records=10, max_records=25)
+            for i in range(45):
+                store.append(1_000_000_000 * (i + 1), 100.0 + i)
+            
+            # Compactação mantém ao menos max_records em segmentos inteiros
+            tail_ok = store.tail(3) == [(43_000_000_000, 142.0), (44_000_000_000, 143.0), (45_000_000_000, 144.0)]
+            compact_ok = 25 <= len(store) < 45 and len(store) == sum(count for _, count in store.segments)
+            range_ok = [p for _, p in store.read_range(21_000_000_000, 24_000_000_000)] == [120.0, 121.0, 122.0]
+            store.close()
+            
+            # Simula uma gravação interrompida no meio de um registro
+            with open(store.segments[-1][0], 'ab') as f:
+                f.write(b"\x00" * (RECORD_SIZE // 2))
+            recovered = SegmentHistoryStore(store_dir, segment_records=10, max_records=25)
+            recovery_ok = len(recovered) == len(store) and recovered.tail(1) == [(45_000_000_000, 144.0)]
+            recovered.close()
+            
+            # Importação única do JSON legado
+            legacy_file = os.path.join(tmp_dir, "usd_brl_history.json")
+            with open(legacy_file, 'w') as f:
+                json.dump([{"timestamp": "2025-04-16T10:00:00", "price": 5.2}], f)
+            imported_store = SegmentHistoryStore(os.path.join(tmp_dir, "usd_brl"))
+            import_ok = (
+                import_json_history(legacy_file, imported_store) == 1
+                and import_json_history(legacy_file, imported_store) == 0
+                and len(imported_store) == 1
+            )
+            imported_store.close()
+        
+        if tail_ok and compact_ok and range_ok and recovery_ok and import_ok:
+            logger.info("Armazenamento de histórico funcionando corretamente")
+            print(f"✅ Armazenamento de histórico: OK")
+            return True
+        else:
+            logger.error("Falha no armazenamento de histórico")
+            print("❌ Armazenamento de histórico: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar armazenamento de histórico: {e}")
+        print(f"❌ Armazenamento de histórico: ERRO - {e}")
+        return False
+
 def test_news_searcher():
     """Testa o buscador de notícias."""
     logger.info("Testando o buscador de notícias...")
@@ -78,6 +667,1439 @@ def test_news_searcher():
         print(f"❌ Buscador de notícias: ERRO - {e}")
         return False
 
+def test_news_cache():
+    """Testa o cache de buscas de notícias (TTL, LRU, deduplicação e persistência)."""
+    logger.info("Testando o cache de notícias...")
+    
+    try:
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        from news_searcher import NewsCache, NewsSearcher
+        
+        class CountingSearcher(NewsSearcher):
+            calls = 0
+            
+            def _search_twitter(self, query, count=10, lang=None):
+                CountingSearcher.calls += 1
+                return super()._search_twitter(query, count, lang)
+            
+            def _search_news_api(self, query, language="pt"):
+                CountingSearcher.calls += 1
+                return super()._search_news_api(query, language)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, "news_cache.json")
+            searcher = CountingSearcher(cache_file=cache_file)
+            
+            # Alertas repetidos do mesmo par na mesma hora não fazem novas buscas
+            searcher.search_news_for_pair("BTC/USD", 2.5)
+            first_calls = CountingSearcher.calls
+            searcher.search_news_for_pair("BTC/USD", 3.1)
+            repeat_ok = first_calls == 4 and CountingSearcher.calls == 4 and searcher.news_cache.hits == 4
+            
+            # Reinício com o cache em disco
+            warm = CountingSearcher(cache_file=cache_file)
+            warm.search_news_for_pair("BTC/USD", 2.5)
+            warm_ok = CountingSearcher.calls == 4 and warm.news_cache.stats()["hits"] == 4
+            
+            # Buscas simultâneas idênticas são feitas uma única vez
+            cache = NewsCache(ttl=60, max_entries=2)
+            loads = []
+            
+            def slow_loader():
+                loads.append(1)
+                time.sleep(0.2)
+                return ["resultado"]
+            
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: cache.get_or_load("k", slow_loader), range(8)))
+            single_flight_ok = len(loads) == 1 and results == [["resultado"]] * 8 and cache.shared == 7
+            
+            # Limite LRU e expiração
+            cache.get_or_load("a", lambda: [1])
+            cache.get_or_load("k", slow_loader)
+            cache.get_or_load("b", lambda: [2])
+            lru_ok = list(cache.entries) == ["k", "b"]
+            cache.ttl = 0
+            cache.get_or_load("c", lambda: [3])
+            expired_before = cache.misses
+            cache.get_or_load("c", lambda: [3])
+            ttl_ok = cache.misses == expired_before + 1
+            key_ok = NewsCache.make_key("Bitcoin  BTC", "pt", "twitter") == NewsCache.make_key("btc bitcoin", "pt", "twitter")
+        
+        if repeat_ok and warm_ok and single_flight_ok and lru_ok and ttl_ok and key_ok:
+            logger.info(f"Cache de notícias: {searcher.news_cache.stats()}")
+            print(f"✅ Cache de notícias: OK")
+            return True
+        else:
+            logger.error("Falha no cache de notícias")
+            print("❌ Cache de notícias: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar cache de notícias: {e}")
+        print(f"❌ Cache de notícias: ERRO - {e}")
+        return False
+
+def test_news_sources():
+    """Testa a busca paralela de notícias com prazo total."""
+    logger.info("Testando as fontes de notícias em paralelo...")
+    
+    try:
+        from news_searcher import NewsSearcher, NewsSource
+        
+        class DelayedSource(NewsSource):
+            def __init__(self, name, delay):
+                self.name = name
+                self.delay = delay
+            
+            async def search(self, query, language):
+                await asyncio.sleep(self.delay)
+                return [{
+                    "type": "news", "language": language, "title": self.name,
+                    "content": query, "source": self.name, "url": "https://exemplo.com",
+                    "timestamp": datetime.now().isoformat()
+                }]
+        
+        # Duas fontes de 0,2s em paralelo levam ~0,2s, não a soma
+        searcher = NewsSearcher(sources=[DelayedSource("a", 0.2), DelayedSource("b", 0.2)], deadline=2)
+        start = time.monotonic()
+        news = asyncio.run(searcher.search_news_async("BTC/USD", 2.5))
+        parallel_ok = len(news) == 4 and not news.partial and time.monotonic() - start < 0.6
+        
+        # Uma fonte lenta não atrasa as demais e o resultado fica marcado como parcial
+        searcher = NewsSearcher(sources=[DelayedSource("rapida", 0.05), DelayedSource("lenta", 5)], deadline=0.3)
+        start = time.monotonic()
+        news = asyncio.run(searcher.search_news_async("USD/BRL", -1.8))
+        elapsed = time.monotonic() - start
+        partial_ok = (
+            len(news) == 2 and news.partial and elapsed < 1
+            and news.missing == ["lenta/pt", "lenta/en"]
+            and "Resultados parciais" in searcher.format_news_message("USD/BRL", -1.8, news)
+        )
+        
+        if parallel_ok and partial_ok:
+            logger.info(f"Busca parcial em {elapsed:.2f}s sem {news.missing}")
+            print(f"✅ Fontes de notícias em paralelo: OK")
+            return True
+        else:
+            logger.error("Falha na busca paralela de notícias")
+            print("❌ Fontes de notícias em paralelo: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar fontes de notícias: {e}")
+        print(f"❌ Fontes de notícias em paralelo: ERRO - {e}")
+        return False
+
+def test_streaming_alert():
+    """Testa a edição progressiva do alerta com as notícias que chegam."""
+    logger.info("Testando a entrega progressiva de notícias...")
+    
+    try:
+        import bot as bot_module
+        from broadcast import Broadcaster
+        from news_searcher import NewsSearcher, NewsSource
+        
+        class DelayedSource(NewsSource):
+            def __init__(self, name, delay):
+                self.name = name
+                self.delay = delay
+            
+            async def search(self, query, language):
+                await asyncio.sleep(self.delay)
+                return [{
+                    "type": "news", "language": language, "title": f"{self.name}-{language}",
+                    "content": query, "source": self.name, "url": "https://exemplo.com",
+                    "timestamp": datetime.now().isoformat()
+                }]
+        
+        fake_bot = FakeBot()
+        broadcaster = Broadcaster(fake_bot, per_chat_rate=100)
+        messages = {1: FakeMessage(1, 10), 2: FakeMessage(2, 11)}
+        original_searcher = bot_module.news_searcher
+        bot_module.news_searcher = NewsSearcher(
+            sources=[DelayedSource("rapida", 0.05), DelayedSource("lenta", 0.4)], deadline=2
+        )
+        try:
+            start = time.monotonic()
+            ok = asyncio.run(bot_module.stream_news_for_alert(broadcaster, messages, "BTC/USD", 2.5, "ALERTA\n\n"))
+        finally:
+            bot_module.news_searcher = original_searcher
+        
+        # As notícias entram por edição, sem novas mensagens
+        first_edits = [e for e in fake_bot.edits if "⏳" in e[2]]
+        final_edits = [e for e in fake_bot.edits if "lenta-en" in e[2]]
+        edits_ok = (
+            ok and not fake_bot.sent and len(fake_bot.edits) == 4
+            and sorted((e[0], e[1]) for e in first_edits) == [(1, 10), (2, 11)]
+            and len(final_edits) == 2 and all("⏳" not in e[2] for e in final_edits)
+        )
+        # O primeiro conteúdo útil chega com a fonte rápida, antes da lenta
+        latency_ok = edits_ok and max(e[3] for e in first_edits) - start < 0.3
+        
+        if edits_ok and latency_ok:
+            logger.info(f"Primeira edição em {max(e[3] for e in first_edits) - start:.2f}s")
+            print(f"✅ Entrega progressiva de notícias: OK")
+            return True
+        else:
+            logger.error("Falha na entrega progressiva de notícias")
+            print("❌ Entrega progressiva de notícias: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar entrega progressiva de notícias: {e}")
+        print(f"❌ Entrega progressiva de notícias: ERRO - {e}")
+        return False
+
+def test_article_store():
+    """Testa o armazenamento deduplicado de notícias."""
+    logger.info("Testando o armazenamento de notícias...")
+    
+    try:
+        import tempfile
+        from article_store import ArticleStore
+        
+        def article(n, url=True):
+            return {
+                "type": "news", "language": "pt", "title": f"Notícia {n}", "content": f"Conteúdo {n}",
+                "source": "Portal", "url": f"https://exemplo.com/{n}" if url else "",
+                "timestamp": "2025-04-16T10:00:00"
+            }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Importa o news.json legado, com as mesmas notícias repetidas em várias buscas
+            news_file = os.path.join(tmp_dir, "news.json")
+            with open(news_file, 'w') as f:
+                json.dump([
+                    {"pair": "BTC/USD", "variation": 2.5, "timestamp": "2025-04-10T10:00:00",
+                     "results": [article(1), article(2)]},
+                    {"pair": "BTC/USD", "variation": 3.0, "timestamp": "2025-04-11T10:00:00",
+                     "results": [article(2), article(1)]}
+                ], f)
+            store = ArticleStore(os.path.join(tmp_dir, "radar.db"), max_searches=5)
+            import_ok = store.import_json(news_file) == 2 and store.count() == 2 and os.path.exists(news_file + ".imported")
+            
+            # Cada notícia é gravada uma única vez; os alertas só guardam referências
+            store.record_search("BTC/USD", 2.1, [article(1), article(3), article(4, url=False)], alert_id=7,
+                                timestamp="2025-04-16T10:00:00")
+            store.record_search("USD/BRL", -2.0, [article(4, url=False), article(5)], alert_id=8,
+                                timestamp="2025-04-16T11:00:00")
+            dedup_ok = store.count() == 5
+            linked = [a["title"] for a in store.articles_for_alert(7)]
+            link_ok = linked == ["Notícia 1", "Notícia 3", "Notícia 4"]
+            
+            # Notícias de alertas de BTC/USD na semana
+            week = [a["title"] for a in store.articles_for_pair("BTC/USD", since="2025-04-14T00:00:00", alerts_only=True)]
+            query_ok = week == ["Notícia 1", "Notícia 3", "Notícia 4"]
+            
+            # Retenção: buscas antigas e notícias sem referência são descartadas
+            store.PRUNE_EVERY = 1
+            for n in range(5):
+                store.record_search("USD/BRL", 2.0, [article(10 + n)], timestamp="2025-04-17T10:00:00")
+            retention_ok = store.articles_for_alert(7) == [] and store.count() == 5
+            store.close()
+        
+        if import_ok and dedup_ok and link_ok and query_ok and retention_ok:
+            logger.info("Notícias deduplicadas e ligadas aos alertas corretamente")
+            print(f"✅ Armazenamento de notícias: OK")
+            return True
+        else:
+            logger.error("Falha no armazenamento de notícias")
+            print("❌ Armazenamento de notícias: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar armazenamento de notícias: {e}")
+        print(f"❌ Armazenamento de notícias: ERRO - {e}")
+        return False
+
+def test_rolling_window():
+    """Testa as janelas deslizantes e a detecção de variações lentas."""
+    logger.info("Testando as janelas deslizantes...")
+    
+    try:
+        import random
+        import tempfile
+        import threading
+        from rolling_window import RollingWindow, WindowTracker, parse_duration
+        from scheduler import PriceScheduler
+        from subscribers import SubscriberStore
+        from alert_journal import AlertJournal
+        
+        # Primeiro/mínimo/máximo incrementais conferidos contra o cálculo direto
+        window = RollingWindow(60)
+        samples = []
+        rng = random.Random(7)
+        stats_ok = True
+        for i in range(500):
+            ts = i * 7 * 1_000_000_000
+            price = 100 + rng.uniform(-5, 5)
+            window.add(ts, price)
+            samples.append((ts, price))
+            # A janela mantém a última amostra anterior ao início como referência
+            start = max(j for j, (sample_ts, _) in enumerate(samples) if sample_ts <= ts - 60 * 1_000_000_000) if ts >= 60 * 1_000_000_000 else 0
+            expected = [p for _, p in samples[start:]]
+            if (window.first, window.min, window.max) != (expected[0], min(expected), max(expected)):
+                stats_ok = False
+                break
+        duration_ok = parse_duration("5m") == 300 and parse_duration("24h") == 86400
+        
+        # Alta lenta de ~5% em uma hora: nunca 2% entre duas amostras, mas dispara na janela de 1h
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            monitor = _temp_monitor(tmp_dir)
+            scheduler = PriceScheduler(
+                subscribers=SubscriberStore(os.path.join(tmp_dir, "radar.db")),
+                monitor=monitor,
+                alerts=AlertJournal(os.path.join(tmp_dir, "radar.db"))
+            )
+            tracker = WindowTracker()
+            detections = []
+            price = 100.0
+            for tick in range(13):
+                tracker.add(tick * 300 * 1_000_000_000, price)
+                quote = {"price": price, "variation": 0.4, "windows": tracker.stats()}
+                detected = scheduler._detect_variation("BTC/USD", quote)
+                if detected:
+                    detections.append((tick, detected[0], detected[1]))
+                price *= 1.004
+            # Dispara uma única vez, quando a janela de 1h cruza o limiar; depois só atualiza o alerta
+            slow_ok = detections == [(5, "new", "1h"), (8, "update", "1h"), (11, "update", "1h")]
+        
+        # O histórico e as janelas (lidos no event loop) mudam no loop; só o disco vai para uma thread
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            monitor = _temp_monitor(tmp_dir, provider=StubProvider())
+            monitor.load()
+            threads = {"memory": set(), "disk": set()}
+            def track(add, kind):
+                def wrapper(*args, **kwargs):
+                    threads[kind].add(threading.get_ident())
+                    return add(*args, **kwargs)
+                return wrapper
+            for name in ("BTC/USD", "USD/BRL"):
+                monitor.trackers[name].add = track(monitor.trackers[name].add, "memory")
+                monitor.stores[name].append = track(monitor.stores[name].append, "disk")
+            prices = asyncio.run(monitor.fetch_prices())
+            loop_thread = threading.get_ident()
+            thread_ok = (
+                set(prices) == {"BTC/USD", "USD/BRL"}
+                and threads["memory"] == {loop_thread}
+                and threads["disk"] and loop_thread not in threads["disk"]
+                and monitor.last_price("BTC/USD")[0] == 64000.0
+                and [price for _, price in monitor.stores["BTC/USD"].read_range(0)] == [64000.0]
+            )
+        
+        if stats_ok and duration_ok and slow_ok and thread_ok:
+            logger.info(f"Variação lenta detectada: {detections}")
+            print(f"✅ Janelas deslizantes: OK")
+            return True
+        else:
+            logger.error(f"Falha nas janelas deslizantes: {detections} {threads}")
+            print("❌ Janelas deslizantes: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar janelas deslizantes: {e}")
+        print(f"❌ Janelas deslizantes: ERRO - {e}")
+        return False
+
+def test_price_ring():
+    """Testa o histórico em memória com buffers NumPy pré-alocados."""
+    logger.info("Testando o histórico em memória...")
+    
+    try:
+        import tempfile
+        import numpy as np
+        from price_ring import PriceRing
+        
+        ring = PriceRing(100)
+        for i in range(1000):
+            ring.append(i * 1_000_000_000, 100.0 + i)
+        
+        # Mantém só as últimas 100 amostras, em ordem, sem crescer
+        timestamps, prices = ring.window()
+        order_ok = (
+            len(ring) == 100 and ring[0] == (900 * 1_000_000_000, 1000.0) and ring[-1] == (999 * 1_000_000_000, 1099.0)
+            and np.array_equal(prices, np.arange(1000.0, 1100.0))
+        )
+        memory_ok = ring._prices.nbytes + ring._timestamps.nbytes == (100 + ring.slack) * 16
+        
+        # Janelas são views do buffer (sem cópia) e só leitura
+        since_ts, since_prices = ring.window(since_ns=990 * 1_000_000_000)
+        view_ok = (
+            np.shares_memory(since_prices, ring._prices) and not since_prices.flags.writeable
+            and since_prices.tolist() == [1090.0 + i for i in range(10)]
+            and ring.window(n=5)[1].tolist() == [1095.0, 1096.0, 1097.0, 1098.0, 1099.0]
+        )
+        stats_ok = (
+            abs(ring.variation(n=2) - (1099.0 - 1098.0) / 1098.0 * 100) < 1e-9
+            and ring.variation(n=1) is None and PriceRing(10).last() is None
+        )
+        
+        # A variação entre ticks do monitor sai da janela das duas últimas amostras
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            monitor = _temp_monitor(tmp_dir)
+            monitor.load()
+            monitor.histories["BTC/USD"].extend([(1, 100.0), (2, 102.0), (3, 99.96)])
+            variation, price = monitor.check_price_variation("BTC/USD")
+            monitor_ok = abs(variation + 2.0) < 1e-9 and price == 99.96
+        
+        if order_ok and memory_ok and view_ok and stats_ok and monitor_ok:
+            logger.info(f"Histórico em memória: {len(ring)} amostras, {(ring._prices.nbytes + ring._timestamps.nbytes) / ring.capacity:.0f} bytes/amostra")
+            print(f"✅ Histórico em memória: OK")
+            return True
+        else:
+            logger.error("Falha no histórico em memória")
+            print("❌ Histórico em memória: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar histórico em memória: {e}")
+        print(f"❌ Histórico em memória: ERRO - {e}")
+        return False
+
+def test_ohlc_rollup():
+    """Testa a agregação OHLC incremental em vários níveis com retenção."""
+    logger.info("Testando a agregação OHLC...")
+    
+    try:
+        import tempfile
+        import threading
+        from ohlc import OhlcRollup, OhlcStore
+        from history_store import SegmentHistoryStore
+        
+        ns = 1_000_000_000
+        base = 1_700_000_000 // 86400 * 86400 * ns
+        ticks = [(base + i * 10 * ns, 100.0 + (i % 37) - (i % 11)) for i in range(3 * 360)]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = OhlcStore(os.path.join(tmp_dir, "radar.db"))
+            rollup = OhlcRollup(store, "BTC/USD")
+            for ts, price in ticks:
+                rollup.add(ts, price)
+            
+            # Barras de 1 minuto e de 1 hora conferidas contra o cálculo direto
+            resolution, minute_bars = rollup.bars(resolution=60)
+            first_hour = [p for ts, p in ticks if ts < base + 3600 * ns]
+            _, hour_bars = rollup.bars(resolution=3600)
+            bars_ok = (
+                resolution == 60 and len(minute_bars) == 180
+                and minute_bars[1][1:5] == (ticks[6][1], max(p for _, p in ticks[6:12]), min(p for _, p in ticks[6:12]), ticks[11][1])
+                and hour_bars[0][1:6] == (first_hour[0], max(first_hour), min(first_hour), first_hour[-1], 360)
+                and len(hour_bars) == 3
+            )
+            
+            # A consulta escolhe o nível mais grosso que atende à resolução pedida
+            tiers_ok = (
+                rollup.bars(start=base, max_points=200)[0] == 60
+                and rollup.bars(start=base, max_points=10)[0] == 900
+                and rollup.bars(resolution=7200)[0] == 3600
+            )
+            
+            # Reprocessar o histórico bruto na inicialização não duplica nem refaz barras gravadas
+            rows_before = store.conn.execute("SELECT COUNT(*) FROM ohlc").fetchone()[0]
+            resumed = OhlcRollup(store, "BTC/USD")
+            since = resumed.resume_from()
+            for ts, price in ticks:
+                if since is None or ts >= since:
+                    resumed.add(ts, price, flush=False)
+            resumed.flush()
+            resume_ok = (
+                store.conn.execute("SELECT COUNT(*) FROM ohlc").fetchone()[0] == rows_before
+                and resumed.bars(resolution=60)[1] == minute_bars
+            )
+            
+            # Retenção por nível: barras finas antigas são descartadas e a consulta usa o nível seguinte
+            short = OhlcStore(os.path.join(tmp_dir, "short.db"), tiers=(("1m", 60, 600), ("1h", 3600, None)))
+            short_rollup = OhlcRollup(short, "BTC/USD")
+            for ts, price in ticks:
+                short_rollup.add(ts, price)
+            retention_ok = (
+                len(short.load("BTC/USD", 60)) <= 11
+                and short_rollup.bars(start=base, resolution=60)[0] == 3600
+            )
+            
+            # Leituras da thread dos gráficos durante a gravação não perdem nem duplicam barras
+            shared = OhlcRollup(OhlcStore(os.path.join(tmp_dir, "shared.db")), "BTC/USD")
+            errors = []
+            
+            def write():
+                for ts, price in ticks:
+                    shared.add(ts, price)
+            
+            def read():
+                try:
+                    for _ in range(200):
+                        shared.bars(resolution=60)
+                except Exception as e:
+                    errors.append(e)
+            
+            threads = [threading.Thread(target=write), threading.Thread(target=read), threading.Thread(target=read)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            concurrent_ok = not errors and shared.bars(resolution=60)[1] == minute_bars
+            
+            # O monitor agrega na inicialização o histórico bruto já existente
+            raw = SegmentHistoryStore(os.path.join(tmp_dir, "btc_usd"))
+            for ts, price in ticks:
+                raw.append(ts, price)
+            raw.close()
+            monitor = _temp_monitor(tmp_dir, "monitor.db")
+            monitor_ok = monitor.get_ohlc("BTC/USD", resolution=3600)[1] == hour_bars
+        
+        if bars_ok and tiers_ok and resume_ok and retention_ok and concurrent_ok and monitor_ok:
+            logger.info(f"Agregação OHLC: {len(minute_bars)} barras de 1m, {len(hour_bars)} de 1h")
+            print(f"✅ Agregação OHLC: OK")
+            return True
+        else:
+            logger.error(f"Falha na agregação OHLC: {bars_ok} {tiers_ok} {resume_ok} {retention_ok} {concurrent_ok} {monitor_ok}")
+            print("❌ Agregação OHLC: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar agregação OHLC: {e}")
+        print(f"❌ Agregação OHLC: ERRO - {e}")
+        return False
+
+def test_chart_command():
+    """Testa o /grafico: renderização em processo separado e cache de file_id."""
+    logger.info("Testando o comando /grafico...")
+    
+    try:
+        import tempfile
+        import bot as bot_module
+        from charts import ChartRenderer
+        from history_store import SegmentHistoryStore, to_epoch_ns
+        from alert_journal import AlertJournal
+        
+        class FakeMessage:
+            def __init__(self, sent):
+                self.sent = sent
+            
+            async def reply_photo(self, photo, caption=None):
+                self.sent.append(photo)
+                file_id = photo if isinstance(photo, str) else f"FILE{len(self.sent)}"
+                return type("Sent", (), {"photo": [type("Photo", (), {"file_id": file_id})()]})()
+            
+            async def reply_text(self, text):
+                self.sent.append(text)
+        
+        class FakeUpdate:
+            def __init__(self, sent):
+                self.message = FakeMessage(sent)
+        
+        class FakeContext:
+            def __init__(self, args):
+                self.args = args
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Duas horas de histórico e um alerta no período
+            now_ns = to_epoch_ns(datetime.now())
+            raw = SegmentHistoryStore(os.path.join(tmp_dir, "btc_usd"))
+            for i in range(240):
+                raw.append(now_ns - (240 - i) * 30 * 1_000_000_000, 65000.0 + i * 10)
+            raw.close()
+            monitor = _temp_monitor(tmp_dir)
+            journal = AlertJournal(os.path.join(tmp_dir, "radar.db"))
+            journal.record("BTC/USD", 2.5, 66000.0, datetime.now().isoformat())
+            renderer = ChartRenderer(monitor, journal)
+            
+            async def run():
+                # Pedidos simultâneos geram o gráfico uma única vez
+                results = await asyncio.gather(*(renderer.get("BTC/USD", "24h") for _ in range(3)))
+                png_ok = all(png.startswith(b"\x89PNG") for _, _, png in results) and renderer.render_count == 1
+                
+                # O comando envia o PNG uma vez e depois reaproveita o file_id
+                sent = []
+                renders = renderer.render_count
+                original = bot_module.chart_renderer
+                bot_module.chart_renderer = renderer
+                try:
+                    await bot_module.chart_command(FakeUpdate(sent), FakeContext(["btcusd", "24h"]))
+                    await bot_module.chart_command(FakeUpdate(sent), FakeContext(["BTC/USD", "24h"]))
+                    await bot_module.chart_command(FakeUpdate(sent), FakeContext(["XYZ", "24h"]))
+                finally:
+                    bot_module.chart_renderer = original
+                cache_ok = (
+                    isinstance(sent[0], bytes) and sent[1] == "FILE1"
+                    and renderer.render_count == renders + 1 and sent[2].startswith("Uso: /grafico")
+                )
+                return png_ok, cache_ok
+            
+            png_ok, cache_ok = asyncio.run(run())
+            renderer.close()
+        
+        if png_ok and cache_ok:
+            logger.info("Gráfico gerado uma vez e reenviado pelo file_id")
+            print(f"✅ Comando /grafico: OK")
+            return True
+        else:
+            logger.error(f"Falha no comando /grafico: {png_ok} {cache_ok}")
+            print("❌ Comando /grafico: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar comando /grafico: {e}")
+        print(f"❌ Comando /grafico: ERRO - {e}")
+        return False
+
+def test_fast_startup():
+    """Testa a inicialização rápida: importações leves e histórico carregado sob demanda."""
+    logger.info("Testando a inicialização rápida...")
+    
+    try:
+        import subprocess
+        import sys
+        import tempfile
+        from history_store import SegmentHistoryStore
+        
+        # Importar o bot não carrega pandas, NumPy, requests nem matplotlib, e o perfil lista os módulos
+        script = (
+            "import sys; sys.argv = ['bot.py', '--profile-startup']; import bot; "
+            "heavy = [m for m in ('pandas', 'numpy', 'requests', 'matplotlib') if m in sys.modules]; "
+            "print(heavy); print(bot.startup_profile.report())"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, timeout=60,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        imports_ok = (
+            result.returncode == 0
+            and result.stdout.startswith("[]")
+            and "price_monitor" in result.stdout
+            and "monitor de preços" in result.stdout
+        )
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw = SegmentHistoryStore(os.path.join(tmp_dir, "btc_usd"))
+            raw.append(1_700_000_000 * 1_000_000_000, 100.0)
+            raw.close()
+            
+            # O monitor preguiçoso só abre o histórico no primeiro uso
+            monitor = _temp_monitor(tmp_dir, provider=StubProvider(prices={"BTC-USD": 200.0, "USDBRL=X": 200.0}), lazy=True)
+            lazy_ok = not monitor.loaded and not monitor.histories
+            data = asyncio.run(monitor.fetch_price_data())
+            loaded_ok = (
+                monitor.loaded
+                and len(monitor.histories["BTC/USD"]) == 2
+                and data["BTC/USD"]["variation"] == 100.0
+            )
+        
+        if imports_ok and lazy_ok and loaded_ok:
+            logger.info(f"Perfil de inicialização:\n{result.stdout}")
+            print("✅ Inicialização rápida: OK")
+            return True
+        else:
+            logger.error(f"Falha na inicialização rápida: {imports_ok} {lazy_ok} {loaded_ok} {result.stdout} {result.stderr}")
+            print("❌ Inicialização rápida: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar a inicialização rápida: {e}")
+        print(f"❌ Inicialização rápida: ERRO - {e}")
+        return False
+
+def test_webhook():
+    """Testa o modo webhook de ponta a ponta com um servidor local que simula a Bot API."""
+    logger.info("Testando o modo webhook...")
+    
+    try:
+        import httpx
+        import bot as bot_module
+        from webhook import WebhookServer, read_request, write_response
+        
+        async def scenario():
+            # Servidor local que simula a Bot API e marca a chegada de cada sendMessage
+            sent = asyncio.Queue()
+            
+            async def fake_telegram(reader, writer):
+                while True:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method = request[1].rsplit("/", 1)[-1]
+                    if method == "getMe":
+                        result = {"id": 1, "is_bot": True, "first_name": "Radar", "username": "radar_bot"}
+                    elif method == "sendMessage":
+                        sent.put_nowait(time.perf_counter())
+                        result = {"message_id": 2, "date": int(time.time()), "chat": {"id": 42, "type": "private"}, "text": "ok"}
+                    else:
+                        result = True
+                    await write_response(writer, 200, json.dumps({"ok": True, "result": result}).encode())
+                writer.close()
+            
+            telegram_server = await asyncio.start_server(fake_telegram, "127.0.0.1", 0)
+            telegram_port = telegram_server.sockets[0].getsockname()[1]
+            application = bot_module.build_application(token="123:ABC", base_url=f"http://127.0.0.1:{telegram_port}/bot")
+            await application.initialize()
+            
+            from telegram import Update
+            async def handle_update(data):
+                await application.process_update(Update.de_json(data, application.bot))
+            
+            server = WebhookServer(handle_update, secret_token="s3cret", host="127.0.0.1", port=0, workers=4)
+            port = await server.start()
+            url = f"http://127.0.0.1:{port}/telegram"
+            
+            def command(update_id, text):
+                return {
+                    "update_id": update_id,
+                    "message": {
+                        "message_id": update_id, "date": int(time.time()), "text": text,
+                        "chat": {"id": 42, "type": "private"},
+                        "from": {"id": 42, "is_bot": False, "first_name": "Ana"},
+                        "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}]
+                    }
+                }
+            
+            try:
+                async with httpx.AsyncClient() as client:
+                    headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+                    
+                    # Segredo ausente ou errado é recusado sem processar o update
+                    forbidden = await client.post(url, json=command(1, "/help"), headers={"X-Telegram-Bot-Api-Secret-Token": "x"})
+                    missing = await client.post(url, json=command(1, "/help"))
+                    # JSON que não é um objeto (lista, número, string) recebe 400 e não chega à fila
+                    malformed = [
+                        await client.post(url, json=body, headers=headers) for body in ([command(1, "/help")], 42, "x")
+                    ]
+                    security_ok = (
+                        forbidden.status_code == 403 and missing.status_code == 403
+                        and all(r.status_code == 400 for r in malformed) and server.received == 0
+                    )
+                    
+                    # Latência de ida e volta: POST do update até o sendMessage chegar à "Bot API"
+                    latencies = []
+                    for update_id in range(2, 7):
+                        started = time.perf_counter()
+                        response = await client.post(url, json=command(update_id, "/help"), headers=headers)
+                        answered_at = await asyncio.wait_for(sent.get(), 10)
+                        latencies.append((answered_at - started) * 1000)
+                    await server.queue.join()
+                    roundtrip_ok = response.status_code == 200 and server.processed == 5
+                    
+                    # Rajada concorrente processada pelo pool de workers
+                    responses = await asyncio.gather(*[
+                        client.post(url, json=command(100 + i, "/config"), headers=headers) for i in range(20)
+                    ])
+                    for _ in range(20):
+                        await asyncio.wait_for(sent.get(), 10)
+                    await server.queue.join()
+                    burst_ok = all(r.status_code == 200 for r in responses) and server.processed == 25
+                    health = (await client.get(f"http://127.0.0.1:{port}/healthz")).json()
+            finally:
+                await server.stop()
+                await application.shutdown()
+                telegram_server.close()
+            
+            # Fila cheia: o servidor responde 503 para o Telegram reenviar depois
+            release = asyncio.Event()
+            async def slow_update(data):
+                await release.wait()
+            busy = WebhookServer(slow_update, secret_token="s3cret", host="127.0.0.1", port=0, queue_size=1,
+                                 workers=1, enqueue_timeout=0.05)
+            busy_port = await busy.start()
+            try:
+                async with httpx.AsyncClient() as client:
+                    statuses = []
+                    for update_id in range(3):
+                        response = await client.post(f"http://127.0.0.1:{busy_port}/telegram", json={"update_id": update_id},
+                                                     headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"})
+                        statuses.append(response.status_code)
+                        await asyncio.sleep(0.01)
+            finally:
+                release.set()
+                await busy.stop()
+            backpressure_ok = statuses == [200, 200, 503] and busy.rejected == 1 and busy.processed == 2
+            
+            return security_ok, roundtrip_ok, burst_ok, backpressure_ok, sorted(latencies), health
+        
+        security_ok, roundtrip_ok, burst_ok, backpressure_ok, latencies, health = asyncio.run(scenario())
+        
+        if security_ok and roundtrip_ok and burst_ok and backpressure_ok:
+            logger.info(f"Webhook: ida e volta mediana de {latencies[len(latencies) // 2]:.1f} ms; {health}")
+            print(f"✅ Modo webhook: OK")
+            print(f"   Ida e volta de um comando: {latencies[len(latencies) // 2]:.1f} ms (mediana)")
+            return True
+        else:
+            logger.error(f"Falha no modo webhook: {security_ok} {roundtrip_ok} {burst_ok} {backpressure_ok}")
+            print("❌ Modo webhook: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar o modo webhook: {e}")
+        print(f"❌ Modo webhook: ERRO - {e}")
+        return False
+
+def test_price_targets():
+    """Testa os alvos de preço por usuário e o índice ordenado de cruzamentos."""
+    logger.info("Testando os alvos de preço...")
+    
+    try:
+        import random
+        import tempfile
+        from price_targets import ABOVE, BELOW, PriceTargets, PriceTargetStore, TargetIndex, parse_rule
+        from scheduler import PriceScheduler
+        from subscribers import SubscriberStore
+        from alert_journal import AlertJournal
+        
+        current = {"BTC/USD": 65000.0, "USD/BRL": 5.4}.get
+        parse_ok = (
+            parse_rule("BTC/USD > 70000") == ("BTC/USD", ABOVE, 70000.0)
+            and parse_rule("usdbrl<5,1") == ("usdbrl", BELOW, 5.1)
+            # Dois ou mais grupos e separadores misturados definem o formato sozinhos
+            and [parse_rule(f"BTC/USD > {value}")[2] for value in ("1,234,567", "1.234.567", "70,000.50", "70.000,50")]
+            == [1234567.0, 1234567.0, 70000.5, 70000.5]
+            and [parse_rule(f"BTC/USD > {value}")[2] for value in ("70.5", "0,001", "5,1254")] == [70.5, 0.001, 5.1254]
+            # Um único grupo de três dígitos é desfeito pelo preço atual do par: milhar no BTC, decimal no câmbio
+            and [parse_rule(f"BTC/USD > {value}", current)[2] for value in ("70,000", "70.000", "1.234")]
+            == [70000.0, 70000.0, 1234.0]
+            and [parse_rule(f"USD/BRL < {value}", current)[2] for value in ("5,125", "5.125", "1.234")]
+            == [5.125, 5.125, 1.234]
+        )
+        # Sem preço atual, "5,125" é ambíguo e recusado, assim como números mal agrupados
+        for text in ("BTC/USD = 70000", "BTC/USD > 1.000.5", "BTC/USD > 7,0,0", "USD/BRL < 5,125", "USD/BRL < 5.125",
+                     "BTC/USD > 1.234", "BTC/USD > 70,000"):
+            try:
+                parse_rule(text)
+                parse_ok = False
+            except ValueError:
+                pass
+        
+        # 100 mil alvos: cada tick só visita os alvos cruzados, conferidos contra a varredura completa
+        rng = random.Random(7)
+        index = TargetIndex()
+        rules = {}
+        for target_id in range(100_000):
+            direction = rng.choice((ABOVE, BELOW))
+            price = round(rng.uniform(50_000, 80_000), 2)
+            index.add(target_id, direction, price)
+            rules[target_id] = (direction, price)
+        pending = dict(rules)
+        previous = 65_000.0
+        tick_times = []
+        index_ok = True
+        for tick in range(200):
+            price = previous * (1 + rng.uniform(-0.002, 0.002))
+            started = time.perf_counter()
+            crossed = index.crossed(previous, price)
+            tick_times.append(time.perf_counter() - started)
+            if tick % 20 == 0:
+                expected = {
+                    target_id for target_id, (direction, target) in pending.items()
+                    if (direction == ABOVE and previous < target <= price) or (direction == BELOW and price <= target < previous)
+                }
+                index_ok = index_ok and set(crossed) == expected
+            for target_id in crossed:
+                del pending[target_id]
+            previous = price
+        index_ok = index_ok and len(index) == len(pending)
+        tick_ms = max(tick_times) * 1000
+        speed_ok = tick_ms < 50
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = os.path.join(tmp_dir, "radar.db")
+            targets = PriceTargets(PriceTargetStore(db_file), max_per_chat=3)
+            targets.check("BTC/USD", 65000.0)
+            
+            # Alvos já atingidos e o limite por chat são recusados
+            up = targets.add(1, "BTC/USD", ABOVE, 70000.0)
+            down = targets.add(2, "BTC/USD", BELOW, 60000.0)
+            removed = targets.add(1, "BTC/USD", BELOW, 50000.0)
+            rejected = 0
+            for chat_id, direction, target in ((1, ABOVE, 64000.0), (1, BELOW, 40000.0)):
+                try:
+                    targets.add(chat_id, "BTC/USD", direction, target)
+                    targets.add(chat_id, "BTC/USD", direction, target)
+                except ValueError:
+                    rejected += 1
+            remove_ok = not targets.remove(2, removed) and targets.remove(1, removed)
+            
+            # A persistência recarrega só os alvos pendentes
+            reloaded = PriceTargets(PriceTargetStore(db_file))
+            persist_ok = sorted(reloaded.rules) == sorted(targets.rules) and len(reloaded.for_chat(1)) == 2
+            
+            # O agendador avisa cada chat uma única vez, quando o preço cruza o alvo
+            fake_bot = FakeBot()
+            monitor = _temp_monitor(tmp_dir)
+            scheduler = PriceScheduler(
+                bot=fake_bot,
+                subscribers=SubscriberStore(db_file),
+                monitor=monitor,
+                alerts=AlertJournal(db_file),
+                targets=targets
+            )
+            fired = []
+            for price in (66000.0, 71000.0, 69000.0, 72000.0, 59000.0):
+                triggered = targets.check("BTC/USD", price)
+                asyncio.run(scheduler.send_targets("BTC/USD", {"price": price}, triggered))
+                fired.append([rule["id"] for rule in triggered])
+            scheduler_ok = (
+                fired == [[], [up], [], [], [down]]
+                and [chat_id for chat_id, _ in fake_bot.sent] == [1, 2]
+                and "acima de $70,000.00" in fake_bot.sent[0][1]
+                and len(PriceTargets(PriceTargetStore(db_file))) == 1
+            )
+            
+            # Depois de reiniciar, o último preço do histórico é o tick anterior:
+            # um alvo cruzado com o bot parado dispara no primeiro tick, sem esperar
+            # na fila de um alerta de variação ainda em entrega no mesmo par
+            class RestartedMonitor:
+                def __init__(self, registry):
+                    self.registry = registry
+                
+                def last_price(self, pair):
+                    return (65000.0, datetime.now().isoformat()) if pair == "BTC/USD" else None
+                
+                async def fetch_price_data(self, pairs=None):
+                    return {"BTC/USD": {
+                        "price": 71000.0, "timestamp": datetime.now().isoformat(), "variation": 0.0,
+                        "windows": {"5m": {"move": 0.0}, "1h": {"move": 0.0}}
+                    }}
+            
+            restarted = PriceTargets(PriceTargetStore(db_file))
+            pending_up = restarted.add(3, "BTC/USD", ABOVE, 70500.0)
+            fake_bot = FakeBot()
+            scheduler = PriceScheduler(
+                bot=fake_bot,
+                subscribers=SubscriberStore(db_file),
+                monitor=RestartedMonitor(monitor.registry),
+                alerts=AlertJournal(db_file),
+                targets=restarted
+            )
+            
+            async def first_tick():
+                slow_alert = scheduler._deliver("BTC/USD", lambda: asyncio.sleep(1.0))
+                await scheduler.check_prices()
+                await asyncio.sleep(0.1)
+                sent_before_alert = [chat_id for chat_id, _ in fake_bot.sent]
+                slow_alert.cancel()
+                await scheduler.wait_deliveries()
+                return sent_before_alert
+            sent_before_alert = asyncio.run(first_tick())
+            seed_ok = (
+                sent_before_alert == [3] and [chat_id for chat_id, _ in fake_bot.sent] == [3]
+                and pending_up not in restarted.rules and restarted.last_prices["BTC/USD"] == 71000.0
+            )
+        
+        if parse_ok and index_ok and speed_ok and rejected == 2 and remove_ok and persist_ok and scheduler_ok and seed_ok:
+            logger.info(f"Alvos de preço: 100 mil alvos, tick mais lento em {tick_ms:.3f} ms")
+            print(f"✅ Alvos de preço: OK")
+            print(f"   100 mil alvos: tick mais lento em {tick_ms:.3f} ms")
+            return True
+        else:
+            logger.error(f"Falha nos alvos de preço: {parse_ok} {index_ok} {speed_ok} {rejected} {remove_ok} {persist_ok} {scheduler_ok} {seed_ok} {fired}")
+            print("❌ Alvos de preço: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar os alvos de preço: {e}")
+        print(f"❌ Alvos de preço: ERRO - {e}")
+        return False
+
+def test_alert_state():
+    """Testa a máquina de estados dos alertas: histerese, cooldown e agrupamento de repetições."""
+    logger.info("Testando a máquina de estados dos alertas...")
+    
+    try:
+        import tempfile
+        from alert_state import AlertStateMachine, NEW, UPDATE, ARMED, COOLING
+        from scheduler import PriceScheduler
+        from price_monitor import PriceMonitor
+        from subscribers import SubscriberStore
+        from alert_journal import AlertJournal
+        
+        # Limiar de 2%, rearme abaixo de 1,5%, cooldown de 10 minutos e atualização a cada 1 ponto
+        machine = AlertStateMachine(hysteresis=0.5, cooldown=600, update_step=1.0)
+        steps = [
+            (0, 0.5, None), (60, 2.1, NEW), (120, 2.5, None), (180, 3.2, UPDATE), (240, -2.3, UPDATE),
+            (300, 1.6, None), (360, 1.0, None), (420, 2.4, UPDATE), (480, 0.2, None), (1000, 0.3, None),
+            (1100, 2.2, NEW)
+        ]
+        actions = [machine.evaluate("BTC/USD", move, 2.0, now) for now, move, _ in steps]
+        machine_ok = actions == [expected for _, _, expected in steps]
+        machine.evaluate("USD/BRL", 2.5, 2.0, 0)
+        machine.evaluate("USD/BRL", 0.1, 2.0, 10)
+        states_ok = machine.get("USD/BRL").state == COOLING and machine.get("ETH/USD").state == ARMED
+        
+        # Período volátil: uma única transmissão, e as repetições viram edições do mesmo alerta.
+        # O bot lento não segura os ticks: as entregas rodam em segundo plano, em ordem
+        class ScriptedMonitor:
+            def __init__(self, registry, moves):
+                self.registry = registry
+                self.moves = iter(moves)
+            
+            async def fetch_price_data(self, pairs=None):
+                move = next(self.moves)
+                return {"BTC/USD": {
+                    "price": 100 + move, "timestamp": datetime.now().isoformat(), "variation": move,
+                    "windows": {"5m": {"move": move}, "1h": {"move": move}}
+                }}
+        
+        moves = [0.5, 2.2, 2.6, 3.4, 1.0, 2.3, 0.4, 4.0]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = os.path.join(tmp_dir, "radar.db")
+            subscribers = SubscriberStore(db_file)
+            for chat_id in (1, 2, 3):
+                subscribers.add(chat_id)
+            journal = AlertJournal(db_file)
+            fake_bot = FakeBot(delay=0.05)
+            scheduler = PriceScheduler(
+                bot=fake_bot,
+                subscribers=subscribers,
+                monitor=ScriptedMonitor(PriceMonitor(lazy=True).registry, moves),
+                alerts=journal
+            )
+            scheduler.alert_states = AlertStateMachine(hysteresis=0.5, cooldown=3600, update_step=1.0)
+            
+            async def run():
+                started = time.monotonic()
+                for _ in moves:
+                    await scheduler.check_prices()
+                elapsed = time.monotonic() - started
+                await scheduler.wait_deliveries()
+                return elapsed
+            tick_time = asyncio.run(run())
+            
+            alerts = journal.query(pair="BTC/USD")
+            merge_ok = (
+                tick_time < 0.05 and not scheduler.deliveries
+                and fake_bot.log == ["send"] * 3 + ["edit"] * 9
+                and sorted(chat_id for chat_id, _ in fake_bot.sent) == [1, 2, 3]
+                and len(fake_bot.edits) == 9
+                and all(message_id == 100 + chat_id for chat_id, message_id, _, _ in fake_bot.edits)
+                and "ATUALIZADO" in fake_bot.edits[-1][2] and "4.00%" in fake_bot.edits[-1][2]
+                and len(alerts) == 1 and alerts[0]["variation"] == 4.0
+                and scheduler.alert_states.get("BTC/USD").updates == 3
+            )
+        
+        if machine_ok and states_ok and merge_ok:
+            logger.info(f"Máquina de estados: {actions}")
+            print(f"✅ Máquina de estados dos alertas: OK")
+            return True
+        else:
+            logger.error(f"Falha na máquina de estados dos alertas: {machine_ok} {states_ok} {merge_ok} {actions}")
+            print("❌ Máquina de estados dos alertas: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar a máquina de estados dos alertas: {e}")
+        print(f"❌ Máquina de estados dos alertas: ERRO - {e}")
+        return False
+
+def test_tick_scheduler():
+    """Testa o agendador de ticks: prazos sem deriva, intervalos por par, atrasos e jitter."""
+    logger.info("Testando o agendador de ticks...")
+    
+    try:
+        import random
+        from tick_scheduler import TickScheduler, SKIP, CATCH_UP, format_interval
+        from scheduler import PriceScheduler
+        from pairs import load_registry, DEFAULT_PAIRS
+        
+        # Sem jitter: cada verificação leva 4s, mas os ticks seguem a grade de 10s
+        ticks = TickScheduler(overrun=SKIP, jitter=0, rng=random.Random(1))
+        ticks.add("BTC/USD", 10, now=0)
+        starts = []
+        now = 0
+        for _ in range(50):
+            now = max(now, ticks.next_deadline())
+            keys = ticks.due(now)
+            starts.append(now)
+            now += 4
+            ticks.complete(keys, now)
+        drift_ok = starts == [10 * i for i in range(50)]
+        
+        # Intervalos por par: em 300s, BTC/USD (15s) roda 20 vezes e USD/BRL (300s) uma
+        ticks = TickScheduler(jitter=0)
+        ticks.add("BTC/USD", 15, now=0)
+        ticks.add("USD/BRL", 300, now=0)
+        counts = {}
+        while ticks.next_deadline() < 300:
+            now = ticks.next_deadline()
+            keys = ticks.due(now)
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+            ticks.complete(keys, now + 0.5)
+        per_pair_ok = counts == {"BTC/USD": 20, "USD/BRL": 1}
+        
+        # Verificação de 35s num intervalo de 10s: skip pula 3 ticks, catch_up os executa em seguida
+        skip = TickScheduler(overrun=SKIP, jitter=0)
+        skip.add("X", 10, now=0)
+        skip.complete(skip.due(0), 35)
+        catch_up = TickScheduler(overrun=CATCH_UP, jitter=0, max_catch_up=2)
+        catch_up.add("X", 10, now=0)
+        catch_up.complete(catch_up.due(0), 35)
+        deadlines = []
+        for _ in range(3):
+            deadlines.append(catch_up.next_deadline())
+            catch_up.complete(catch_up.due(35), 35)
+        overrun_ok = (
+            skip.next_deadline() == 40 and skip.stats("X")["skipped"] == 3
+            and deadlines == [10, 20, 40] and catch_up.stats("X")["skipped"] == 1
+            and catch_up.stats("X")["lag_max_ms"] == 25000
+        )
+        
+        # Jitter limitado a 5% do intervalo e sem acúmulo: os prazos ficam na grade
+        ticks = TickScheduler(jitter=0.05, rng=random.Random(7))
+        ticks.add("A", 100, now=0)
+        offsets = []
+        for i in range(200):
+            deadline = ticks.next_deadline()
+            offsets.append(deadline - 100 * i)
+            ticks.complete(ticks.due(deadline), deadline + 1)
+        jitter_ok = all(0 <= offset <= 5 for offset in offsets) and len(set(offsets)) > 100
+        
+        format_ok = (format_interval(15), format_interval(300), format_interval(3600), format_interval(90)) == (
+            "15s", "5 min", "1h", "90s"
+        )
+        
+        # Laço do agendador com relógio simulado: cada verificação leva 30 ms e os
+        # prazos não derivam; sem jitter, os pares que vencem juntos vão na mesma busca
+        class FakeClock:
+            def __init__(self):
+                self.now = 0.0
+            
+            def __call__(self):
+                return self.now
+            
+            async def sleep(self, delay):
+                self.now += delay + 1e-6
+                await asyncio.sleep(0)
+        
+        class TimedMonitor:
+            def __init__(self, registry, clock, scheduler_ref):
+                self.registry = registry
+                self.clock = clock
+                self.scheduler_ref = scheduler_ref
+                self.calls = []
+            
+            async def fetch_price_data(self, pairs=None):
+                self.calls.append((self.clock(), tuple(pairs)))
+                self.clock.now += 0.03
+                if sum("BTC/USD" in called for _, called in self.calls) == 20:
+                    self.scheduler_ref[0].stop_monitoring()
+                return {}
+        
+        def run_loop(jitter, rng=None):
+            clock = FakeClock()
+            registry = load_registry(os.path.join(os.path.dirname(__file__), "no_such_pairs.json"))
+            for config in registry:
+                config.check_interval = 10 if config.name == "BTC/USD" else None
+            scheduler_ref = []
+            monitor = TimedMonitor(registry, clock, scheduler_ref)
+            scheduler = PriceScheduler(monitor=monitor, alerts=type("Journal", (), {})())
+            scheduler_ref.append(scheduler)
+            scheduler.check_interval = 20
+            scheduler.jitter = jitter
+            scheduler.clock, scheduler.sleep, scheduler.rng = clock, clock.sleep, rng
+            asyncio.run(asyncio.wait_for(scheduler.start_monitoring(), 5))
+            return monitor.calls, scheduler.ticks.stats("BTC/USD")
+        
+        calls, stats = run_loop(0.05, random.Random(7))
+        btc = [at for at, pairs in calls if "BTC/USD" in pairs]
+        brl = [at for at, pairs in calls if "USD/BRL" in pairs]
+        jittered_ok = (
+            len(btc) == 20 and all(0 <= at - 10 * i <= 0.5 + 1e-3 for i, at in enumerate(btc))
+            and len(brl) == 10 and all(0 <= at - 20 * i <= 1.0 + 1e-3 for i, at in enumerate(brl))
+            and stats["lag_max_ms"] <= 31
+        )
+        calls, _ = run_loop(0)
+        batched_ok = (
+            [sorted(pairs) for _, pairs in calls] == [["BTC/USD", "USD/BRL"], ["BTC/USD"]] * 10
+            and DEFAULT_PAIRS[0].check_interval == 15 and DEFAULT_PAIRS[1].check_interval is None
+        )
+        
+        # Sem pares no registro o laço nem começa (e não levanta TypeError)
+        from pairs import PairRegistry
+        empty = PriceScheduler(monitor=TimedMonitor(PairRegistry(), FakeClock(), []), alerts=type("Journal", (), {})())
+        asyncio.run(asyncio.wait_for(empty.start_monitoring(), 5))
+        empty_ok = not empty.running and empty.monitor.calls == []
+        loop_ok = jittered_ok and batched_ok and empty_ok
+        
+        if drift_ok and per_pair_ok and overrun_ok and jitter_ok and format_ok and loop_ok:
+            logger.info(f"Agendador de ticks: {counts}, atraso p95 {stats['lag_p95_ms']} ms")
+            print(f"✅ Agendador de ticks: OK")
+            return True
+        else:
+            logger.error(
+                f"Falha no agendador de ticks: {drift_ok} {per_pair_ok} {overrun_ok} {jitter_ok} {format_ok} {loop_ok} "
+                f"{counts} {deadlines} {stats}"
+            )
+            print("❌ Agendador de ticks: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar o agendador de ticks: {e}")
+        print(f"❌ Agendador de ticks: ERRO - {e}")
+        return False
+
+def test_provider_failover():
+    """Testa a cadeia de provedores: circuit breakers, failover rápido e último preço marcado como desatualizado."""
+    logger.info("Testando o failover de provedores de cotações...")
+    
+    try:
+        import tempfile
+        from provider_chain import ProviderChain, CLOSED, OPEN
+        from scheduler import PriceScheduler
+        
+        offset = [0.0]
+        clock = lambda: time.monotonic() + offset[0]
+        symbols = ["BTC-USD", "USDBRL=X"]
+        
+        async def run_chain():
+            # Provedor principal travado: dois prazos de 0,2s e o circuito abre; depois o failover leva milissegundos
+            primary = StubProvider("principal", mode="hang")
+            backup = StubProvider("reserva", delay=0.01)
+            chain = ProviderChain([primary, backup], timeout=0.2, failure_threshold=2, reset_timeout=30, clock=clock)
+            durations = []
+            for _ in range(5):
+                started = time.monotonic()
+                quotes = await chain.fetch_quotes(symbols)
+                durations.append(time.monotonic() - started)
+            breaker_ok = (
+                quotes == backup.prices and len(primary.requests) == 2 and chain.slots[0].breaker.state == OPEN
+                and all(duration > 0.2 for duration in durations[:2]) and max(durations[2:]) < 0.1
+            )
+            
+            # Fim do cooldown: o teste do principal roda em segundo plano e, recuperado, o circuito fecha
+            primary.mode = "ok"
+            offset[0] += 31
+            started = time.monotonic()
+            await chain.fetch_quotes(symbols)
+            probe_elapsed = time.monotonic() - started
+            await asyncio.sleep(0.05)
+            recovery_ok = probe_elapsed < 0.1 and len(primary.requests) == 3 and chain.slots[0].breaker.state == CLOSED
+            
+            # Teste que falha reabre o circuito com o cooldown dobrado
+            failing = StubProvider("instavel", mode="error")
+            chain = ProviderChain([failing, StubProvider("reserva")], failure_threshold=1, reset_timeout=10, clock=clock)
+            await chain.fetch_quotes(symbols)
+            offset[0] += 11
+            await chain.fetch_quotes(symbols)
+            await asyncio.sleep(0.01)
+            backoff_ok = chain.slots[0].breaker.state == OPEN and chain.slots[0].breaker.timeout == 20
+            
+            # Seleção por latência: depois de medir os dois, o provedor rápido atende quase tudo
+            slow = StubProvider("lento", delay=0.05)
+            fast = StubProvider("rapido", delay=0.005)
+            chain = ProviderChain([slow, fast], clock=clock)
+            for _ in range(10):
+                await chain.fetch_quotes(symbols)
+            latency_ok = len(fast.requests) >= 8 and len(slow.requests) <= 2
+            
+            # Resposta parcial: só os símbolos que faltaram vão para o provedor seguinte
+            partial = StubProvider("parcial", prices={"BTC-USD": 64000.0})
+            complete = StubProvider("completo", prices={"BTC-USD": 1.0, "USDBRL=X": 5.43})
+            chain = ProviderChain([partial, complete], clock=clock)
+            quotes = await chain.fetch_quotes(symbols)
+            partial_ok = quotes == {"BTC-USD": 64000.0, "USDBRL=X": 5.43} and complete.requests == [["USDBRL=X"]]
+            return breaker_ok, recovery_ok, backoff_ok, latency_ok, partial_ok, chain.stats()
+        
+        breaker_ok, recovery_ok, backoff_ok, latency_ok, partial_ok, stats = asyncio.run(run_chain())
+        
+        # Todos os provedores fora do ar: o último preço real é servido como desatualizado, sem gravar nada
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _seed_history(tmp_dir, {"btc_usd": 64000.0, "usd_brl": 5.43}, datetime.now() - timedelta(minutes=10))
+            monitor = _temp_monitor(
+                tmp_dir, provider=ProviderChain([StubProvider("a", mode="error"), StubProvider("b", mode="error")])
+            )
+            scheduler = PriceScheduler(monitor=monitor, alerts=type("Journal", (), {})())
+            
+            async def run_monitor():
+                data = await scheduler.check_prices()
+                return data, await monitor.fetch_price_message()
+            data, message = asyncio.run(run_monitor())
+            stale_ok = (
+                all(quote["stale"] and quote["variation"] is None for quote in data.values())
+                and data["BTC/USD"]["price"] == 64000.0 and data["USD/BRL"]["price"] == 5.43
+                and all(len(history) == 1 for history in monitor.histories.values())
+                and "desatualizado" in message
+                and scheduler.alert_states.get("BTC/USD").state == "armed"
+            )
+        
+        if breaker_ok and recovery_ok and backoff_ok and latency_ok and partial_ok and stale_ok:
+            logger.info(f"Provedores: {stats}")
+            print(f"✅ Failover de provedores: OK")
+            return True
+        else:
+            logger.error(
+                f"Falha no failover de provedores: {breaker_ok} {recovery_ok} {backoff_ok} {latency_ok} {partial_ok} "
+                f"{stale_ok} {stats}"
+            )
+            print("❌ Failover de provedores: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar o failover de provedores: {e}")
+        print(f"❌ Failover de provedores: ERRO - {e}")
+        return False
+
+def test_consensus():
+    """Testa o preço de consenso: mediana robusta, quórum, peso por frescor e alertas só no consenso."""
+    logger.info("Testando o consenso de preços...")
+    
+    try:
+        import tempfile
+        from consensus import ConsensusProvider, robust_consensus, weighted_median
+        from provider_chain import ProviderChain
+        from price_monitor import CoinbaseProvider, AwesomeApiProvider
+        from scheduler import PriceScheduler
+        from subscribers import SubscriberStore
+        from alert_journal import AlertJournal
+        
+        # Cálculo: o outlier é descartado pelo MAD; duas fontes divergentes não formam consenso
+        price, kept, rejected = robust_consensus([("a", 100.0, 1), ("b", 100.1, 1), ("c", 99.9, 1), ("d", 102.5, 1)])
+        two_price, two_kept, _ = robust_consensus([("a", 100.0, 1), ("b", 102.5, 1)])
+        math_ok = (
+            price == 100.0 and kept == ["a", "b", "c"] and rejected == ["d"]
+            and two_price is None and not two_kept
+            and weighted_median([1.0, 2.0, 3.0], [0.1, 0.1, 1.0]) == 3.0
+        )
+        
+        async def run_provider():
+            # Quórum de 2 com fontes rápidas concordando: a fonte lenta não acrescenta latência
+            slow = StubSource("lenta", {"BTC-USD": 100.0}, delay=2.0)
+            consensus = ConsensusProvider([
+                StubSource("a", {"BTC-USD": 100.0, "USDBRL=X": 5.43}, delay=0.01),
+                StubSource("b", {"BTC-USD": 100.05}, delay=0.02),
+                StubSource("c", {"USDBRL=X": 5.44}, delay=0.03),
+                slow
+            ], quorum=2)
+            started = time.monotonic()
+            quotes = await consensus.fetch_quotes(["BTC-USD", "USDBRL=X"])
+            elapsed = time.monotonic() - started
+            quorum_ok = (
+                elapsed < 0.2 and slow.finished == 0 and quotes["BTC-USD"] in (100.0, 100.05)
+                and quotes["USDBRL=X"] in (5.43, 5.44) and len(consensus.results["BTC-USD"]["sources"]) == 2
+            )
+            
+            # Um print ruim entre as duas primeiras respostas: espera a terceira e descarta o outlier
+            consensus = ConsensusProvider([
+                StubSource("a", {"BTC-USD": 100.0}, delay=0.01),
+                StubSource("ruim", {"BTC-USD": 102.5}, delay=0.01),
+                StubSource("c", {"BTC-USD": 100.02}, delay=0.1)
+            ], quorum=2)
+            quotes = await consensus.fetch_quotes(["BTC-USD"])
+            outlier_ok = (
+                quotes["BTC-USD"] in (100.0, 100.02) and consensus.results["BTC-USD"]["rejected"] == ["ruim"]
+                and consensus.rejections == 1
+            )
+            
+            # Uma das duas fontes falha: sem quórum, o símbolo fica de fora; com o circuito aberto, o quórum cai para 1
+            failing = ProviderChain([StubSource("instavel", {"USDBRL=X": 5.5}, mode="error")], failure_threshold=2)
+            consensus = ConsensusProvider([ProviderChain([StubSource("a", {"USDBRL=X": 5.43})]), failing], quorum=2)
+            first = await consensus.fetch_quotes(["USDBRL=X"])
+            second = await consensus.fetch_quotes(["USDBRL=X"])
+            third = await consensus.fetch_quotes(["USDBRL=X"])
+            degraded_ok = first == {} and second == {"USDBRL=X": 5.43} and third == {"USDBRL=X": 5.43}
+            
+            # Frescor: as fontes congeladas perdem peso e a mediana ponderada segue a que se move
+            now = [0.0]
+            frozen = [StubSource("congelada 1", {"X": 10.0}), StubSource("congelada 2", {"X": 10.0})]
+            moving = StubSource("viva", {"X": 10.0})
+            consensus = ConsensusProvider(frozen + [moving], quorum=3, tolerance=5.0, half_life=60, clock=lambda: now[0])
+            await consensus.fetch_quotes(["X"])
+            now[0] = 600
+            moving.prices["X"] = 10.2
+            quotes = await consensus.fetch_quotes(["X"])
+            freshness_ok = quotes["X"] == 10.2
+            
+            # Fonte lenta testando o provedor depois do cooldown: não é cancelada pelo quórum e o circuito fecha
+            offset = [0.0]
+            clock = lambda: time.monotonic() + offset[0]
+            kraken = StubSource("kraken", {"BTC-USD": 100.0}, mode="error")
+            kraken_chain = ProviderChain([kraken], failure_threshold=1, reset_timeout=10, clock=clock)
+            consensus = ConsensusProvider([
+                ProviderChain([StubSource("yahoo", {"BTC-USD": 100.0}, delay=0.01)]),
+                ProviderChain([StubSource("coinbase", {"BTC-USD": 100.0}, delay=0.01)]),
+                kraken_chain
+            ], quorum=2)
+            await consensus.fetch_quotes(["BTC-USD"])
+            opened = kraken_chain.slots[0].breaker.state == "open"
+            kraken.mode, kraken.delay = "ok", 0.1
+            offset[0] += 11
+            started = time.monotonic()
+            await consensus.fetch_quotes(["BTC-USD"])
+            probe_elapsed = time.monotonic() - started
+            await asyncio.sleep(0.15)
+            recovered = kraken.finished == 1 and kraken_chain.slots[0].breaker.state == "closed"
+            
+            # Teste cancelado de fora: o circuito volta a aberto e vencido, e o provedor é testado de novo
+            kraken.mode = "error"
+            await kraken_chain.fetch_quotes(["BTC-USD"])
+            offset[0] += 11
+            kraken.mode = "ok"
+            task = asyncio.ensure_future(kraken_chain.fetch_quotes(["BTC-USD"]))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            released = kraken_chain.slots[0].breaker.due() and kraken_chain.available()
+            retried = await kraken_chain.fetch_quotes(["BTC-USD"])
+            probe_ok = (
+                opened and probe_elapsed < 0.08 and recovered and released
+                and retried == {"BTC-USD": 100.0} and kraken_chain.slots[0].breaker.state == "closed"
+            )
+            return quorum_ok, outlier_ok, degraded_ok, freshness_ok, probe_ok
+        
+        quorum_ok, outlier_ok, degraded_ok, freshness_ok, probe_ok = asyncio.run(run_provider())
+        
+        # Fontes padrão: cada uma só cota os símbolos que conhece, e o pairs.json pode acrescentar outros
+        coinbase = CoinbaseProvider(None, symbols={"SOL-USD": "SOL-USD"})
+        mapping_ok = (
+            coinbase.supports("BTC-USD") and coinbase.supports("SOL-USD") and not coinbase.supports("USDBRL=X")
+            and AwesomeApiProvider(None).supports("USDBRL=X")
+            and AwesomeApiProvider(None).parse({"USDBRL": {"bid": "5.4321"}}) == 5.4321
+        )
+        
+        # Ponta a ponta: o print ruim de uma fonte não gera alerta; o movimento confirmado pelo consenso gera
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sources = [StubSource(name, {"BTC-USD": 100.0, "USDBRL=X": 5.0}) for name in ("a", "b", "c")]
+            monitor = _temp_monitor(tmp_dir, provider=ConsensusProvider(sources, quorum=2))
+            journal = AlertJournal(os.path.join(tmp_dir, "radar.db"))
+            scheduler = PriceScheduler(
+                monitor=monitor, subscribers=SubscriberStore(os.path.join(tmp_dir, "radar.db")), alerts=journal
+            )
+            
+            async def run_ticks():
+                await scheduler.check_prices()
+                sources[0].prices["BTC-USD"] = 103.0
+                bad_print = await scheduler.check_prices()
+                await scheduler.wait_deliveries()
+                alerts_after_bad_print = len(journal.query(pair="BTC/USD"))
+                for source in sources:
+                    source.prices["BTC-USD"] = 103.0
+                await scheduler.check_prices()
+                await scheduler.wait_deliveries()
+                return bad_print, alerts_after_bad_print
+            bad_print, alerts_after_bad_print = asyncio.run(run_ticks())
+            alerts = journal.query(pair="BTC/USD")
+            end_to_end_ok = (
+                bad_print["BTC/USD"]["price"] == 100.0 and alerts_after_bad_print == 0
+                and len(alerts) == 1 and alerts[0]["price"] == 103.0
+                and "Fontes: " in scheduler._format_alert_message("BTC/USD", dict(bad_print["BTC/USD"], variation=3.0))
+            )
+        
+        if (math_ok and quorum_ok and outlier_ok and degraded_ok and freshness_ok and probe_ok and mapping_ok
+                and end_to_end_ok):
+            logger.info("Consenso de preços verificado")
+            print(f"✅ Consenso de preços: OK")
+            return True
+        else:
+            logger.error(
+                f"Falha no consenso de preços: {math_ok} {quorum_ok} {outlier_ok} {degraded_ok} {freshness_ok} "
+                f"{probe_ok} {mapping_ok} {end_to_end_ok}"
+            )
+            print("❌ Consenso de preços: FALHA")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Erro ao testar o consenso de preços: {e}")
+        print(f"❌ Consenso de preços: ERRO - {e}")
+        return False
+
 def test_scheduler():
     """Testa o agendador de verificação de preços."""
     logger.info("Testando o agendador...")
@@ -114,6 +2136,27 @@ def test_bot_structure():
             "price_monitor.py",
             "scheduler.py",
             "news_searcher.py",
+            "article_store.py",
+            "rolling_window.py",
+            "price_ring.py",
+            "ohlc.py",
+            "charts.py",
+            "startup_profile.py",
+            "webhook.py",
+            "price_targets.py",
+            "alert_state.py",
+            "tick_scheduler.py",
+            "provider_chain.py",
+            "consensus.py",
+            "history_store.py",
+            "async_fetcher.py",
+            "pairs.py",
+            "loop_watchdog.py",
+            "quote_cache.py",
+            "broadcast.py",
+            "database.py",
+            "subscribers.py",
+            "alert_journal.py",
             "run_bot.sh",
             "telegrambot.service",
             "install_service.sh"
@@ -152,9 +2195,81 @@ def run_tests():
     # Testa o monitor de preços
     price_monitor_ok = test_price_monitor()
     
+    # Testa a busca assíncrona de preços
+    async_fetcher_ok = test_async_fetcher()
+    
+    # Testa as cotações em lote
+    quote_batching_ok = test_quote_batching()
+    
+    # Testa o registro de pares
+    pair_registry_ok = test_pair_registry()
+    
+    # Testa o watchdog do event loop
+    loop_watchdog_ok = test_loop_watchdog()
+    
+    # Testa o cache de cotações
+    quote_cache_ok = test_quote_cache()
+    
+    # Testa a transmissão de alertas
+    broadcast_ok = test_broadcast()
+    
+    # Testa o armazenamento de assinantes
+    subscriber_store_ok = test_subscriber_store()
+    
+    # Testa o diário de alertas
+    alert_journal_ok = test_alert_journal()
+    
+    # Testa o armazenamento de histórico
+    history_store_ok = test_history_store()
+    
     # Testa o buscador de notícias
     news_searcher_ok = test_news_searcher()
     
+    # Testa o cache de notícias
+    news_cache_ok = test_news_cache()
+    
+    # Testa as fontes de notícias em paralelo
+    news_sources_ok = test_news_sources()
+    
+    # Testa a entrega progressiva de notícias
+    streaming_ok = test_streaming_alert()
+    
+    # Testa o armazenamento de notícias
+    article_store_ok = test_article_store()
+    
+    # Testa as janelas deslizantes
+    rolling_window_ok = test_rolling_window()
+    
+    # Testa o histórico em memória
+    price_ring_ok = test_price_ring()
+    
+    # Testa a agregação OHLC
+    ohlc_ok = test_ohlc_rollup()
+    
+    # Testa o comando /grafico
+    chart_ok = test_chart_command()
+    
+    # Testa a inicialização rápida
+    startup_ok = test_fast_startup()
+    
+    # Testa o modo webhook
+    webhook_ok = test_webhook()
+    
+    # Testa os alvos de preço
+    targets_ok = test_price_targets()
+    
+    # Testa a máquina de estados dos alertas
+    alert_state_ok = test_alert_state()
+    
+    # Testa o agendador de ticks
+    tick_scheduler_ok = test_tick_scheduler()
+    
+    # Testa o failover de provedores de cotações
+    failover_ok = test_provider_failover()
+    
+    # Testa o consenso de preços entre provedores
+    consensus_ok = test_consensus()
+    
     # Testa o agendador
     scheduler_ok = test_scheduler()
     
@@ -166,7 +2281,31 @@ def run_tests():
     tests = [
         ("Estrutura do bot", structure_ok),
         ("Monitor de preços", price_monitor_ok),
+        ("Busca assíncrona de preços", async_fetcher_ok),
+        ("Cotações em lote", quote_batching_ok),
+        ("Registro de pares", pair_registry_ok),
+        ("Watchdog do event loop", loop_watchdog_ok),
+        ("Cache de cotações", quote_cache_ok),
+        ("Transmissão de alertas", broadcast_ok),
+        ("Armazenamento de assinantes", subscriber_store_ok),
+        ("Diário de alertas", alert_journal_ok),
+        ("Armazenamento de histórico", history_store_ok),
         ("Buscador de notícias", news_searcher_ok),
+        ("Cache de notícias", news_cache_ok),
+        ("Fontes de notícias em paralelo", news_sources_ok),
+        ("Entrega progressiva de notícias", streaming_ok),
+        ("Armazenamento de notícias", article_store_ok),
+        ("Janelas deslizantes", rolling_window_ok),
+        ("Histórico em memória", price_ring_ok),
+        ("Agregação OHLC", ohlc_ok),
+        ("Comando /grafico", chart_ok),
+        ("Inicialização rápida", startup_ok),
+        ("Modo webhook", webhook_ok),
+        ("Alvos de preço", targets_ok),
+        ("Máquina de estados dos alertas", alert_state_ok),
+        ("Agendador de ticks", tick_scheduler_ok),
+        ("Failover de provedores", failover_ok),
+        ("Consenso de preços", consensus_ok),
         ("Agendador", scheduler_ok)
     ]
     
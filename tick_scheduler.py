@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import heapq
+import random
+import logging
+from collections import deque
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Política quando um tick termina depois do prazo do seguinte
+SKIP = "skip"          # Pula os ticks perdidos e volta à grade de horários
+CATCH_UP = "catch_up"  # Executa os ticks perdidos em seguida (até ``max_catch_up``)
+
+# Configuração padrão (variáveis de ambiente opcionais): política de atraso,
+# jitter como fração do intervalo e atraso de tick (s) que gera aviso no log
+TICK_OVERRUN = os.environ.get("TICK_OVERRUN", SKIP)
+TICK_JITTER = float(os.environ.get("TICK_JITTER", "0.05"))
+TICK_LAG_WARNING = float(os.environ.get("TICK_LAG_WARNING", "1.0"))
+
+def format_interval(seconds):
+    """Formata um intervalo em segundos, ex.: ``15s``, ``5 min`` ou ``1h``."""
+    if seconds < 60 or seconds % 60:
+        return f"{seconds:g}s"
+    if seconds < 3600 or seconds % 3600:
+        return f"{seconds // 60:g} min"
+    return f"{seconds // 3600:g}h"
+
+class _Tick:
+    """Agenda de uma chave: grade nominal, prazo efetivo (com jitter) e estatísticas."""
+
+    __slots__ = ("key", "interval", "nominal", "deadline", "catch_ups", "count", "skipped", "lags")
+
+    def __init__(self, key, interval, nominal):
+        self.key = key
+        self.interval = interval
+        self.nominal = nominal
+        self.deadline = nominal
+        self.catch_ups = 0
+        self.count = 0
+        self.skipped = 0
+        self.lags = deque(maxlen=256)
+
+class TickScheduler:
+    """Ticks periódicos por chave com prazos no relógio monotônico, sem deriva.
+
+    Cada chave tem uma grade nominal ``início + n * intervalo``; o prazo de
+    cada tick é o horário nominal mais um jitter aleatório de até ``jitter``
+    do intervalo, sorteado de novo a cada tick, para que chaves com o mesmo
+    intervalo não fiquem sincronizadas. Como o jitter não se acumula, o
+    período médio é exatamente o intervalo, qualquer que seja a duração do
+    trabalho. Se um tick termina depois do prazo do seguinte, ``overrun``
+    decide entre pular os ticks perdidos (``SKIP``) ou executá-los em seguida
+    (``CATCH_UP``, no máximo ``max_catch_up`` seguidos). O atraso de cada tick
+    (início real menos prazo) é registrado.
+    """
+
+    def __init__(self, overrun=TICK_OVERRUN, jitter=TICK_JITTER, max_catch_up=3, lag_warning=TICK_LAG_WARNING,
+                 clock=time.monotonic, rng=None):
+        if overrun not in (SKIP, CATCH_UP):
+            raise ValueError(f"Política de atraso inválida: {overrun!r}")
+        self.overrun = overrun
+        self.jitter = jitter
+        self.max_catch_up = max_catch_up
+        self.lag_warning = lag_warning
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.ticks = {}
+        self._heap = []
+        self._seq = 0
+
+    def _push(self, tick):
+        self._seq += 1
+        heapq.heappush(self._heap, (tick.deadline, self._seq, tick.key))
+
+    def _jittered(self, tick):
+        return tick.nominal + self.rng.uniform(0, self.jitter * tick.interval)
+
+    def add(self, key, interval, now=None):
+        """Agenda ``key`` a cada ``interval`` segundos; o primeiro tick vence logo (mais o jitter)."""
+        now = self.clock() if now is None else now
+        tick = self.ticks[key] = _Tick(key, interval, now)
+        tick.deadline = self._jittered(tick)
+        self._push(tick)
+
+    def next_deadline(self):
+        """Prazo mais próximo entre as chaves agendadas (None se não houver)."""
+        return self._heap[0][0] if self._heap else None
+
+    def due(self, now=None):
+        """Retira e retorna as chaves com prazo vencido, registrando o atraso de cada uma.
+
+        As chaves retornadas só voltam à agenda com ``complete``.
+        """
+        now = self.clock() if now is None else now
+        keys = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            tick = self.ticks[key]
+            lag = now - tick.deadline
+            tick.lags.append(lag)
+            tick.count += 1
+            if lag > self.lag_warning and not tick.catch_ups:
+                logger.warning(f"Tick de {key} atrasado em {lag * 1000:.0f} ms.")
+            keys.append(key)
+        return keys
+
+    def complete(self, keys, now=None):
+        """Reagenda as chaves cujo tick terminou, aplicando a política de atraso."""
+        now = self.clock() if now is None else now
+        for key in keys:
+            tick = self.ticks[key]
+            tick.nominal += tick.interval
+            if tick.nominal > now:
+                tick.catch_ups = 0
+                tick.deadline = self._jittered(tick)
+            elif self.overrun == CATCH_UP and tick.catch_ups < self.max_catch_up:
+                # Executa o tick perdido imediatamente, sem jitter
+                tick.catch_ups += 1
+                tick.deadline = tick.nominal
+            else:
+                missed = int((now - tick.nominal) // tick.interval) + 1
+                tick.nominal += missed * tick.interval
+                tick.skipped += missed
+                tick.catch_ups = 0
+                tick.deadline = self._jittered(tick)
+                logger.warning(f"{missed} tick(s) de {key} pulado(s): a verificação demorou mais que o intervalo.")
+            self._push(tick)
+
+    def stats(self, key):
+        """Intervalo, ticks executados e pulados e atraso (ms) médio, p95 e máximo de uma chave."""
+        tick = self.ticks[key]
+        lags = sorted(tick.lags)
+
+        def ms(value):
+            return round(value * 1000, 1) if lags else None
+
+        return {
+            "interval": tick.interval,
+            "ticks": tick.count,
+            "skipped": tick.skipped,
+            "lag_avg_ms": ms(sum(lags) / len(lags) if lags else 0),
+            "lag_p95_ms": ms(lags[min(len(lags) - 1, int(0.95 * len(lags)))] if lags else 0),
+            "lag_max_ms": ms(lags[-1] if lags else 0)
+        }
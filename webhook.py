@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import hmac
+import json
+import time
+import asyncio
+import logging
+import secrets
+from collections import deque
+
+# Configuração de logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+# Configuração do modo webhook (variáveis de ambiente opcionais)
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.environ.get("PORT", "8080"))
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/telegram")
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "8"))
+
+# Cabeçalho com o segredo enviado pelo Telegram em cada update
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+# Limites de cada requisição
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+ENQUEUE_TIMEOUT = 1.0  # Espera máxima por espaço na fila antes de responder 503
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    503: "Service Unavailable"
+}
+
+def webhook_url(path=WEBHOOK_PATH):
+    """URL pública do webhook: ``WEBHOOK_URL`` ou o domínio público do Railway (None se não houver)."""
+    url = os.environ.get("WEBHOOK_URL")
+    if url:
+        return url
+    domain = os.environ.get("RAILWAY_PUBLIC_DOMAIN")
+    return f"https://{domain}{path}" if domain else None
+
+class HttpError(Exception):
+    """Requisição HTTP inválida, respondida com ``status``."""
+
+    def __init__(self, status):
+        super().__init__(REASONS.get(status, str(status)))
+        self.status = status
+
+async def read_request(reader, max_body=MAX_BODY_SIZE):
+    """Lê uma requisição HTTP/1.1 com ``Content-Length``.
+
+    Retorna ``(método, caminho, cabeçalhos, corpo)``, com os cabeçalhos em
+    minúsculas, ou None se o cliente fechou a conexão.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431)
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400)
+    if length > max_body:
+        raise HttpError(413)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+async def write_response(writer, status, body=b"", content_type="application/json", headers=None):
+    """Envia uma resposta HTTP/1.1 mantendo a conexão aberta."""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(body)}"]
+    if body:
+        lines.append(f"Content-Type: {content_type}")
+    for name, value in (headers or {}).items():
+        lines.append(f"{name}: {value}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+class WebhookServer:
+    """Servidor HTTP assíncrono que recebe os updates do Telegram por webhook.
+
+    Cada POST em ``path`` com o cabeçalho de segredo correto é colocado em uma
+    fila limitada e respondido imediatamente; ``workers`` tasks consomem a fila
+    e chamam ``handle_update(update)`` concorrentemente. Com a fila cheia, a
+    requisição espera até ``enqueue_timeout`` segundos e então recebe 503, e o
+    Telegram reenvia o update mais tarde. ``GET /healthz`` responde com as
+    estatísticas do servidor.
+    """
+
+    def __init__(self, handle_update, secret_token=None, path=WEBHOOK_PATH, host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                 queue_size=WEBHOOK_QUEUE_SIZE, workers=WEBHOOK_WORKERS, enqueue_timeout=ENQUEUE_TIMEOUT):
+        self.handle_update = handle_update
+        self.secret_token = secret_token or secrets.token_urlsafe(32)
+        self.path = path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=1000)
+        self._server = None
+        self._tasks = []
+
+    async def start(self):
+        """Abre a porta e inicia os workers; retorna a porta efetiva."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Webhook ouvindo em {self.host}:{self.port}{self.path} com {self.workers} worker(s).")
+        return self.port
+
+    async def stop(self, timeout=5):
+        """Para de aceitar conexões, processa o que já está na fila (até ``timeout``) e encerra os workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook encerrado com {self.queue.qsize()} update(s) na fila.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    status, body = await self._dispatch(*request)
+                except HttpError as e:
+                    await write_response(writer, e.status)
+                    break
+                headers = {"Retry-After": "1"} if status == 503 else None
+                await write_response(writer, status, body, headers=headers)
+                if request[2].get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"Erro na conexão do webhook: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, headers, body):
+        """Trata uma requisição e retorna ``(status, corpo)``."""
+        if path == "/healthz" and method == "GET":
+            return 200, json.dumps(self.stats()).encode()
+        if path != self.path:
+            return 404, b""
+        if method != "POST":
+            return 405, b""
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self.secret_token.encode()):
+            logger.warning("Update recusado: segredo do webhook inválido.")
+            return 403, b""
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return 400, b""
+        if not isinstance(update, dict):
+            logger.warning(f"Update recusado: esperado um objeto JSON, recebido {type(update).__name__}.")
+            return 400, b""
+
+        # Fila limitada: espera um pouco por espaço e, se continuar cheia, pede reenvio
+        try:
+            await asyncio.wait_for(self.queue.put((time.perf_counter(), update)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"Fila do webhook cheia ({self.queue.maxsize}); update recusado com 503.")
+            return 503, b""
+        self.received += 1
+        return 200, b""
+
+    async def _worker(self):
+        while True:
+            received_at, update = await self.queue.get()
+            try:
+                await self.handle_update(update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                update_id = update.get("update_id") if isinstance(update, dict) else None
+                logger.error(f"Erro ao processar update {update_id}: {e}")
+            finally:
+                self.latencies.append(time.perf_counter() - received_at)
+                self.queue.task_done()
+
+    def stats(self):
+        """Contadores do servidor e latência (ms) entre o recebimento e o fim do processamento."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "queued": self.queue.qsize(),
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95)
+        }